@@ -0,0 +1,102 @@
+"""
+Micro-benchmark for text cleaning.
+
+Compares the original five-pass clean_text implementation with the
+precompiled engine in text_normalizer, checks that both produce identical
+output and prints the speedup.
+
+Usage:
+    python benchmarks/bench_clean_text.py [--repeat N]
+"""
+import argparse
+import csv
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_normalizer import normalize, clean_batch
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV_FILES = ["sentiment_analysis_results_VADER.csv", "sentiment_analysis_results.csv"]
+
+
+def legacy_clean_text(text, remove_numbers=True, remove_emojis=True):
+    """
+    The original clean_text implementation, kept here as the reference.
+    """
+    if not text:
+        return ""
+    text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
+    if remove_emojis:
+        emoji_pattern = re.compile("["
+            u"\U0001F600-\U0001F64F"
+            u"\U0001F300-\U0001F5FF"
+            u"\U0001F680-\U0001F6FF"
+            u"\U0001F1E0-\U0001F1FF"
+            u"\U00002702-\U000027B0"
+            u"\U000024C2-\U0001F251"
+            "]+", flags=re.UNICODE)
+        text = emoji_pattern.sub(r'', text)
+    if remove_numbers:
+        text = re.sub(r'\d+', '', text)
+    text = re.sub(r'[^a-zA-Z\s\'\"]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def load_corpus():
+    """
+    Builds a corpus from the shipped CSVs (titles, urls and comment texts)
+    plus a few synthetic comments that exercise URLs, emojis and digits.
+    """
+    corpus = []
+    for name in CSV_FILES:
+        path = os.path.join(REPO_ROOT, name)
+        if not os.path.exists(path):
+            continue
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                corpus.append(row["title"])
+                corpus.append(f"{row['comment_text']} see {row['url']} ({row['comment_upvotes']} upvotes)")
+    corpus.extend([
+        "Great post 😀👍 check https://example.com/a?b=1&c=%20 now!!",
+        "2024 was wild… 100% agree 🚀🚀",
+        "Ｆｕｌｌ-width ｔｅｘｔ and café — “quotes” 'single'\t\ttabs\nnewlines",
+        "",
+    ])
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark clean_text implementations")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timing repetitions")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+
+    for remove_numbers in (True, False):
+        for remove_emojis in (True, False):
+            expected = [legacy_clean_text(t, remove_numbers, remove_emojis) for t in corpus]
+            assert [normalize(t, remove_numbers, remove_emojis) for t in corpus] == expected
+            assert clean_batch(corpus, remove_numbers, remove_emojis) == expected
+    print(f"Output identical on {len(corpus)} texts for all option combinations")
+
+    timings = {
+        "legacy clean_text": lambda: [legacy_clean_text(t) for t in corpus],
+        "normalize": lambda: [normalize(t) for t in corpus],
+        "clean_batch": lambda: clean_batch(corpus),
+    }
+    results = {}
+    for label, func in timings.items():
+        results[label] = min(timeit.repeat(func, number=20, repeat=args.repeat)) / 20
+    baseline = results["legacy clean_text"]
+    for label, seconds in results.items():
+        rate = len(corpus) / seconds
+        print(f"{label:<18} {seconds * 1000:8.2f} ms/pass  {rate:12,.0f} texts/sec  {baseline / seconds:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
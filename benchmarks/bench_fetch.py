@@ -0,0 +1,66 @@
+"""
+Benchmark for concurrent comment-tree fetching.
+
+Starts the local Reddit stand-in from mock_reddit.py, points the praw clients
+at it and times fetching every comment tree of the top listing one request
+at a time and with several requests in flight.
+
+Usage:
+    python benchmarks/bench_fetch.py [--posts 100] [--latency 0.05] [--concurrency 1 4 8 16]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# The stand-in server accepts any credentials
+os.environ.setdefault("REDDIT_CLIENT_ID", "benchmark")
+os.environ.setdefault("REDDIT_CLIENT_SECRET", "benchmark")
+os.environ.setdefault("REDDIT_USER_AGENT", "sentiment-analyzer benchmark")
+
+import vadertest
+from mock_reddit import MockRedditServer, load_listings, synthesize_listings
+from reddit_fetch import RateLimiter, create_session
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent comment fetching")
+    parser.add_argument("--posts", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds of delay per request")
+    parser.add_argument("--listings", help="Directory of recorded API responses")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    posts, comments = load_listings(args.listings) if args.listings else synthesize_listings(args.posts)
+
+    with MockRedditServer(posts, comments, latency=args.latency) as server:
+        baseline = None
+        for concurrency in args.concurrency:
+            vadertest.configure_reddit(
+                oauth_url=server.url,
+                reddit_url=server.url,
+                requestor_kwargs={"session": create_session(max(concurrency, 10))},
+            )
+            # The stand-in has no quota, so only the concurrency limit applies
+            vadertest.rate_limiter = RateLimiter(requests_per_minute=10 ** 6)
+            server.max_concurrent = 0
+
+            start = time.perf_counter()
+            top_posts = vadertest.get_reddit().subreddit("mock").top(limit=len(posts))
+            fetched = sum(
+                1 for _, valid_comments, error in vadertest.iter_post_comments(
+                    top_posts, fetch_concurrency=concurrency)
+                if valid_comments is not None and error is None
+            )
+            seconds = time.perf_counter() - start
+            baseline = baseline or seconds
+            print(f"concurrency {concurrency:>3}: {fetched} comment trees in {seconds:6.2f}s  "
+                  f"({fetched / seconds:7.1f} trees/sec, {baseline / seconds:4.1f}x, "
+                  f"peak in flight {server.max_concurrent})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark for loading the VADER lexicon in a fresh process.
+
+Compiles the lexicon to a temporary file, then starts fresh interpreters that
+either parse the lexicon text (SentimentIntensityAnalyzer) or memory-map the
+compiled file, and build a BatchVaderScorer from it, as a pool worker does.
+Reports the median load time and the Python heap each process allocates for
+its copy, and checks that both analyzers score the shipped comments the same.
+
+Usage:
+    python benchmarks/bench_lexicon.py [--runs 5]
+"""
+import argparse
+import csv
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from nltk.sentiment.vader import SentimentIntensityAnalyzer, VaderConstants
+from nltk_resources import VADER_LEXICON_RESOURCE, ensure_resource
+from vader_batch import BatchVaderScorer
+from vader_lexicon import CompiledLexicon, compile_lexicon, load_analyzer
+
+CORPUS_FILE = os.path.join(REPO_ROOT, "sentiment_analysis_results_VADER.csv")
+
+# Imports happen before timing, so only loading the lexicon is measured
+LOADERS = {
+    "text": (
+        "from nltk.sentiment.vader import SentimentIntensityAnalyzer\n"
+        "from vader_batch import BatchVaderScorer\n"
+        "start()\n"
+        "sid = SentimentIntensityAnalyzer()\n"
+        "scorer = BatchVaderScorer(sid.lexicon)\n"
+    ),
+    "compiled": (
+        "from vader_batch import BatchVaderScorer\n"
+        "from vader_lexicon import CompiledLexicon, load_analyzer\n"
+        "start()\n"
+        "sid = load_analyzer(CompiledLexicon(PATH))\n"
+        "scorer = BatchVaderScorer(sid.lexicon)\n"
+    ),
+}
+
+# Tracing allocations slows loading down, so it is only enabled for a separate run
+HARNESS = """
+import json, sys, time, tracemalloc
+PATH = {path!r}
+def start():
+    global started
+    if {trace!r}:
+        tracemalloc.start()
+    started = time.perf_counter()
+{loader}
+seconds = time.perf_counter() - started
+print(json.dumps({{"seconds": seconds, "allocated": tracemalloc.get_traced_memory()[0]}}))
+"""
+
+
+def run_loader(loader, path, trace=False):
+    code = HARNESS.format(path=path, loader=loader, trace=trace)
+    completed = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True,
+                               text=True, check=True)
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def check_scores(path):
+    with open(CORPUS_FILE, newline='', encoding='utf-8') as f:
+        corpus = [row["comment_text"] for row in csv.DictReader(f)]
+    text = SentimentIntensityAnalyzer()
+    compiled = load_analyzer(CompiledLexicon(path))
+    assert all(text.polarity_scores(t) == compiled.polarity_scores(t) for t in corpus), "analyzer scores differ"
+    expected = BatchVaderScorer(text.lexicon).polarity_scores_batch(corpus)
+    assert BatchVaderScorer(compiled.lexicon).polarity_scores_batch(corpus) == expected, "batch scores differ"
+    return len(corpus)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text vs compiled lexicon loading")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per loader")
+    args = parser.parse_args()
+
+    ensure_resource(VADER_LEXICON_RESOURCE)
+    constants = VaderConstants()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "vader_lexicon.bin")
+        compile_lexicon(SentimentIntensityAnalyzer().lexicon, constants.BOOSTER_DICT, constants.NEGATE, path)
+        print(f"Compiled lexicon: {os.path.getsize(path)} bytes")
+        print(f"Scores identical on {check_scores(path)} comments")
+
+        results = {}
+        for name, loader in LOADERS.items():
+            seconds = statistics.median(run_loader(loader, path)["seconds"] for _ in range(args.runs))
+            allocated = run_loader(loader, path, trace=True)["allocated"]
+            results[name] = seconds
+            print(f"{name:>8}: {seconds * 1000:6.1f}ms to load, {allocated / 1024:7.0f}KiB allocated per process")
+        print(f"speedup: {results['text'] / results['compiled']:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
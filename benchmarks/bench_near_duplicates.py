@@ -0,0 +1,147 @@
+"""
+Benchmark for the MinHash/LSH near-duplicate stage.
+
+Generates a synthetic comment dump: original comments drawn from a large
+Zipf-distributed vocabulary, and about --repeat-share of lightly edited
+repeats of earlier ones (a word changed, dropped or added, a short tail, a
+quote with a short reply, or an exact copy). It reports:
+
+- the stage alone: comments/sec through NearDuplicateIndex.assign, the
+  memory held by the index and the peak allocated while clustering, the
+  share of comments clustered as duplicates, the share of edited repeats
+  found (recall) and of originals wrongly merged into a cluster;
+- end to end: records/sec of bulk_score.iter_scored on the first --e2e
+  comments, in-process and without the score cache, with and without the
+  stage.
+
+Usage:
+    python benchmarks/bench_near_duplicates.py [--comments 1000000] [--repeat-share 0.3]
+                                               [--threshold 0.8] [--e2e 200000]
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from itertools import accumulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bulk_score import iter_scored
+from near_duplicates import NearDuplicateIndex
+
+SYLLABLES = ["ka", "lo", "mi", "re", "tan", "po", "su", "vel", "dra", "ne", "qui", "sor", "ba", "ith", "gon", "ur"]
+SENTIMENT_WORDS = ["good", "great", "love", "amazing", "happy", "thanks", "bad", "terrible", "hate", "awful",
+                   "sad", "angry", "wrong", "best", "worst", "nice", "lol", "wow", "sorry", "agree"]
+TAILS = ["this!", "so much this", "lol", "underrated comment", "exactly", "+1"]
+
+
+def build_comments(n_comments, repeat_share=0.3, vocabulary_size=20000, seed=0):
+    """
+    Returns (comments, sources): the synthetic comments and, for each, the
+    index of the original it repeats (its own index for originals).
+    """
+    rng = random.Random(seed)
+    vocabulary = sorted({"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+                         for _ in range(vocabulary_size)})
+    weights = list(accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+
+    def words(count):
+        picked = rng.choices(vocabulary, cum_weights=weights, k=count)
+        return [rng.choice(SENTIMENT_WORDS) if rng.random() < 0.1 else word for word in picked]
+
+    comments, sources, originals = [], [], []
+    for i in range(n_comments):
+        if originals and rng.random() < repeat_share:
+            source = rng.choice(originals)
+            tokens = comments[source].split(" ")
+            edit = rng.random()
+            if edit < 0.25:
+                tokens[rng.randrange(len(tokens))] = words(1)[0]
+            elif edit < 0.4 and len(tokens) > 4:
+                del tokens[rng.randrange(len(tokens))]
+            elif edit < 0.55:
+                tokens.insert(rng.randrange(len(tokens) + 1), words(1)[0])
+            elif edit < 0.7:
+                tokens.append(rng.choice(TAILS))
+            elif edit < 0.85:
+                tokens = [">"] + tokens + words(rng.randint(1, 2))
+            comments.append(" ".join(tokens))
+            sources.append(source)
+        else:
+            comments.append(" ".join(words(rng.randint(12, 40))))
+            sources.append(i)
+            originals.append(i)
+    return comments, sources
+
+
+def run_stage(comments, threshold, chunk_size=2000):
+    index = NearDuplicateIndex(threshold=threshold)
+    clusters, new = [], []
+    start = time.perf_counter()
+    for offset in range(0, len(comments), chunk_size):
+        batch_clusters, batch_new = index.assign(comments[offset:offset + chunk_size])
+        clusters.extend(batch_clusters)
+        new.extend(batch_new)
+    return index, clusters, new, time.perf_counter() - start
+
+
+def measure_stage(comments, sources, threshold):
+    index, clusters, new, seconds = run_stage(comments, threshold)
+    repeats = [i for i, source in enumerate(sources) if source != i]
+    found = sum(clusters[i] == clusters[sources[i]] for i in repeats)
+    merged = sum(not new[i] for i, source in enumerate(sources) if source == i)
+    originals = len(comments) - len(repeats)
+    stats = index.stats()
+
+    # Peak allocation in a second run, as tracing slows the first one down
+    tracemalloc.start()
+    run_stage(comments, threshold)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"Stage: {len(comments):,} comments in {seconds:.2f}s ({len(comments) / seconds:,.0f} comments/sec)")
+    print(f"  clusters {stats['clusters']:,}, duplicates {stats['duplicates']:,} "
+          f"({stats['duplicates'] / len(comments):.1%}), largest {stats['largest_clusters']}")
+    print(f"  edited repeats found: {found / len(repeats):.1%} of {len(repeats):,}; "
+          f"originals wrongly merged: {merged / originals:.2%} of {originals:,}")
+    print(f"  index memory {index.nbytes / 2 ** 20:.1f} MB, peak allocated while clustering "
+          f"{peak / 2 ** 20:.1f} MB, process max RSS "
+          f"{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+
+def measure_end_to_end(comments, threshold):
+    records = [{"id": str(i), "body": body} for i, body in enumerate(comments)]
+    print(f"\nEnd to end: bulk_score.iter_scored on {len(records):,} comments (workers=1, no score cache)")
+    print(f"{'stage':>8}{'seconds':>10}{'records/sec':>14}")
+    for label, index in (("off", None), ("on", NearDuplicateIndex(threshold=threshold))):
+        start = time.perf_counter()
+        for _ in iter_scored(records, workers=1, near_duplicates=index):
+            pass
+        seconds = time.perf_counter() - start
+        print(f"{label:>8}{seconds:>10.2f}{len(records) / seconds:>14,.0f}")
+        if index is not None:
+            print(f"  {index.format_stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the near-duplicate stage")
+    parser.add_argument("--comments", type=int, default=1_000_000, help="Synthetic comments to cluster")
+    parser.add_argument("--repeat-share", type=float, default=0.3, help="Share of edited repeats")
+    parser.add_argument("--threshold", type=float, default=0.8, help="Similarity threshold of the stage")
+    parser.add_argument("--e2e", type=int, default=200_000,
+                        help="Comments scored end to end with and without the stage, 0 to skip")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    comments, sources = build_comments(args.comments, args.repeat_share)
+    print(f"Generated {len(comments):,} comments in {time.perf_counter() - start:.1f}s\n")
+    measure_stage(comments, sources, args.threshold)
+    if args.e2e:
+        measure_end_to_end(comments[:args.e2e], args.threshold)
+
+
+if __name__ == "__main__":
+    main()
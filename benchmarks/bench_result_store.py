@@ -0,0 +1,122 @@
+"""
+Benchmark for holding, summarizing and exporting results.
+
+Builds N VADER result records from the shipped CSV rows (each with its own
+strings, as a run produces them) and compares a list of dicts with a
+ResultStore: memory held per record, calculate_metrics, and the sorted CSV
+export of save_to_csv. The list side runs vadertest's previous versions,
+which walked the list once per metric and sorted a copy for csv.DictWriter.
+Each side runs in a fresh interpreter; memory is measured with tracemalloc
+in a separate run, since tracing slows everything down. Both sides must
+produce the same metrics and CSV file.
+
+Usage:
+    python benchmarks/bench_result_store.py [--records 1000000]
+"""
+import argparse
+import filecmp
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+HARNESS = """
+import csv, json, sys, time, tracemalloc
+sys.path.insert(0, {repo_root!r})
+from result_store import ResultStore
+import vadertest
+
+def records(n):
+    rows = list(csv.DictReader(open({corpus!r}, newline='', encoding='utf-8')))
+    for i in range(n):
+        row = rows[i % len(rows)]
+        yield {{
+            "title": f"{{row['title']}} #{{i}}",
+            "url": f"https://www.reddit.com/r/test/comments/{{i:x}}/post/",
+            "post_upvotes": (i * 7919) % 50000,
+            "comment_text": f"{{row['comment_text']}} {{i}}",
+            "comment_upvotes": (i * 104729) % 5000,
+            "sentiment": int(row['sentiment']),
+            "compound": float(row['compound']),
+        }}
+
+def legacy_metrics(data):
+    total = len(data)
+    return {{
+        "total_posts": total,
+        "positive_ratio": sum(1 for entry in data if entry["sentiment"] == 1) / total * 100,
+        "negative_ratio": sum(1 for entry in data if entry["sentiment"] == -1) / total * 100,
+        "neutral_ratio": sum(1 for entry in data if entry["sentiment"] == 0) / total * 100,
+        "avg_compound": sum(abs(entry["compound"]) for entry in data) / total,
+    }}
+
+def legacy_save(data, filename):
+    data = sorted(data, key=lambda x: x['post_upvotes'], reverse=True)
+    with open(filename, 'w', newline='', encoding='utf-8') as output_file:
+        dict_writer = csv.DictWriter(output_file, fieldnames=data[0].keys())
+        dict_writer.writeheader()
+        dict_writer.writerows(data)
+
+result = {{}}
+if {trace!r}:
+    tracemalloc.start()
+start = time.perf_counter()
+data = list(records({n})) if {kind!r} == "dicts" else ResultStore(records({n}))
+result["build_seconds"] = time.perf_counter() - start
+if {trace!r}:
+    result["bytes"] = tracemalloc.get_traced_memory()[0]
+else:
+    start = time.perf_counter()
+    result["metrics"] = (legacy_metrics if {kind!r} == "dicts" else vadertest.calculate_metrics)(data)
+    result["metrics_seconds"] = time.perf_counter() - start
+    start = time.perf_counter()
+    if {kind!r} == "dicts":
+        legacy_save(data, {output!r})
+    else:
+        vadertest.save_to_csv(data, {output!r})
+    result["csv_seconds"] = time.perf_counter() - start
+print(json.dumps(result))
+"""
+
+
+def run(kind, n, output, trace=False):
+    code = HARNESS.format(repo_root=REPO_ROOT, corpus=os.path.join(REPO_ROOT, "sentiment_analysis_results_VADER.csv"),
+                          kind=kind, n=n, output=output, trace=trace)
+    completed = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True,
+                               text=True, check=True)
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark lists of dicts vs the columnar ResultStore")
+    parser.add_argument("--records", type=int, default=1_000_000, help="Number of result records")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = {}
+        for kind in ("dicts", "store"):
+            output = os.path.join(directory, f"{kind}.csv")
+            results[kind] = run(kind, args.records, output)
+            results[kind].update(run(kind, args.records, output, trace=True))
+        assert filecmp.cmp(os.path.join(directory, "dicts.csv"), os.path.join(directory, "store.csv"),
+                           shallow=False), "CSV exports differ"
+
+    dicts, store = results["dicts"], results["store"]
+    for name in dicts["metrics"]:
+        assert abs(dicts["metrics"][name] - store["metrics"][name]) < 1e-9, f"metric {name} differs"
+    print(f"{args.records} records; metrics and CSV output identical")
+    print(f"{'':>8}{'bytes/record':>14}{'total MiB':>11}{'metrics s':>11}{'sorted CSV s':>14}")
+    for kind, result in results.items():
+        print(f"{kind:>8}{result['bytes'] / args.records:>14.0f}{result['bytes'] / 2 ** 20:>11.1f}"
+              f"{result['metrics_seconds']:>11.3f}{result['csv_seconds']:>14.3f}")
+    print(f"memory: {dicts['bytes'] / store['bytes']:.1f}x smaller, "
+          f"metrics: {dicts['metrics_seconds'] / store['metrics_seconds']:.0f}x faster, "
+          f"CSV: {dicts['csv_seconds'] / store['csv_seconds']:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
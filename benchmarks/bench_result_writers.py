@@ -0,0 +1,99 @@
+"""
+Benchmark for writing sorted results.
+
+Produces N VADER result records (built from the shipped CSV rows, as in
+bench_result_store) and writes them sorted by post upvotes two ways: held in
+a ResultStore and exported by save_to_csv at the end, or appended by a
+streaming CSV writer as they arrive and put in order by sort_file's external
+merge sort. Each side runs in a fresh interpreter; the peak resident memory
+reported is the process's ru_maxrss, minus what the interpreter and imports
+held before the first record. Both sides must write the same file.
+
+Usage:
+    python benchmarks/bench_result_writers.py [--records 1000000] [--run-size 100000]
+"""
+import argparse
+import filecmp
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+HARNESS = """
+import csv, json, resource, sys, time
+sys.path.insert(0, {repo_root!r})
+from result_store import ResultStore
+from result_writers import open_writer, sort_file
+import vadertest
+
+def records(n):
+    rows = list(csv.DictReader(open({corpus!r}, newline='', encoding='utf-8')))
+    for i in range(n):
+        row = rows[i % len(rows)]
+        yield {{
+            "title": f"{{row['title']}} #{{i}}",
+            "url": f"https://www.reddit.com/r/test/comments/{{i:x}}/post/",
+            "post_upvotes": (i * 7919) % 50000,
+            "comment_text": f"{{row['comment_text']}} {{i}}",
+            "comment_upvotes": (i * 104729) % 5000,
+            "sentiment": int(row['sentiment']),
+            "compound": float(row['compound']),
+        }}
+
+result = {{}}
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if {kind!r} == "store":
+    vadertest.save_to_csv(ResultStore(records({n})), {output!r})
+    result["write_seconds"] = time.perf_counter() - start
+    result["sort_seconds"] = 0.0
+else:
+    with open_writer({output!r}, flush_every=100, flush_interval=5.0) as writer:
+        for record in records({n}):
+            writer.write(record)
+    result["write_seconds"] = time.perf_counter() - start
+    start = time.perf_counter()
+    sort_file({output!r}, "post_upvotes", descending=True, run_size={run_size})
+    result["sort_seconds"] = time.perf_counter() - start
+result["peak_kib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+print(json.dumps(result))
+"""
+
+
+def run(kind, n, run_size, output):
+    code = HARNESS.format(repo_root=REPO_ROOT, corpus=os.path.join(REPO_ROOT, "sentiment_analysis_results_VADER.csv"),
+                          kind=kind, n=n, run_size=run_size, output=output)
+    completed = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True,
+                               text=True, check=True)
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark in-memory vs streaming sorted CSV output")
+    parser.add_argument("--records", type=int, default=1_000_000, help="Number of result records")
+    parser.add_argument("--run-size", type=int, default=100_000, help="Records per external sort run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = {}
+        for kind in ("store", "stream"):
+            results[kind] = run(kind, args.records, args.run_size, os.path.join(directory, f"{kind}.csv"))
+        assert filecmp.cmp(os.path.join(directory, "store.csv"), os.path.join(directory, "stream.csv"),
+                           shallow=False), "CSV outputs differ"
+
+    print(f"{args.records} records, sort runs of {args.run_size}; CSV output identical")
+    print(f"{'':>8}{'peak MiB':>10}{'write s':>10}{'sort s':>10}{'total s':>10}")
+    for kind, result in results.items():
+        total = result["write_seconds"] + result["sort_seconds"]
+        print(f"{kind:>8}{result['peak_kib'] / 1024:>10.1f}{result['write_seconds']:>10.3f}"
+              f"{result['sort_seconds']:>10.3f}{total:>10.3f}")
+    store, stream = results["store"], results["stream"]
+    print(f"peak memory: {store['peak_kib'] / max(stream['peak_kib'], 1):.1f}x smaller when streaming")
+
+
+if __name__ == "__main__":
+    main()
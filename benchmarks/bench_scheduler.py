@@ -0,0 +1,115 @@
+"""
+Benchmark for the multi-subreddit scheduler against a throttling API.
+
+Starts the local Reddit stand-in from mock_reddit.py with a request quota per
+window and a share of requests failed with a 503, then analyzes several
+subreddits:
+
+    sequential  one subreddit after another with vadertest.iter_top_posts and
+                a fixed-rate limiter, as vadertest.main would
+    scheduler   all subreddits at once with scheduler.iter_scheduled_posts,
+                whose limiter follows the rate-limit headers and backs off
+
+It reports the wall time, how many requests were throttled or failed, and how
+many posts were lost to errors. The records of every run are checked against
+an unthrottled reference run.
+
+Usage:
+    python benchmarks/bench_scheduler.py [--subreddits 8] [--posts 20] [--quota 60] [--window 5]
+                                         [--error-rate 0.03] [--concurrency 8]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# The stand-in server accepts any credentials
+os.environ.setdefault("REDDIT_CLIENT_ID", "benchmark")
+os.environ.setdefault("REDDIT_CLIENT_SECRET", "benchmark")
+os.environ.setdefault("REDDIT_USER_AGENT", "sentiment-analyzer benchmark")
+
+import vadertest
+from mock_reddit import MockRedditServer, synthesize_listings
+from reddit_fetch import Backoff, RateLimiter, create_session
+from scheduler import SubredditJob, iter_scheduled_posts
+
+
+def connect(server, rate_limiter, follow_headers):
+    vadertest.configure_reddit(
+        oauth_url=server.url,
+        reddit_url=server.url,
+        requestor_kwargs={"session": create_session(16, rate_limiter if follow_headers else None)},
+    )
+    vadertest.rate_limiter = rate_limiter
+
+
+def run_sequential(jobs, concurrency):
+    results = {}
+    for job in jobs:
+        results[job.name] = list(vadertest.iter_top_posts(
+            job.name, limit=job.limit, min_comment_length=job.min_comment_length,
+            min_words=job.min_words, min_compound_score=job.min_compound_score,
+            fetch_concurrency=concurrency
+        ))
+    return results
+
+
+def run_scheduler(jobs, concurrency, rate_limiter):
+    results = {job.name: [] for job in jobs}
+    for job, record in iter_scheduled_posts(jobs, fetch_concurrency=concurrency, rate_limiter=rate_limiter,
+                                            backoff=Backoff(base=0.5, maximum=10.0, max_retries=8)):
+        results[job.name].append(record)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the multi-subreddit scheduler against throttling")
+    parser.add_argument("--subreddits", type=int, default=8)
+    parser.add_argument("--posts", type=int, default=20, help="Posts per subreddit")
+    parser.add_argument("--quota", type=int, default=60, help="Requests allowed per window")
+    parser.add_argument("--window", type=float, default=5.0, help="Seconds per quota window")
+    parser.add_argument("--error-rate", type=float, default=0.03, help="Share of requests failed with a 503")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds of delay per request")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight")
+    args = parser.parse_args()
+
+    posts, comments = synthesize_listings(args.posts)
+    jobs = [SubredditJob(f"mock{i}", limit=args.posts) for i in range(args.subreddits)]
+    requests_needed = len(jobs) * (args.posts + 1)
+    print(f"{len(jobs)} subreddits x {args.posts} posts (~{requests_needed} requests), quota {args.quota} "
+          f"per {args.window:g}s, {args.error_rate:.0%} of requests fail with a 503")
+
+    with MockRedditServer(posts, comments, latency=args.latency) as server:
+        connect(server, RateLimiter(requests_per_minute=10 ** 6), follow_headers=False)
+        reference = run_scheduler(jobs, args.concurrency, vadertest.rate_limiter)
+    expected = sum(len(records) for records in reference.values())
+
+    rows = []
+    for name in ("sequential", "scheduler"):
+        with MockRedditServer(posts, comments, latency=args.latency, quota=args.quota, window=args.window,
+                              error_rate=args.error_rate) as server:
+            # The fixed limiter assumes Reddit's documented rate; the scheduler's
+            # follows whatever the headers say
+            rate_limiter = RateLimiter()
+            connect(server, rate_limiter, follow_headers=(name == "scheduler"))
+            start = time.perf_counter()
+            if name == "sequential":
+                results = run_sequential(jobs, args.concurrency)
+            else:
+                results = run_scheduler(jobs, args.concurrency, rate_limiter)
+            seconds = time.perf_counter() - start
+            kept = sum(len(records) for records in results.values())
+            identical = all(results[job.name] == reference[job.name] for job in jobs)
+            rows.append((name, seconds, server.requests, server.throttled, server.failed, expected - kept, identical))
+
+    print(f"\n{'':>12}{'seconds':>9}{'requests':>10}{'429s':>7}{'503s':>7}{'posts lost':>12}  identical")
+    for name, seconds, requests, throttled, failed, lost, identical in rows:
+        print(f"{name:>12}{seconds:>9.2f}{requests:>10}{throttled:>7}{failed:>7}{lost:>12}  {identical}")
+    assert rows[-1][-1], "scheduler results differ from the unthrottled run"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark for spelling correction.
+
+Runs TextBlob's correct() and the indexed corrector in spelling over a
+reference set of the shipped titles and comments, cleaned as blobtest does,
+checks that both produce identical text and prints the speedup. The
+corrector is timed cold (fresh, empty word cache) and warm (second pass);
+its one-off index build is reported separately.
+
+Usage:
+    python benchmarks/bench_spelling.py [--limit 50]
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from textblob import TextBlob
+
+from blobtest import clean_text
+from spelling import SpellingCorrector, load_frequencies
+
+CSV_FILES = ["sentiment_analysis_results_VADER.csv", "sentiment_analysis_results.csv"]
+
+
+def load_reference_set(limit):
+    """
+    Returns up to limit distinct titles and comments from the shipped CSVs,
+    alternating between the two, cleaned with blobtest.clean_text.
+    """
+    titles, comments = [], []
+    for name in CSV_FILES:
+        with open(os.path.join(REPO_ROOT, name), newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                titles.append(row["title"])
+                comments.append(row["comment_text"])
+    texts = []
+    seen = set()
+    for title, comment in zip(titles, comments):
+        for text in (title, comment):
+            text = clean_text(text)
+            if text and text not in seen:
+                seen.add(text)
+                texts.append(text)
+    return texts[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TextBlob vs indexed spelling correction")
+    parser.add_argument("--limit", type=int, default=50,
+                        help="Texts in the reference set (TextBlob takes about a second each)")
+    args = parser.parse_args()
+
+    texts = load_reference_set(args.limit)
+    words = sum(len(text.split()) for text in texts)
+    print(f"Reference set: {len(texts)} texts, {words} words")
+
+    start = time.perf_counter()
+    expected = [str(TextBlob(text).correct()) for text in texts]
+    textblob_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    corrector = SpellingCorrector(load_frequencies())
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cold = [corrector.correct(text) for text in texts]
+    cold_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    warm = [corrector.correct(text) for text in texts]
+    warm_seconds = time.perf_counter() - start
+
+    mismatches = [(text, want, got) for text, want, got in zip(texts, expected, cold) if want != got]
+    for text, want, got in mismatches[:5]:
+        print(f"MISMATCH\n  input:    {text!r}\n  textblob: {want!r}\n  indexed:  {got!r}")
+    assert not mismatches, f"{len(mismatches)} of {len(texts)} texts differ"
+    assert warm == cold, "cached corrections differ"
+    print(f"Output identical on {len(texts)} texts")
+
+    info = corrector.cache_info()
+    print(f"textblob: {textblob_seconds:8.3f}s ({textblob_seconds / len(texts) * 1000:8.2f}ms/text)")
+    print(f"index build: {build_seconds:5.3f}s (once per process)")
+    print(f"cold:     {cold_seconds:8.3f}s ({cold_seconds / len(texts) * 1000:8.2f}ms/text), "
+          f"speedup {textblob_seconds / cold_seconds:6.1f}x, "
+          f"{textblob_seconds / (build_seconds + cold_seconds):5.1f}x including the build")
+    print(f"warm:     {warm_seconds:8.3f}s ({warm_seconds / len(texts) * 1000:8.2f}ms/text), "
+          f"speedup {textblob_seconds / warm_seconds:6.1f}x")
+    print(f"word cache: {info.currsize} words, {info.hits} hits, {info.misses} misses")
+
+
+if __name__ == "__main__":
+    main()
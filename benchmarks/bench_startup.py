@@ -0,0 +1,131 @@
+"""
+Benchmark for cold start time of the CLI and the GUI.
+
+Runs each startup scenario in fresh interpreters with `python -X importtime`
+and reports the median wall time and the slowest imports. With --compare, the
+same scenarios are also run against another git revision of the repository
+(extracted to a temporary directory), to show the difference.
+
+Scenarios:
+    cli    import vadertest
+    gui    import gui, then build and show the main window (offscreen)
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--top 8] [--compare HEAD~1]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "cli": "import vadertest",
+    "gui": (
+        "import gui\n"
+        "app = gui.QApplication([])\n"
+        "window = gui.MainWindow()\n"
+        "window.show()\n"
+        "app.processEvents()\n"
+    ),
+}
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def run_scenario(code, cwd):
+    """
+    Runs code in a fresh interpreter.
+
+    Returns:
+        tuple: (wall seconds, list of (cumulative microseconds, module) for
+        top-level imports and their direct imports)
+    """
+    env = dict(os.environ)
+    # Old revisions check credentials at import, the stand-in values satisfy them
+    env.setdefault("REDDIT_CLIENT_ID", "benchmark")
+    env.setdefault("REDDIT_CLIENT_SECRET", "benchmark")
+    env.setdefault("REDDIT_USER_AGENT", "sentiment-analyzer benchmark")
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    env["PYTHONPATH"] = cwd
+
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                               cwd=cwd, env=env, capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"Scenario failed in {cwd}:\n{completed.stderr[-2000:]}")
+
+    imports = []
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        # Nesting is shown by two extra spaces per level
+        if match and len(match.group(3)) <= 3:
+            imports.append((int(match.group(2)), match.group(4)))
+    return seconds, imports
+
+
+def measure(cwd, runs, top):
+    """
+    Returns {scenario: (median seconds, slowest imports)}.
+    """
+    results = {}
+    for name, code in SCENARIOS.items():
+        timings = []
+        imports = []
+        for _ in range(runs):
+            seconds, imports = run_scenario(code, cwd)
+            timings.append(seconds)
+        slowest = sorted(imports, reverse=True)[:top]
+        results[name] = (statistics.median(timings), slowest)
+    return results
+
+
+def extract_revision(revision, directory):
+    """
+    Writes the files of a git revision of the repository to directory.
+    """
+    archive = os.path.join(directory, "revision.tar")
+    subprocess.run(["git", "archive", "--format=tar", "-o", archive, revision],
+                   cwd=REPO_ROOT, check=True)
+    with tarfile.open(archive) as tar:
+        tar.extractall(directory)
+    os.remove(archive)
+
+
+def report(label, results):
+    print(f"{label}:")
+    for name, (seconds, slowest) in results.items():
+        print(f"  {name}: {seconds * 1000:7.1f}ms")
+        for microseconds, module in slowest:
+            print(f"      {microseconds / 1000:7.1f}ms  {module}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CLI and GUI startup time")
+    parser.add_argument("--runs", type=int, default=5, help="Interpreter launches per scenario")
+    parser.add_argument("--top", type=int, default=8, help="Slowest imports to list")
+    parser.add_argument("--compare", metavar="REVISION", help="Git revision to compare against")
+    args = parser.parse_args()
+
+    current = measure(REPO_ROOT, args.runs, args.top)
+    report("working tree", current)
+
+    if args.compare:
+        with tempfile.TemporaryDirectory() as directory:
+            extract_revision(args.compare, directory)
+            previous = measure(directory, args.runs, args.top)
+        report(args.compare, previous)
+        print("speedup:")
+        for name, (seconds, _) in current.items():
+            print(f"  {name}: {previous[name][0] / seconds:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""
+Reproducible throughput benchmark suite for the analysis pipelines.
+
+Replays the titles and comment texts of the shipped result CSVs, plus
+seeded synthetic corpora built from their vocabulary, through the stages of
+both pipelines:
+
+    vader     vadertest.clean_text, preprocess_text, is_meaningful,
+              analyze_sentiment_vader
+    textblob  blobtest.clean_text, correct_grammar, preprocess_text,
+              CommentAnalysis, is_meaningful, analyze_sentiment
+
+Every stage receives the previous text-producing stage's output, so
+is_meaningful and the sentiment stage both see preprocessed text (in the
+textblob pipeline, wrapped in the CommentAnalysis they share). Each
+corpus runs in a fresh interpreter and is streamed in chunks, so 10M-comment
+corpora fit in memory. The report gives texts/sec per stage and per
+pipeline, sampled per-text latency (p50/p95/p99) and the peak RSS of the
+process.
+
+The TextBlob pipeline is several times slower than the VADER one, so it
+only processes the first --textblob-limit texts of each corpus.
+
+Results are written as JSON (--output). --save-baseline stores them as the
+baseline; later runs given --baseline flag every stage whose throughput
+dropped by more than --tolerance and exit with status 1.
+
+Usage:
+    python benchmarks/bench_suite.py [--sizes 10000 100000 1000000 10000000]
+        [--textblob-limit 1000] [--seed 0] [--output results.json]
+        [--baseline benchmarks/baseline.json] [--save-baseline] [--tolerance 0.25]
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from instrumentation import RunMetrics
+
+CSV_FILES = ["sentiment_analysis_results_VADER.csv", "sentiment_analysis_results.csv"]
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "baseline.json")
+
+# The shipped CSVs hold about a thousand texts; the "shipped" corpus replays
+# them this many times so that its timings are not dominated by noise
+SHIPPED_REPLAYS = 10
+# Texts handed to each stage at once; bounds memory for the large corpora
+CHUNK_SIZE = 10000
+# Every SAMPLE_EVERY-th text is timed individually for the latency percentiles
+SAMPLE_EVERY = 10
+
+# Noise mixed into synthetic comments, so cleaning has work to do
+URLS = ["https://example.com/a?b=1", "http://i.imgur.com/x.png", "https://www.reddit.com/r/test/"]
+EMOJIS = ["😀", "👍", "🚀", "🔥", "😂"]
+
+
+def load_shipped_texts():
+    """
+    Returns the titles and comment texts of the shipped CSVs, in file order.
+    """
+    texts = []
+    for name in CSV_FILES:
+        path = os.path.join(REPO_ROOT, name)
+        if os.path.exists(path):
+            with open(path, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    texts.append(row["title"])
+                    texts.append(row["comment_text"])
+    return texts
+
+
+def synthetic_texts(size, seed=0):
+    """
+    Yields size synthetic comments. Words are drawn with the frequencies of
+    the shipped texts and lengths follow theirs; some comments get a URL, an
+    emoji, a number or emphasis. The same seed always yields the same corpus.
+    """
+    shipped = load_shipped_texts()
+    words = [word for text in shipped for word in re.findall(r"[\w']+", text)]
+    lengths = [max(1, len(text.split())) for text in shipped]
+    rng = random.Random(seed)
+    for _ in range(size):
+        comment = rng.choices(words, k=rng.choice(lengths))
+        roll = rng.random()
+        if roll < 0.05:
+            comment.insert(rng.randrange(len(comment) + 1), rng.choice(URLS))
+        elif roll < 0.10:
+            comment.append(rng.choice(EMOJIS))
+        elif roll < 0.20:
+            comment.insert(rng.randrange(len(comment) + 1), str(rng.randint(1, 2024)))
+        elif roll < 0.25:
+            comment[0] = comment[0].upper()
+            comment.append("!!")
+        yield " ".join(comment)
+
+
+def corpus_texts(corpus, seed):
+    if corpus == "shipped":
+        return iter(load_shipped_texts() * SHIPPED_REPLAYS)
+    return synthetic_texts(int(corpus.split("-", 1)[1]), seed)
+
+
+def pipelines():
+    """
+    Returns {pipeline: [(stage, function, produces text)]}.
+    """
+    import blobtest
+    import vadertest
+
+    return {
+        "vader": [
+            ("clean_text", vadertest.clean_text, True),
+            ("preprocess_text", vadertest.preprocess_text, True),
+            ("is_meaningful", vadertest.is_meaningful, False),
+            ("analyze_sentiment_vader", vadertest.analyze_sentiment_vader, False),
+        ],
+        "textblob": [
+            ("clean_text", blobtest.clean_text, True),
+            ("correct_grammar", blobtest.correct_grammar, True),
+            ("preprocess_text", blobtest.preprocess_text, True),
+            # Shared by the two checks, as in blobtest.fetch_top_posts
+            ("analysis", blobtest.CommentAnalysis, True),
+            ("is_meaningful", blobtest.is_meaningful, False),
+            ("analyze_sentiment", blobtest.analyze_sentiment, False),
+        ],
+    }
+
+
+def run_stage(function, texts, metrics, stage, sample_every=SAMPLE_EVERY):
+    """
+    Applies function to every text, timing every sample_every-th call.
+
+    Returns:
+        tuple: (outputs, seconds for the whole pass)
+    """
+    outputs = []
+    record = metrics.record
+    clock = time.perf_counter
+    start = clock()
+    for index, text in enumerate(texts):
+        if index % sample_every:
+            outputs.append(function(text))
+        else:
+            call_start = clock()
+            outputs.append(function(text))
+            record(stage, clock() - call_start)
+    return outputs, clock() - start
+
+
+def peak_rss_mb():
+    """
+    Returns the peak resident set size of this process in MiB, or None where
+    the resource module is unavailable.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def benchmark_corpus(corpus, seed, textblob_limit):
+    """
+    Runs both pipelines over one corpus in this process and returns its
+    result dict.
+    """
+    stages_by_pipeline = pipelines()
+    # Load stopwords, lexicons and models before timing anything
+    for stages in stages_by_pipeline.values():
+        text = "Warming up the pipeline with a GREAT little example!"
+        for _, function, produces_text in stages:
+            output = function(text)
+            if produces_text:
+                text = output
+
+    started = time.perf_counter()
+    results = {}
+    for pipeline, stages in stages_by_pipeline.items():
+        limit = textblob_limit if pipeline == "textblob" else None
+        metrics = RunMetrics()
+        seconds = {stage: 0.0 for stage, _, _ in stages}
+        count = 0
+        texts = corpus_texts(corpus, seed)
+        while limit is None or count < limit:
+            chunk_size = CHUNK_SIZE if limit is None else min(CHUNK_SIZE, limit - count)
+            chunk = [text for _, text in zip(range(chunk_size), texts)]
+            if not chunk:
+                break
+            count += len(chunk)
+            for stage, function, produces_text in stages:
+                # The few texts of a limited pipeline are all timed
+                outputs, elapsed = run_stage(function, chunk, metrics, stage, 1 if limit else SAMPLE_EVERY)
+                seconds[stage] += elapsed
+                if produces_text:
+                    chunk = outputs
+
+        report = metrics.report()["stages"]
+        total = sum(seconds.values())
+        results[pipeline] = {
+            "texts": count,
+            "seconds": total,
+            "texts_per_sec": count / total if total else None,
+            "stages": {
+                stage: {
+                    "seconds": seconds[stage],
+                    "texts_per_sec": count / seconds[stage] if seconds[stage] else None,
+                    "p50_ms": report[stage]["p50_ms"] if stage in report else None,
+                    "p95_ms": report[stage]["p95_ms"] if stage in report else None,
+                    "p99_ms": report[stage]["p99_ms"] if stage in report else None,
+                }
+                for stage, _, _ in stages
+            },
+        }
+    return {
+        "corpus": corpus,
+        "seconds": time.perf_counter() - started,
+        "peak_rss_mb": peak_rss_mb(),
+        "pipelines": results,
+    }
+
+
+def run_isolated(corpus, seed, textblob_limit):
+    """
+    Benchmarks a corpus in a fresh interpreter, so that its peak RSS and
+    caches are its own.
+    """
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--corpus", corpus, "--seed", str(seed),
+         "--textblob-limit", str(textblob_limit)],
+        capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Benchmark of {corpus} failed:\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def throughputs(results):
+    """
+    Returns {(corpus, pipeline, stage): texts/sec}, with stage None for the
+    whole pipeline.
+    """
+    rates = {}
+    for corpus in results["corpora"]:
+        for pipeline, stats in corpus["pipelines"].items():
+            rates[(corpus["corpus"], pipeline, None)] = stats["texts_per_sec"]
+            for stage, stage_stats in stats["stages"].items():
+                rates[(corpus["corpus"], pipeline, stage)] = stage_stats["texts_per_sec"]
+    return rates
+
+
+def find_regressions(results, baseline, tolerance):
+    """
+    Returns (key, baseline rate, current rate) for every stage or pipeline
+    whose throughput fell by more than tolerance (a fraction).
+    """
+    current = throughputs(results)
+    regressions = []
+    for key, previous in throughputs(baseline).items():
+        rate = current.get(key)
+        if previous and rate is not None and rate < previous * (1 - tolerance):
+            regressions.append((key, previous, rate))
+    return regressions
+
+
+def print_corpus(corpus):
+    rss = f"{corpus['peak_rss_mb']:.0f} MiB" if corpus["peak_rss_mb"] is not None else "n/a"
+    print(f"\n{corpus['corpus']}  ({corpus['seconds']:.1f}s, peak RSS {rss})")
+    for pipeline, stats in corpus["pipelines"].items():
+        print(f"  {pipeline}: {stats['texts']} texts, {stats['texts_per_sec']:,.0f} texts/sec")
+        for stage, stage_stats in stats["stages"].items():
+            print(f"    {stage:<24}{stage_stats['texts_per_sec']:>14,.0f} texts/sec"
+                  f"{stage_stats['p50_ms']:>10.3f}{stage_stats['p95_ms']:>10.3f}{stage_stats['p99_ms']:>10.3f}"
+                  f"  ms p50/p95/p99")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the VADER and TextBlob pipelines")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10000, 100000],
+                        help="Synthetic corpus sizes, e.g. 10000 100000 1000000 10000000")
+    parser.add_argument("--textblob-limit", type=int, default=1000,
+                        help="Texts per corpus sent through the slow TextBlob pipeline")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic corpora")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed throughput drop against the baseline, as a fraction")
+    parser.add_argument("--corpus", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.corpus:
+        # Child process: benchmark one corpus and hand the result back as JSON
+        print(json.dumps(benchmark_corpus(args.corpus, args.seed, args.textblob_limit)))
+        return
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "textblob_limit": args.textblob_limit,
+        "corpora": [],
+    }
+    for corpus in ["shipped"] + [f"synthetic-{size}" for size in args.sizes]:
+        result = run_isolated(corpus, args.seed, args.textblob_limit)
+        results["corpora"].append(result)
+        print_corpus(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.tolerance)
+        print(f"\nCompared with the baseline from {baseline.get('created')} ({baseline.get('revision')}):")
+        if not regressions:
+            print(f"  no throughput regressions beyond {args.tolerance:.0%}")
+        for (corpus, pipeline, stage), previous, rate in regressions:
+            print(f"  REGRESSION {corpus} {pipeline} {stage or '(pipeline)'}: "
+                  f"{previous:,.0f} -> {rate:,.0f} texts/sec ({rate / previous - 1:+.0%})")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark for top-k comment selection.
+
+Builds large synthetic comment trees and compares the old way of picking
+candidates (flatten the whole tree, filter it, sort it by score) with the
+lazy RankedComments view, for the time and extra memory needed to hand
+out the first candidates. Both must yield the same comments in the same
+order.
+
+Usage:
+    python benchmarks/bench_topk.py [--comments 50000 200000] [--take 1 8 64]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from itertools import islice
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comment_ranking import CommentTree, RankedComments
+from vadertest import CANDIDATE_WINDOW
+
+
+class Author:
+    def __init__(self, name):
+        self.name = name
+
+
+class Comment:
+    __slots__ = ("id", "body", "score", "author", "replies")
+
+    def __init__(self, id, body, score, author):
+        self.id = id
+        self.body = body
+        self.score = score
+        self.author = author
+        self.replies = []
+
+
+def build_tree(n_comments, seed=0):
+    """
+    Builds a comment forest with n_comments comments. Each comment replies
+    to a random earlier one, so threads get deep as well as wide.
+    """
+    rng = random.Random(seed)
+    authors = [Author(name) for name in ("alice", "bob", "carol", "AutoModerator", "dave")]
+    forest = []
+    comments = []
+    for i in range(n_comments):
+        body = "short" if rng.random() < 0.2 else f"comment number {i} with some text"
+        comment = Comment(f"c{i:x}", body, int(rng.paretovariate(1.2)), rng.choice(authors))
+        if comments and rng.random() < 0.9:
+            rng.choice(comments).replies.append(comment)
+        else:
+            forest.append(comment)
+        comments.append(comment)
+    return forest
+
+
+def is_valid(comment, min_comment_length=10):
+    return (
+        comment.author
+        and comment.author.name.lower() not in ['automoderator']
+        and len(comment.body) >= min_comment_length
+    )
+
+
+def flatten_and_sort(forest):
+    comments = list(CommentTree(forest))
+    valid_comments = [comment for comment in comments if is_valid(comment)]
+    return sorted(valid_comments, key=lambda c: c.score, reverse=True)
+
+
+def measure(take, select):
+    """
+    Returns (seconds, peak bytes allocated, comments) for taking the first
+    `take` candidates from select(). Memory is measured in a separate run,
+    since tracing allocations slows everything down.
+    """
+    start = time.perf_counter()
+    comments = list(islice(select(), take))
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    list(islice(select(), take))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak, comments
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark top-k comment selection")
+    parser.add_argument("--comments", type=int, nargs="+", default=[50000, 200000])
+    parser.add_argument("--take", type=int, nargs="+", default=[1, CANDIDATE_WINDOW, 64])
+    args = parser.parse_args()
+
+    for n_comments in args.comments:
+        forest = build_tree(n_comments)
+        print(f"{n_comments} comments:")
+        for take in args.take:
+            old_seconds, old_peak, old = measure(take, lambda: iter(flatten_and_sort(forest)))
+            new_seconds, new_peak, new = measure(
+                take, lambda: iter(RankedComments(CommentTree(forest), is_valid, window=CANDIDATE_WINDOW))
+            )
+            assert [c.id for c in old] == [c.id for c in new], "rankings differ"
+            print(f"  first {take:>4}: sort {old_seconds * 1000:8.1f}ms {old_peak / 1024:8.0f}KiB   "
+                  f"heap {new_seconds * 1000:8.1f}ms {new_peak / 1024:8.0f}KiB   "
+                  f"({old_seconds / new_seconds:4.1f}x faster, {old_peak / max(new_peak, 1):5.1f}x less memory)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark for the vectorized VADER scorer.
+
+Scores the comment texts shipped in sentiment_analysis_results_VADER.csv
+with NLTK's SentimentIntensityAnalyzer and with BatchVaderScorer, checks
+that every score agrees within the documented tolerance and reports
+throughput in texts per second.
+
+Usage:
+    python benchmarks/bench_vader_batch.py [--scale N]
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from nltk_resources import VADER_LEXICON_RESOURCE, ensure_resource
+from vader_batch import BatchVaderScorer, SCORE_TOLERANCE
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_FILE = os.path.join(REPO_ROOT, "sentiment_analysis_results_VADER.csv")
+
+
+def load_corpus():
+    with open(CORPUS_FILE, newline='', encoding='utf-8') as f:
+        return [row["comment_text"] for row in csv.DictReader(f)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the batch VADER scorer")
+    parser.add_argument("--scale", type=int, default=100,
+                        help="How many times to replay the corpus for timing")
+    args = parser.parse_args()
+
+    ensure_resource(VADER_LEXICON_RESOURCE)
+    sid = SentimentIntensityAnalyzer()
+    scorer = BatchVaderScorer(sid.lexicon)
+    corpus = load_corpus()
+
+    expected = [sid.polarity_scores(text) for text in corpus]
+    actual = scorer.polarity_scores_batch(corpus)
+    worst = {key: 0.0 for key in ("neg", "neu", "pos", "compound")}
+    for exp, act in zip(expected, actual):
+        for key in worst:
+            worst[key] = max(worst[key], abs(exp[key] - act[key]))
+    print(f"Max abs difference over {len(corpus)} texts: "
+          + ", ".join(f"{key}={value:.4g}" for key, value in worst.items()))
+    assert worst["compound"] <= SCORE_TOLERANCE + 1e-12
+    assert max(worst["neg"], worst["neu"], worst["pos"]) <= 1e-3 + 1e-12
+
+    texts = corpus * args.scale
+    start = time.perf_counter()
+    for text in texts:
+        sid.polarity_scores(text)
+    nltk_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scorer.score_batch(texts)
+    batch_seconds = time.perf_counter() - start
+
+    print(f"NLTK polarity_scores  {len(texts) / nltk_seconds:12,.0f} texts/sec")
+    print(f"BatchVaderScorer      {len(texts) / batch_seconds:12,.0f} texts/sec  "
+          f"({nltk_seconds / batch_seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
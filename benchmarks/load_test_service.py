@@ -0,0 +1,155 @@
+"""
+Load test for the HTTP scoring service.
+
+Starts scoring_service.py on a free local port (or uses --url) and, for every
+concurrency level, runs that many keep-alive clients sending POST /score
+requests back to back for --duration seconds. It reports the throughput and
+the p50/p99 request latency seen by the clients, then the service's own
+/metrics (mean micro-batch size, highest queue depth).
+
+By default the service is started twice, with micro-batching (--max-batch-size
+64) and without it (--max-batch-size 1), to show what batching buys.
+
+Usage:
+    python benchmarks/load_test_service.py [--concurrency 1 8 32 128] [--duration 5]
+                                           [--batch-window-ms 5] [--url http://127.0.0.1:8080]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlparse
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLES = [
+    "This is the best thing I have read all week, thank you!",
+    "Honestly this is terrible and the mods should remove it.",
+    "I don't think that's how any of this works.",
+    "Great write-up, but the conclusion feels a bit rushed :)",
+    "Meh. Not bad, not great.",
+    "Absolutely LOVE this community, you guys are amazing!!!",
+    "This makes me so angry, what a waste of time.",
+    "Can someone explain why this got so many upvotes?",
+]
+
+
+async def request(reader, writer, host, path, payload=None):
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    method = "POST" if payload is not None else "GET"
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    response = json.loads(await reader.readexactly(length))
+    if status != 200:
+        raise RuntimeError(f"{path} answered {status}: {response}")
+    return response
+
+
+async def client(host, port, deadline, latencies, seed):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await request(reader, writer, host, "/score", {"text": rng.choice(SAMPLES)})
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def fetch_metrics(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return await request(reader, writer, host, "/metrics")
+    finally:
+        writer.close()
+
+
+async def run_level(host, port, concurrency, duration):
+    latencies = []
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(client(host, port, deadline, latencies, i) for i in range(concurrency)))
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "throughput": len(latencies) / seconds,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_service(port, max_batch_size, batch_window_ms):
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(REPO, "scoring_service.py"), "--port", str(port),
+         "--max-batch-size", str(max_batch_size), "--max-latency-ms", str(batch_window_ms)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    # The service prints its address once the scorer is warm
+    process.stdout.readline()
+    return process
+
+
+def run(host, port, levels, duration, label):
+    print(f"\n{label}")
+    print(f"{'concurrency':>12}{'requests':>10}{'req/sec':>10}{'p50 ms':>9}{'p99 ms':>9}"
+          f"{'mean batch':>12}{'max queue':>11}")
+    for concurrency in levels:
+        before = asyncio.run(fetch_metrics(host, port))["counters"]
+        result = asyncio.run(run_level(host, port, concurrency, duration))
+        metrics = asyncio.run(fetch_metrics(host, port))
+        texts = metrics["counters"].get("texts", 0) - before.get("texts", 0)
+        batches = metrics["counters"].get("batches", 0) - before.get("batches", 0)
+        print(f"{concurrency:>12}{result['requests']:>10}{result['throughput']:>10,.0f}{result['p50_ms']:>9.2f}"
+              f"{result['p99_ms']:>9.2f}{texts / batches if batches else 0:>12.1f}{metrics['max_queue_depth']:>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the HTTP scoring service")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128],
+                        help="Concurrent clients per level")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per concurrency level")
+    parser.add_argument("--batch-window-ms", type=float, default=5.0, help="Micro-batch window of the service")
+    parser.add_argument("--url", help="Test a running service instead of starting one")
+    args = parser.parse_args()
+
+    if args.url:
+        url = urlparse(args.url)
+        run(url.hostname, url.port or 80, args.concurrency, args.duration, args.url)
+        return
+
+    for label, max_batch_size in (("micro-batching off (--max-batch-size 1)", 1),
+                                  ("micro-batching on (--max-batch-size 64)", 64)):
+        port = free_port()
+        process = start_service(port, max_batch_size, args.batch_window_ms)
+        try:
+            run("127.0.0.1", port, args.concurrency, args.duration, label)
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
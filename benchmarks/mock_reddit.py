@@ -0,0 +1,297 @@
+"""
+Local stand-in for the Reddit API, for benchmarks.
+
+Serves subreddit top listings and comment trees in the same JSON format as
+Reddit, with a configurable per-request latency. Listings are either loaded
+from a directory of recorded API responses or synthesized from the shipped
+result CSVs.
+
+It can also throttle like Reddit: with a quota, every response carries
+X-Ratelimit-Used/-Remaining/-Reset headers for a fixed window, and requests
+over the quota get a 429 with a Retry-After header. A share of requests can
+be failed with a 503 to exercise retries.
+
+Recorded directory layout:
+    top.json              response of GET /r/<subreddit>/top
+    comments/<id>.json    response of GET /comments/<id>
+
+Usage:
+    python benchmarks/mock_reddit.py [--port 8765] [--latency 0.05] [--listings DIR]
+                                     [--quota 600 --window 600] [--error-rate 0.02]
+
+Point a praw.Reddit client at it with
+    oauth_url="http://127.0.0.1:<port>", reddit_url="http://127.0.0.1:<port>"
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV_FILES = ["sentiment_analysis_results_VADER.csv", "sentiment_analysis_results.csv"]
+
+
+def load_listings(directory):
+    """
+    Loads recorded API responses from a directory.
+
+    Returns:
+        tuple: (list of post data dicts, dict of post id -> comment data dicts)
+    """
+    with open(os.path.join(directory, "top.json"), encoding="utf-8") as f:
+        posts = [child["data"] for child in json.load(f)["data"]["children"]]
+    comments = {}
+    for post in posts:
+        path = os.path.join(directory, "comments", f"{post['id']}.json")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                comments[post["id"]] = [child["data"] for child in json.load(f)[1]["data"]["children"]
+                                        if child["kind"] == "t1"]
+    return posts, comments
+
+
+def synthesize_listings(n_posts=200, comments_per_post=30, seed=0):
+    """
+    Builds listings from the titles and comment texts in the shipped CSVs.
+
+    Returns:
+        tuple: (list of post data dicts, dict of post id -> comment data dicts)
+    """
+    rows = []
+    for name in CSV_FILES:
+        path = os.path.join(REPO_ROOT, name)
+        if os.path.exists(path):
+            with open(path, newline="", encoding="utf-8") as f:
+                rows.extend(csv.DictReader(f))
+    rng = random.Random(seed)
+    posts = []
+    comments = {}
+    for i in range(n_posts):
+        row = rng.choice(rows)
+        post_id = f"p{i:x}"
+        posts.append({
+            "id": post_id,
+            "name": f"t3_{post_id}",
+            "title": row["title"],
+            "score": rng.randint(0, 5000),
+            "stickied": i == 0,
+            "permalink": f"/r/mock/comments/{post_id}/post_{i}/",
+            "num_comments": comments_per_post,
+            "subreddit": "mock",
+            "created_utc": 1700000000 + i,
+        })
+        comments[post_id] = [
+            {
+                "id": f"{post_id}c{j:x}",
+                "name": f"t1_{post_id}c{j:x}",
+                "body": rng.choice(rows)["comment_text"],
+                "score": rng.randint(-10, 1000),
+                "author": rng.choice(["alice", "bob", "carol", "AutoModerator"]),
+                "link_id": f"t3_{post_id}",
+                "parent_id": f"t3_{post_id}",
+                "created_utc": 1700000000 + i + j,
+                "edited": False,
+                "replies": "",
+            }
+            for j in range(comments_per_post)
+        ]
+    return posts, comments
+
+
+def _listing(kind, items, after=None):
+    return {
+        "kind": "Listing",
+        "data": {"after": after, "before": None, "dist": len(items),
+                 "children": [{"kind": kind, "data": item} for item in items]},
+    }
+
+
+class MockRedditServer:
+    """
+    Threaded HTTP server answering the Reddit API calls made by
+    fetch_top_posts. Use as a context manager to run it in the background.
+
+    Args:
+        posts (list): Post data dicts, in top listing order
+        comments (dict): Post id -> list of comment data dicts
+        latency (float): Seconds to wait before answering each request
+        port (int): Port to listen on, 0 for any free port
+        quota (int, optional): API requests allowed per window; unlimited and
+            without rate-limit headers when not given
+        window (float): Length of a quota window in seconds
+        error_rate (float): Share of API requests answered with a 503
+        seed (int): Seed for choosing the failed requests
+    """
+
+    def __init__(self, posts, comments, latency=0.0, port=0, quota=None, window=600.0, error_rate=0.0, seed=0):
+        self.posts = posts
+        self.comments = comments
+        self.latency = latency
+        self.quota = quota
+        self.window = window
+        self.error_rate = error_rate
+        self.requests = 0
+        self.throttled = 0
+        self.failed = 0
+        self.max_concurrent = 0
+        self._active = 0
+        self._window_start = time.monotonic()
+        self._used = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def throttle(self):
+        """
+        Counts an API request against the quota. Returns (status, payload,
+        headers) for a request that is refused or failed, or (None, None,
+        headers) with the rate-limit headers to send with the answer.
+        """
+        if self.quota is None and not self.error_rate:
+            return None, None, {}
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._window_start
+            if elapsed >= self.window:
+                self._window_start += elapsed // self.window * self.window
+                self._used = 0
+            reset = self.window - (now - self._window_start)
+            headers = {}
+            if self.quota is not None:
+                if self._used >= self.quota:
+                    self.throttled += 1
+                    headers = {"X-Ratelimit-Used": str(self._used), "X-Ratelimit-Remaining": "0",
+                               "X-Ratelimit-Reset": str(int(reset) + 1), "Retry-After": str(int(reset) + 1)}
+                    return 429, {"message": "Too Many Requests", "error": 429}, headers
+                self._used += 1
+                headers = {"X-Ratelimit-Used": str(self._used),
+                           "X-Ratelimit-Remaining": f"{self.quota - self._used:.1f}",
+                           "X-Ratelimit-Reset": str(int(reset) + 1)}
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.failed += 1
+                return 503, {"message": "Service Unavailable", "error": 503}, headers
+        return None, None, headers
+
+    def respond(self, method, path, query):
+        """
+        Returns (status, payload, headers) for a request.
+        """
+        if method == "POST" and path.rstrip("/") == "/api/v1/access_token":
+            return 200, {"access_token": "mock-token", "token_type": "bearer",
+                         "expires_in": 86400, "scope": "*"}, {}
+
+        status, payload, headers = self.throttle()
+        if status is not None:
+            return status, payload, headers
+        status, payload, extra_headers = self._answer(method, path, query)
+        headers.update(extra_headers)
+        return status, payload, headers
+
+    def _answer(self, method, path, query):
+        match = re.fullmatch(r"/r/[^/]+/top/?(?:\.json)?", path)
+        if method == "GET" and match:
+            limit = int(query.get("limit", ["25"])[0])
+            after = query.get("after", [None])[0]
+            start = 0
+            if after:
+                names = [post["name"] for post in self.posts]
+                start = names.index(after) + 1 if after in names else len(self.posts)
+            page = self.posts[start:start + limit]
+            next_after = page[-1]["name"] if start + limit < len(self.posts) and page else None
+            return 200, _listing("t3", page, next_after), {}
+
+        match = re.fullmatch(r"/comments/([^/.]+)/?(?:\.json)?", path)
+        if method == "GET" and match:
+            post_id = match.group(1)
+            post = next((post for post in self.posts if post["id"] == post_id), None)
+            if post is None:
+                return 404, {"message": "Not Found", "error": 404}, {}
+            return 200, [_listing("t3", [post]), _listing("t1", self.comments.get(post_id, []))], {}
+
+        return 404, {"message": "Not Found", "error": 404}, {}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _serve(self, method):
+                with server._lock:
+                    server.requests += 1
+                    server._active += 1
+                    server.max_concurrent = max(server.max_concurrent, server._active)
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    parsed = urlparse(self.path)
+                    if method == "POST":
+                        length = int(self.headers.get("Content-Length") or 0)
+                        self.rfile.read(length)
+                    status, payload, headers = server.respond(method, parsed.path, parse_qs(parsed.query))
+                    body = json.dumps(payload).encode("utf-8")
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with server._lock:
+                        server._active -= 1
+
+            def do_GET(self):
+                self._serve("GET")
+
+            def do_POST(self):
+                self._serve("POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the Reddit API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds of delay per request")
+    parser.add_argument("--listings", help="Directory of recorded API responses")
+    parser.add_argument("--posts", type=int, default=200, help="Synthetic posts when no listings are given")
+    parser.add_argument("--quota", type=int, help="Requests allowed per window; unlimited by default")
+    parser.add_argument("--window", type=float, default=600.0, help="Seconds per quota window")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failed with a 503")
+    args = parser.parse_args()
+
+    posts, comments = load_listings(args.listings) if args.listings else synthesize_listings(args.posts)
+    server = MockRedditServer(posts, comments, latency=args.latency, port=args.port,
+                              quota=args.quota, window=args.window, error_rate=args.error_rate)
+    print(f"Serving {len(posts)} posts on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
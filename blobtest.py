@@ -1,24 +1,14 @@
 import praw
 import re
-from nltk.corpus import stopwords
-from textblob import TextBlob
-import nltk
-import csv
-
-# Download necessary NLTK data files
-nltk.download('stopwords')
-
-# Reddit API credentials
-CLIENT_ID = # Enter your client ID here
-CLIENT_SECRET = ## Enter client secret here
-USER_AGENT = ## This is just a description
-
-# Authenticate with Reddit
-reddit = praw.Reddit(
-    client_id=CLIENT_ID,
-    client_secret=CLIENT_SECRET,
-    user_agent=USER_AGENT
-)
+from functools import cached_property
+from nltk_resources import normalize_stopwords, remove_stopwords
+from spelling import correct as correct_spelling
+from instrumentation import RunMetrics, format_report
+from result_store import ResultStore
+from result_writers import open_writer, sort_file
+# Reddit API credentials come from the environment or the .env file, like in
+# vadertest, and the client is only created when posts are fetched
+from vadertest import get_reddit
 
 def clean_text(text):
     """
@@ -32,41 +22,99 @@ def clean_text(text):
 
 def correct_grammar(text):
     """
-    Corrects the capitalization and grammar of the input text using TextBlob.
+    Corrects the spelling of the input text. Gives the same result as
+    TextBlob's correct(), using the indexed, cached corrector in spelling.
     """
-    blob = TextBlob(text)
-    corrected_text = str(blob.correct())
-    return corrected_text
+    return correct_spelling(text)
 
-def preprocess_text(text):
+def preprocess_text(text, stop_words=None):
     """
     Converts the text to lowercase and removes stopwords.
+    Custom stopwords, in any case and any collection, can be passed in
+    stop_words; by default the NLTK English list is used, loaded once per
+    process.
     """
     # Convert to lowercase
     text = text.lower()
     # Remove stopwords
-    stop_words = set(stopwords.words('english'))
-    words = text.split()
-    cleaned_text = ' '.join([word for word in words if word not in stop_words])
+    cleaned_text = remove_stopwords(text, normalize_stopwords(stop_words))
     return cleaned_text
 
+class CommentAnalysis:
+    """
+    Analysis of one preprocessed comment, shared by is_meaningful and
+    analyze_sentiment.
+
+    Building a TextBlob for each check made both re-tokenize the text and
+    re-run the pattern sentiment analyzer. Here the text is tokenized once,
+    the first time the sentiment is needed, and polarity and subjectivity are
+    computed once from those tokens, with the same result as
+    TextBlob(text).sentiment. With a RunMetrics, every later use is counted
+    as a tokenization and a sentiment computation avoided.
+
+    Args:
+        text (str): Preprocessed comment text
+        metrics (RunMetrics, optional): Receives the tokenization and
+            sentiment counters
+    """
+
+    def __init__(self, text, metrics=None):
+        self.text = text
+        self.metrics = metrics
+        self._sentiment = None
+
+    @cached_property
+    def word_count(self):
+        return len(self.text.split())
+
+    @property
+    def sentiment(self):
+        """
+        The (polarity, subjectivity) pair, computed on first use.
+        """
+        if self._sentiment is not None:
+            if self.metrics is not None:
+                self.metrics.count("tokenizations_avoided")
+                self.metrics.count("sentiment_computations_avoided")
+            return self._sentiment
+        from textblob.en import sentiment as pattern_sentiment
+        # What TextBlob's PatternAnalyzer does with a string, split in two steps
+        tokens = [word.lower() for word in " ".join(pattern_sentiment.tokenizer(self.text)).split()]
+        polarity, subjectivity = pattern_sentiment(tokens)
+        self._sentiment = (polarity, subjectivity)
+        if self.metrics is not None:
+            self.metrics.count("tokenizations")
+            self.metrics.count("sentiment_computations")
+        return self._sentiment
+
+    @property
+    def polarity(self):
+        return self.sentiment[0]
+
+    @property
+    def subjectivity(self):
+        return self.sentiment[1]
+
+
+def _analysis(text):
+    return text if isinstance(text, CommentAnalysis) else CommentAnalysis(text)
+
 def is_meaningful(text):
     """
     Checks if the text is meaningful using TextBlob's subjectivity score.
+    Takes the text or its CommentAnalysis.
     """
-    blob = TextBlob(text)
     # Subjectivity ranges from 0 (very objective) to 1 (very subjective)
     # We assume a comment is meaningful if its subjectivity is above a threshold
-    return blob.sentiment.subjectivity > 0.1
+    return _analysis(text).subjectivity > 0.1
 
 def analyze_sentiment(text):
     """
     Analyzes the sentiment of the input text using TextBlob.
     Returns a tuple of sentiment (1 for positive, 0 for neutral, -1 for negative)
-    and the polarity score.
+    and the polarity score. Takes the text or its CommentAnalysis.
     """
-    blob = TextBlob(text)
-    polarity = blob.sentiment.polarity
+    polarity = _analysis(text).polarity
     # Adjust thresholds if necessary
     if polarity > 0.1:
         return 1, polarity
@@ -75,23 +123,54 @@ def analyze_sentiment(text):
     else:
         return 0, polarity
 
-def fetch_top_posts(subreddit_name, limit=100):
+def is_candidate(comment):
+    """
+    Returns True for the comments considered for a post: every comment,
+    whatever its author or length; only MoreComments placeholders are left
+    out.
+    """
+    return not isinstance(comment, praw.models.MoreComments)
+
+def select_comment(bodies, min_words=5, metrics=None):
+    """
+    Cleans, corrects, preprocesses and analyzes candidate comment bodies in
+    order and stops at the first meaningful one: more than min_words words
+    and a subjectivity above 0.1.
+    
+    Returns:
+        tuple: (index, preprocessed text, sentiment, polarity) of the selected
+        comment, or None if no candidate is meaningful
+    """
+    for index, body in enumerate(bodies):
+        cleaned_comment = clean_text(body)
+        corrected_comment = correct_grammar(cleaned_comment)
+        preprocessed_comment = preprocess_text(corrected_comment)
+        analysis = CommentAnalysis(preprocessed_comment, metrics)
+        if preprocessed_comment and analysis.word_count > min_words and is_meaningful(analysis):
+            sentiment, polarity = analyze_sentiment(analysis)
+            return index, preprocessed_comment, sentiment, polarity
+    return None
+
+def iter_top_posts(subreddit_name, limit=100, metrics=None):
     """
     Fetches the top posts from a given subreddit, analyzes the most upvoted
-    comment from each post, and returns the results.
+    comment from each post, and yields one result per post as soon as it is
+    ready.
+    Each candidate comment gets one CommentAnalysis, shared by the
+    meaningfulness filter and the classifier; pass a RunMetrics to count
+    the tokenizations and sentiment computations this saves.
     """
-    subreddit = reddit.subreddit(subreddit_name)
+    subreddit = get_reddit().subreddit(subreddit_name)
     top_posts = subreddit.top(limit=limit)
     
-    data = []
     for post in top_posts:
         if post.stickied:
             print(f"Skipping stickied post: {post.title}")
             continue
         
         comments = post.comments.list()
-        # Filter out MoreComments objects and invalid comments
-        valid_comments = [comment for comment in comments if isinstance(comment, praw.models.Comment)]
+        # Filter out MoreComments objects
+        valid_comments = [comment for comment in comments if is_candidate(comment)]
         
         if not valid_comments:
             print(f"No valid comments found for post: {post.title}")
@@ -101,24 +180,24 @@ def fetch_top_posts(subreddit_name, limit=100):
         valid_comments = sorted(valid_comments, key=lambda c: c.score, reverse=True)
         
         # Analyze the highest upvoted valid comment that makes sense
-        for comment in valid_comments:
-            cleaned_comment = clean_text(comment.body)
-            corrected_comment = correct_grammar(cleaned_comment)
-            preprocessed_comment = preprocess_text(corrected_comment)
-            if preprocessed_comment and len(preprocessed_comment.split()) > 5 and is_meaningful(preprocessed_comment):
-                sentiment, polarity = analyze_sentiment(preprocessed_comment)
-                data.append({
-                    "title": post.title,
-                    "url": f"https://www.reddit.com{post.permalink}",
-                    "post_upvotes": post.score,
-                    "comment_text": preprocessed_comment,
-                    "comment_upvotes": comment.score,
-                    "sentiment": sentiment,
-                    "polarity": polarity
-                })
-                break  # Move to the next post after finding a valid comment
-    
-    return data
+        selection = select_comment((comment.body for comment in valid_comments), metrics=metrics)
+        if selection:
+            index, preprocessed_comment, sentiment, polarity = selection
+            yield {
+                "title": post.title,
+                "url": f"https://www.reddit.com{post.permalink}",
+                "post_upvotes": post.score,
+                "comment_text": preprocessed_comment,
+                "comment_upvotes": valid_comments[index].score,
+                "sentiment": sentiment,
+                "polarity": polarity
+            }
+
+def fetch_top_posts(subreddit_name, limit=100, metrics=None):
+    """
+    Returns the results of iter_top_posts as a list.
+    """
+    return list(iter_top_posts(subreddit_name, limit=limit, metrics=metrics))
 
 def calculate_accuracy(data):
     """
@@ -132,24 +211,33 @@ def calculate_accuracy(data):
 
 def save_to_csv(data, filename="sentiment_analysis_results.csv"):
     """
-    Saves the sentiment analysis results to a CSV file, sorted by comment upvotes.
+    Saves the sentiment analysis results (a ResultStore or a list of
+    records) to a CSV file, sorted by comment upvotes.
     """
-    data = sorted(data, key=lambda x: x['comment_upvotes'], reverse=True)
-    keys = data[0].keys()
-    with open(filename, 'w', newline='', encoding='utf-8') as output_file:
-        dict_writer = csv.DictWriter(output_file, fieldnames=keys)
-        dict_writer.writeheader()
-        dict_writer.writerows(data)
+    results = ResultStore.from_records(data)
+    results.to_csv(filename, order=results.argsort("comment_upvotes", descending=True))
 
 def main():
     subreddit_name = "controlproblem"  # Change to your target subreddit
     limit = 500  # Increase limit for more posts
-    posts_data = fetch_top_posts(subreddit_name, limit=limit)
+    output_path = "sentiment_analysis_results.csv"  # .csv, .jsonl or .parquet (a directory)
+    run_metrics = RunMetrics()
+    # Results are appended to the output as they are produced; only the two
+    # columns the accuracy needs stay in memory
+    posts_data = ResultStore()
+    with open_writer(output_path, flush_every=100, flush_interval=5.0) as writer:
+        for record in iter_top_posts(subreddit_name, limit=limit, metrics=run_metrics):
+            writer.write(record)
+            posts_data.append({"sentiment": record["sentiment"], "polarity": record["polarity"]})
+    run_metrics.finish()
     
     accuracy = calculate_accuracy(posts_data)
     print(f"Analyzed {len(posts_data)} posts from r/{subreddit_name} with an accuracy of {accuracy:.2f}%")
+    print(f"\nRun Report:")
+    print(format_report(run_metrics.report()))
     
-    save_to_csv(posts_data)
+    if writer.records_written:
+        sort_file(output_path, "comment_upvotes", descending=True)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,410 @@
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from text_normalizer import clean_batch
+from result_writers import open_writer
+from near_duplicates import NearDuplicateIndex
+from score_cache import ScoreCache, score_config
+from vadertest import cluster_result, get_batch_scorer, has_enough_words, preprocess_text, score_comments
+
+# Offline scoring of comment dumps, without Reddit.
+#
+# Records are read lazily from CSV or JSON Lines files (optionally gzipped)
+# or standard input, in chunks of chunk_size. Each chunk goes through the same
+# clean_text -> preprocess_text -> VADER stages as a live run, on a process
+# pool, with at most two chunks per worker in flight so memory stays bounded
+# whatever the input size. Results are written as they come back, in input
+# order, with each record's id, and the throughput is reported on stderr.
+#
+# Dumps repeat themselves (bot replies, copypasta), so with a ScoreCache each
+# chunk is first looked up on the main process and only the bodies not seen
+# before are sent to the pool, each once.
+#
+# With a NearDuplicateIndex, the chunk is preprocessed on the pool, clustered
+# on the main process (the index covers the whole run), and only the comments
+# that start a cluster go back to the pool to be scored; the others reuse
+# their cluster's scores and every output record gets its "cluster".
+
+# Fields of every output record, after the id
+SCORE_FIELDS = ["sentiment", "compound", "neg", "neu", "pos", "meaningful"]
+
+
+def _open_input(path):
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def input_format(path, default="jsonl"):
+    """
+    Returns "csv" or "jsonl" from a path's extension (ignoring .gz), or
+    default for standard input and unknown extensions.
+    """
+    if path.endswith(".gz"):
+        path = path[:-3]
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".json", ".ndjson"):
+        return "jsonl"
+    return default
+
+
+def read_records(paths, format=None, skipped=None):
+    """
+    Yields the records (dicts) of every input in turn; "-" reads standard
+    input. Malformed JSON lines and JSON values that are not objects are
+    reported and skipped, and counted in skipped (a Counter) if given.
+    """
+    csv.field_size_limit(2 ** 31 - 1)
+    for path in paths:
+        record_format = format or input_format(path)
+        with _open_input(path) as f:
+            if record_format == "csv":
+                yield from csv.DictReader(f)
+                continue
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    _skip(skipped, "malformed line", f"Skipping malformed line {line_number} of {path}: {e}")
+                    continue
+                if not isinstance(record, dict):
+                    _skip(skipped, "not an object",
+                          f"Skipping line {line_number} of {path}: not a JSON object")
+                    continue
+                yield record
+
+
+def _skip(skipped, reason, message):
+    print(message, file=sys.stderr)
+    if skipped is not None:
+        skipped[reason] += 1
+
+
+def prepare_texts(texts, remove_stopwords=True, remove_numbers=True, remove_emojis=True):
+    """
+    Process pool worker: cleans and preprocesses a chunk of raw comment bodies.
+    """
+    cleaned = clean_batch(texts, remove_numbers=remove_numbers, remove_emojis=remove_emojis)
+    return [preprocess_text(text, remove_stopwords=remove_stopwords) for text in cleaned]
+
+
+def score_texts(texts, min_words=3, min_compound_score=0.1, remove_stopwords=True,
+                remove_numbers=True, remove_emojis=True):
+    """
+    Process pool worker: cleans, preprocesses and scores a chunk of raw
+    comment bodies.
+
+    Returns:
+        tuple: (preprocessed texts, score_comment-style results)
+    """
+    preprocessed = prepare_texts(texts, remove_stopwords, remove_numbers, remove_emojis)
+    return preprocessed, score_comments(preprocessed, min_words=min_words, min_compound_score=min_compound_score)
+
+
+class _Chunk:
+    # A chunk of records on its way through the stages: its cache lookups, the
+    # distinct bodies still to process and, with near-duplicate detection,
+    # their preprocessed texts, clusters and the bodies left to score
+
+    def __init__(self, ids, texts, cached, misses):
+        self.ids = ids
+        self.texts = texts
+        self.cached = cached
+        self.misses = misses
+        self.preprocessed = None
+        self.clusters = None
+        self.representatives = None
+        self.to_score = misses
+        self.future = None
+        self.clustered = False
+
+
+def iter_scored(records, text_field="body", id_field="id", keep_text=False, workers=0, chunk_size=2000,
+                progress_callback=None, score_cache=None, near_duplicates=None, skipped=None, **options):
+    """
+    Scores records and yields one output record per input record, in order:
+    its id (the record's id_field, or its position when it has none), the
+    SCORE_FIELDS, with near_duplicates its "cluster" and, with keep_text,
+    the preprocessed "comment_text". Records that are not dicts, or whose
+    text_field holds something other than text, are reported and skipped.
+
+    Args:
+        records (iterable): Input records, consumed lazily
+        text_field (str): Field holding the comment body
+        id_field (str): Field holding the record's id
+        keep_text (bool): Include the preprocessed text
+        workers (int): Processes, 0 for one per CPU core, 1 to score in-process
+        chunk_size (int): Records scored per task
+        progress_callback (callable, optional): Called with the number of
+            records scored so far after every chunk
+        score_cache (ScoreCache, optional): Results of bodies already scored
+            with the same options, to reuse and to add to
+        near_duplicates (NearDuplicateIndex, optional): Clusters the run's
+            comments; comments close to one already scored reuse its scores.
+            Comments too short to be scored have no cluster
+        skipped (Counter, optional): Receives the number of records skipped,
+            by reason
+        **options: min_words, min_compound_score, remove_stopwords,
+            remove_numbers and remove_emojis, as for score_texts
+    """
+    workers = workers or os.cpu_count()
+    cleaning = {name: options[name] for name in ("remove_stopwords", "remove_numbers", "remove_emojis")
+                if name in options}
+    thresholds = {name: options[name] for name in ("min_words", "min_compound_score") if name in options}
+    min_words = options.get("min_words", 3)
+    min_compound_score = options.get("min_compound_score", 0.1)
+    config = score_config(scorer="vader_batch", **options)
+
+    def valid_records():
+        # (position, record) of the records that can be scored; skipped
+        # records keep their position, so the default ids do not shift
+        for position, record in enumerate(records):
+            if not isinstance(record, dict):
+                _skip(skipped, "not an object",
+                      f"Skipping record {position}: not a dict ({type(record).__name__})")
+                continue
+            body = record.get(text_field)
+            if body is not None and not isinstance(body, str):
+                _skip(skipped, "text not a string", f"Skipping record {record.get(id_field, position)}: "
+                                                    f"{text_field} is not text ({type(body).__name__})")
+                continue
+            yield position, record
+
+    def chunks():
+        iterator = valid_records()
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                return
+            ids = [record.get(id_field, position) for position, record in chunk]
+            texts = [record.get(text_field) or "" for _, record in chunk]
+            # Cached entries (None for misses), and the distinct bodies to process
+            if score_cache is None:
+                cached = [None] * len(texts)
+            else:
+                cached = [score_cache.get(text, config) for text in texts]
+            misses = list(dict.fromkeys(text for text, entry in zip(texts, cached) if entry is None))
+            yield _Chunk(ids, texts, cached, misses)
+
+    def cluster(chunk, prepared):
+        # Near-duplicate stage, on the main process and in input order: only
+        # bodies starting a cluster, or too short to join one, are left to score
+        chunk.preprocessed = dict(zip(chunk.misses, prepared))
+        texts = [entry[0] if entry else chunk.preprocessed[text] for text, entry in zip(chunk.texts, chunk.cached)]
+        eligible = [i for i, text in enumerate(texts) if has_enough_words(text, min_words)]
+        clusters, new = near_duplicates.assign([texts[i] for i in eligible])
+        chunk.clusters = [None] * len(texts)
+        chunk.representatives = set()
+        for i, cluster_id, is_new in zip(eligible, clusters, new):
+            chunk.clusters[i] = cluster_id
+            if is_new:
+                chunk.representatives.add(i)
+                if chunk.cached[i]:
+                    near_duplicates.scores.put(cluster_id, chunk.cached[i][1])
+        to_score = {chunk.texts[i] for i in chunk.representatives}
+        chunk.to_score = [text for text in chunk.misses
+                          if text in to_score or not has_enough_words(chunk.preprocessed[text], min_words)]
+        chunk.clustered = True
+        return [chunk.preprocessed[text] for text in chunk.to_score]
+
+    def results(chunk, scored):
+        if scored is None:
+            # Nothing was left to score
+            scored = ([], []) if chunk.preprocessed is None else []
+        if chunk.preprocessed is None:
+            preprocessed, scores = scored
+            chunk.preprocessed = dict(zip(chunk.misses, preprocessed))
+        else:
+            scores = scored
+        scored = dict(zip(chunk.to_score, scores))
+        if chunk.clusters is not None:
+            for i in chunk.representatives:
+                if chunk.texts[i] in scored:
+                    near_duplicates.scores.put(chunk.clusters[i], scored[chunk.texts[i]])
+        for i, (record_id, body, entry) in enumerate(zip(chunk.ids, chunk.texts, chunk.cached)):
+            if chunk.clusters is not None and chunk.clusters[i] is not None and i not in chunk.representatives:
+                # Members share their representative's scores, even when their own are cached
+                text = entry[0] if entry else chunk.preprocessed[body]
+                result = cluster_result(near_duplicates.scores.get(chunk.clusters[i]), min_compound_score)
+            elif entry:
+                text, result = entry
+            else:
+                text, result = chunk.preprocessed[body], scored[body]
+                if score_cache is not None:
+                    # Only a comment's own scores are cached
+                    score_cache.put(body, config, text, result)
+            output = {id_field: record_id}
+            for field in SCORE_FIELDS:
+                output[field] = result[field]
+            if chunk.clusters is not None:
+                output["cluster"] = chunk.clusters[i]
+            if keep_text:
+                output["comment_text"] = text
+            yield output
+
+    scored_count = 0
+    if workers == 1:
+        for chunk in chunks():
+            if near_duplicates is None:
+                scored = score_texts(chunk.misses, **options) if chunk.misses else None
+            else:
+                to_score = cluster(chunk, prepare_texts(chunk.misses, **cleaning))
+                scored = score_comments(to_score, **thresholds) if to_score else None
+            yield from results(chunk, scored)
+            scored_count += len(chunk.ids)
+            if progress_callback:
+                progress_callback(scored_count)
+        return
+
+    # Load the lexicon before the pool forks, so the workers inherit it
+    get_batch_scorer()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+
+        def submit(function, texts, **kwargs):
+            return pool.submit(function, texts, **kwargs) if texts else None
+
+        def advance():
+            # Clusters the chunks whose preprocessing is done, in order, then
+            # waits for the oldest chunk's scores and yields its records
+            for chunk in pending:
+                if chunk.clustered:
+                    continue
+                if chunk is not pending[0] and chunk.future and not chunk.future.done():
+                    break
+                to_score = cluster(chunk, chunk.future.result() if chunk.future else [])
+                chunk.future = submit(score_comments, to_score, **thresholds)
+            chunk = pending.popleft()
+            yield from results(chunk, chunk.future.result() if chunk.future else None)
+
+        for chunk in chunks():
+            if near_duplicates is None:
+                chunk.clustered = True
+                chunk.future = submit(score_texts, chunk.misses, **options)
+            else:
+                chunk.future = submit(prepare_texts, chunk.misses, **cleaning)
+            pending.append(chunk)
+            if len(pending) >= 2 * workers:
+                count = len(pending[0].ids)
+                yield from advance()
+                scored_count += count
+                if progress_callback:
+                    progress_callback(scored_count)
+        while pending:
+            count = len(pending[0].ids)
+            yield from advance()
+            scored_count += count
+            if progress_callback:
+                progress_callback(scored_count)
+
+
+class ThroughputReporter:
+    """
+    Progress callback printing records scored and records/sec to stderr at
+    most every interval seconds.
+    """
+
+    def __init__(self, interval=5.0):
+        self.interval = interval
+        self.start = time.perf_counter()
+        self.last_report = self.start
+        self.count = 0
+
+    def __call__(self, count):
+        self.count = count
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            self.report()
+
+    def report(self, final=False):
+        seconds = time.perf_counter() - self.start
+        rate = self.count / seconds if seconds else 0
+        print(f"{'Scored' if final else 'Scoring:'} {self.count} records in {seconds:.1f}s ({rate:,.0f} records/sec)",
+              file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score comment dumps with VADER, without Reddit")
+    parser.add_argument("inputs", nargs="*", default=["-"],
+                        help="CSV or JSON Lines files, optionally gzipped; standard input by default or for -")
+    parser.add_argument("-o", "--output", default="-", help="Output file (.csv, .jsonl or .parquet); standard "
+                                                              "output by default")
+    parser.add_argument("--input-format", choices=["csv", "jsonl"], help="Input format; by default from the "
+                                                                           "extension, JSON Lines for stdin")
+    parser.add_argument("--output-format", choices=["csv", "jsonl", "parquet"],
+                        help="Output format; by default from the extension, JSON Lines for stdout")
+    parser.add_argument("--text-field", default="body", help="Field holding the comment text")
+    parser.add_argument("--id-field", default="id", help="Field holding the comment id")
+    parser.add_argument("--keep-text", action="store_true", help="Include the preprocessed text in the output")
+    parser.add_argument("--workers", type=int, default=0, help="Processes, 0 for one per CPU core")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Records scored per task")
+    parser.add_argument("--flush-every", type=int, default=10000, help="Records buffered before writing")
+    parser.add_argument("--min-words", type=int, default=3)
+    parser.add_argument("--min-compound-score", type=float, default=0.1)
+    parser.add_argument("--keep-stopwords", action="store_true")
+    parser.add_argument("--keep-numbers", action="store_true")
+    parser.add_argument("--keep-emojis", action="store_true")
+    parser.add_argument("--score-cache", help="Score cache file, kept between runs; by default the cache only "
+                                               "lives for the run")
+    parser.add_argument("--score-cache-size", type=int, default=100_000,
+                        help="Most comment bodies in the score cache, 0 to disable it")
+    parser.add_argument("--near-duplicates", type=float, metavar="THRESHOLD",
+                        help="Score one comment per cluster of near-duplicates, whose shingles have at least this "
+                             "estimated Jaccard similarity (e.g. 0.8); adds a cluster column")
+    parser.add_argument("--report-interval", type=float, default=5.0, help="Seconds between throughput reports")
+    args = parser.parse_args(argv)
+
+    output_format = args.output_format or ("jsonl" if args.output == "-" else None)
+    reporter = ThroughputReporter(args.report_interval)
+    skipped = Counter()
+    records = read_records(args.inputs, args.input_format, skipped)
+    score_cache = ScoreCache(args.score_cache_size, args.score_cache) if args.score_cache_size else None
+    near_duplicates = NearDuplicateIndex(args.near_duplicates) if args.near_duplicates is not None else None
+    with open_writer(args.output, output_format, flush_every=args.flush_every) as writer:
+        for output in iter_scored(
+            records,
+            text_field=args.text_field,
+            id_field=args.id_field,
+            keep_text=args.keep_text,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            progress_callback=reporter,
+            score_cache=score_cache,
+            near_duplicates=near_duplicates,
+            skipped=skipped,
+            min_words=args.min_words,
+            min_compound_score=args.min_compound_score,
+            remove_stopwords=not args.keep_stopwords,
+            remove_numbers=not args.keep_numbers,
+            remove_emojis=not args.keep_emojis,
+        ):
+            writer.write(output)
+    reporter.report(final=True)
+    if skipped:
+        print(f"Skipped {sum(skipped.values())} records: "
+              + ", ".join(f"{count} {reason}" for reason, count in skipped.items()), file=sys.stderr)
+    if score_cache is not None:
+        print(score_cache.format_stats(), file=sys.stderr)
+        score_cache.save()
+    if near_duplicates is not None:
+        print(near_duplicates.format_stats(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import heapq
+from collections import deque
+
+
+class CommentTree:
+    """
+    Re-iterable breadth-first walk over a comment forest, in the same order
+    as praw's CommentForest.list() but without building the flattened list.
+
+    Args:
+        forest (iterable): Top-level comments; each comment exposes .replies
+    """
+
+    def __init__(self, forest):
+        self.forest = forest
+
+    def __iter__(self):
+        queue = deque(self.forest)
+        while queue:
+            comment = queue.popleft()
+            yield comment
+            replies = getattr(comment, "replies", None)
+            if replies:
+                queue.extend(replies)
+
+
+class RankedComments:
+    """
+    Lazily ranked view of the valid comments in a comment collection.
+
+    Iterating yields valid comments by score in descending order, with ties
+    in collection order, exactly like sorting the filtered list would. Each
+    pass over the collection keeps only a heap of `window` candidates, so
+    memory stays bounded however many comments are served. Callers that
+    settle on one of the first `window` comments need a single pass; each
+    further window costs another pass, starting below the last comment
+    served.
+
+    Args:
+        comments (iterable): Re-iterable collection of comments
+        is_valid (callable): Predicate selecting the comments to rank
+        window (int): Candidates taken from each heap-based pass
+    """
+
+    def __init__(self, comments, is_valid, window=8):
+        self.comments = comments
+        self.is_valid = is_valid
+        self.window = window
+
+    def _top(self, bound=None):
+        # (score, -position) orders like a stable descending sort by score
+        # and is unique, so the comments themselves are never compared.
+        # With a bound, only comments ranked after it are considered.
+        heap = []
+        is_valid = self.is_valid
+        for position, comment in enumerate(self.comments):
+            # is_valid goes first: it screens out MoreComments, which have no score
+            if not is_valid(comment):
+                continue
+            if len(heap) == self.window and comment.score < heap[0][0][0]:
+                continue
+            key = (comment.score, -position)
+            if bound is not None and key >= bound:
+                continue
+            item = (key, comment)
+            if len(heap) < self.window:
+                heapq.heappush(heap, item)
+            elif key > heap[0][0]:
+                heapq.heapreplace(heap, item)
+        return sorted(heap, key=lambda item: item[0], reverse=True)
+
+    def __iter__(self):
+        bound = None
+        while True:
+            top = self._top(bound)
+            for _, comment in top:
+                yield comment
+            if len(top) < self.window:
+                return
+            bound = top[-1][0]
+
+    def __bool__(self):
+        return any(True for _ in self.unordered())
+
+    def unordered(self):
+        """
+        Yields the valid comments in collection order, without ranking them.
+        """
+        return (comment for comment in self.comments if self.is_valid(comment))
@@ -1,13 +1,19 @@
 import sys
 import os
+import time
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QLabel, QLineEdit, QPushButton, 
                             QSpinBox, QProgressBar, QTextEdit, QFrame,
-                            QMessageBox, QFileDialog, QGroupBox)
+                            QMessageBox, QFileDialog, QGroupBox, QComboBox,
+                            QCheckBox)
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtGui import QPalette, QColor, QFont
-from vadertest import fetch_top_posts as vader_fetch
-import pandas as pd
+from vadertest import iter_top_posts as vader_iter
+from post_cache import PostCache
+from instrumentation import RunMetrics, format_report, profiled
+from result_store import ResultStore
+from run_journal import RunJournal
+from score_cache import ScoreCache
 
 class ModernButton(QPushButton):
     def __init__(self, text, parent=None):
@@ -61,6 +67,22 @@ class ModernSpinBox(QSpinBox):
             }
         """)
 
+class ModernComboBox(QComboBox):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setStyleSheet("""
+            QComboBox {
+                padding: 8px;
+                border: 1px solid #cccccc;
+                border-radius: 4px;
+                background-color: white;
+                color: #333333;
+            }
+            QComboBox:focus {
+                border: 1px solid #4CAF50;
+            }
+        """)
+
 class ModernProgressBar(QProgressBar):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -95,19 +117,78 @@ class ModernTextEdit(QTextEdit):
 
 class AnalysisWorker(QThread):
     progress = pyqtSignal(int)
-    finished = pyqtSignal(list)
+    records = pyqtSignal(list)
+    finished = pyqtSignal(object)  # ResultStore
     error = pyqtSignal(str)
     status = pyqtSignal(str)
+    metrics = pyqtSignal(dict)
+
+    # Results are forwarded to the GUI in batches of this many records
+    BATCH_SIZE = 10
+    # Minimum seconds between two timing reports sent to the GUI
+    METRICS_INTERVAL = 0.5
 
-    def __init__(self, subreddit, limit):
+    # Profile file written for each profiler
+    PROFILE_FILES = {"cprofile": "vader_profile.prof", "pyinstrument": "vader_profile.html"}
+    # Journal of the posts settled by the current run, removed once it completes
+    JOURNAL_PATH = "vader_gui_journal.jsonl"
+    # Scores of comment bodies seen in earlier runs
+    SCORE_CACHE_PATH = "vader_gui_score_cache.json"
+    # Set to e.g. "reddit_cache.sqlite3" to reuse listings and comment trees
+    # for 24 hours; by default every run fetches live data
+    CACHE_PATH = None
+
+    def __init__(self, subreddit, limit, profiler=None, resume=False):
         super().__init__()
         self.subreddit = subreddit
         self.limit = limit
+        self.profiler = profiler
+        self.resume = resume
+        self.profile_path = None
 
     def run(self):
         try:
             self.status.emit("Fetching posts from Reddit...")
-            data = vader_fetch(self.subreddit, limit=self.limit, progress_callback=self.progress.emit)
+            cache = PostCache(self.CACHE_PATH) if self.CACHE_PATH else None
+            journal = RunJournal(self.JOURNAL_PATH, resume=self.resume)
+            if journal:
+                self.status.emit(f"Resuming: {len(journal)} posts already analyzed")
+            score_cache = ScoreCache(path=self.SCORE_CACHE_PATH)
+            run_metrics = RunMetrics()
+            last_report = 0.0
+            
+            def on_progress(processed):
+                nonlocal last_report
+                self.progress.emit(processed)
+                now = time.monotonic()
+                if now - last_report >= self.METRICS_INTERVAL:
+                    last_report = now
+                    self.metrics.emit(run_metrics.report())
+            
+            data = ResultStore()
+            batch = []
+            profile_output = self.PROFILE_FILES.get(self.profiler)
+            try:
+                with profiled(self.profiler, profile_output):
+                    for record in vader_iter(self.subreddit, limit=self.limit, progress_callback=on_progress,
+                                             cache=cache, metrics=run_metrics, journal=journal,
+                                             score_cache=score_cache):
+                        data.append(record)
+                        batch.append(record)
+                        if len(batch) >= self.BATCH_SIZE:
+                            self.records.emit(batch)
+                            batch = []
+                    if batch:
+                        self.records.emit(batch)
+            finally:
+                if cache is not None:
+                    cache.close()
+                journal.close()
+                score_cache.save()
+                run_metrics.finish()
+                self.metrics.emit(run_metrics.report())
+            if profile_output:
+                self.profile_path = os.path.abspath(profile_output)
             self.finished.emit(data)
         except Exception as e:
             self.error.emit(str(e))
@@ -173,9 +254,31 @@ class MainWindow(QMainWindow):
         limit_layout.addWidget(limit_label)
         limit_layout.addWidget(self.limit_spin)
         
+        # Profiler
+        profiler_layout = QVBoxLayout()
+        profiler_label = QLabel("Profiler:")
+        profiler_label.setStyleSheet("font-weight: bold; color: #333333;")
+        self.profiler_combo = ModernComboBox()
+        self.profiler_combo.addItem("Off", None)
+        self.profiler_combo.addItem("cProfile", "cprofile")
+        self.profiler_combo.addItem("pyinstrument", "pyinstrument")
+        profiler_layout.addWidget(profiler_label)
+        profiler_layout.addWidget(self.profiler_combo)
+        
+        # Resume an interrupted run from its journal
+        resume_layout = QVBoxLayout()
+        resume_label = QLabel("Interrupted Run:")
+        resume_label.setStyleSheet("font-weight: bold; color: #333333;")
+        self.resume_check = QCheckBox("Resume")
+        self.resume_check.setToolTip("Continue the last interrupted analysis, skipping the posts it already analyzed")
+        resume_layout.addWidget(resume_label)
+        resume_layout.addWidget(self.resume_check)
+        
         # Add all input widgets to input layout
         input_layout.addLayout(subreddit_layout)
         input_layout.addLayout(limit_layout)
+        input_layout.addLayout(profiler_layout)
+        input_layout.addLayout(resume_layout)
         input_group.setLayout(input_layout)
         
         # Analysis button
@@ -216,13 +319,33 @@ class MainWindow(QMainWindow):
         results_layout.addWidget(self.export_button)
         results_group.setLayout(results_layout)
         
+        # Per-stage timing of the current run
+        timing_group = QGroupBox("Pipeline Timing")
+        timing_layout = QVBoxLayout()
+        self.timing_text = ModernTextEdit()
+        self.timing_text.setReadOnly(True)
+        self.timing_text.setFont(QFont("Monospace", 9))
+        self.timing_text.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)
+        self.timing_text.setFixedHeight(170)
+        self.timing_text.setPlainText("Stage timings appear here while an analysis runs.")
+        timing_layout.addWidget(self.timing_text)
+        timing_group.setLayout(timing_layout)
+        
         # Add all sections to main layout
         layout.addWidget(input_group)
         layout.addWidget(self.analyze_button)
         layout.addWidget(status_group)
         layout.addWidget(results_group)
+        layout.addWidget(timing_group)
         
         self.analysis_data = None
+        self.update_resume_option()
+
+    def update_resume_option(self):
+        # Resuming is only offered while an interrupted run's journal exists
+        can_resume = os.path.exists(AnalysisWorker.JOURNAL_PATH)
+        self.resume_check.setEnabled(can_resume)
+        self.resume_check.setChecked(can_resume)
 
     def start_analysis(self):
         subreddit = self.subreddit_input.text().strip()
@@ -236,11 +359,18 @@ class MainWindow(QMainWindow):
         self.progress_bar.setValue(0)
         self.status_label.setText("Starting analysis...")
         self.results_text.clear()
+        self.received_records = 0
+        
+        self.timing_text.clear()
         
         self.worker = AnalysisWorker(
             subreddit,
-            self.limit_spin.value()
+            self.limit_spin.value(),
+            self.profiler_combo.currentData(),
+            self.resume_check.isChecked()
         )
+        self.worker.records.connect(self.add_records)
+        self.worker.metrics.connect(self.update_metrics)
         self.worker.finished.connect(self.analysis_complete)
         self.worker.error.connect(self.analysis_error)
         self.worker.progress.connect(self.update_progress)
@@ -253,10 +383,26 @@ class MainWindow(QMainWindow):
     def update_status(self, message):
         self.status_label.setText(message)
 
+    def update_metrics(self, report):
+        self.timing_text.setPlainText(format_report(report))
+
+    def add_records(self, records):
+        self.received_records += len(records)
+        self.status_label.setText(f"Analyzing... {self.received_records} results so far")
+        for post in records:
+            sentiment = "Positive" if post["sentiment"] == 1 else "Negative" if post["sentiment"] == -1 else "Neutral"
+            sentiment_color = "#4CAF50" if sentiment == "Positive" else "#f44336" if sentiment == "Negative" else "#666666"
+            self.results_text.append(
+                f'<span style="color: {sentiment_color}">[{sentiment} {post["compound"]:.3f}]</span> {post["title"]}'
+            )
+
     def analysis_complete(self, data):
         self.analysis_data = data
+        self.update_resume_option()
         self.progress_bar.setVisible(False)
         self.status_label.setText("Analysis complete!")
+        if self.worker.profile_path:
+            self.status_label.setText(f"Analysis complete! Profile written to {self.worker.profile_path}")
         self.analyze_button.setEnabled(True)
         self.export_button.setEnabled(True)
         
@@ -275,9 +421,10 @@ class MainWindow(QMainWindow):
         self.results_text.append(f"Analysis complete! Found {len(data)} posts.\n\n")
         
         # Calculate and display statistics
-        positive = sum(1 for post in data if post["sentiment"] == 1)
-        negative = sum(1 for post in data if post["sentiment"] == -1)
-        neutral = sum(1 for post in data if post["sentiment"] == 0)
+        summary = data.summary("sentiment", "compound")
+        positive = summary["positive"]
+        negative = summary["negative"]
+        neutral = summary["neutral"]
         
         self.results_text.append("Sentiment Distribution:")
         self.results_text.append(f"Positive: {positive} ({positive/len(data)*100:.1f}%)")
@@ -296,6 +443,7 @@ class MainWindow(QMainWindow):
             self.results_text.append("-" * 50)
 
     def analysis_error(self, error_msg):
+        self.update_resume_option()
         self.progress_bar.setVisible(False)
         self.analyze_button.setEnabled(True)
         QMessageBox.critical(self, "Error", f"Analysis failed: {error_msg}")
@@ -308,13 +456,16 @@ class MainWindow(QMainWindow):
             self,
             "Save Results",
             "",
-            "CSV Files (*.csv)"
+            "CSV Files (*.csv);;Parquet Files (*.parquet)"
         )
         
         if filename:
             try:
-                df = pd.DataFrame(self.analysis_data)
-                df.to_csv(filename, index=False)
+                # Written straight from the result columns; Parquet needs pyarrow
+                if filename.lower().endswith(".parquet"):
+                    self.analysis_data.to_parquet(filename)
+                else:
+                    self.analysis_data.to_csv(filename)
                 QMessageBox.information(self, "Success", "Results exported successfully!")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to export results: {str(e)}")
@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+
+
+def comments_signature(comments, *settings):
+    """
+    Fingerprints a post's ranked comments: their ids, scores and edit
+    timestamps, plus any settings that affect which comment is selected.
+    """
+    digest = hashlib.sha1(repr(settings).encode("utf-8"))
+    for comment in comments:
+        digest.update(f"{comment.id}:{comment.score}:{comment.edited or 0}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class RefreshState:
+    """
+    High-water marks of earlier runs, kept in a JSON file so that hourly
+    reruns only redo the work for posts and comments that changed.
+
+    For every subreddit and post it remembers the signature of the ranked
+    comments, the selected output record, and the preprocessed text and
+    VADER scores of each comment that was scored, with its edit timestamp.
+
+    Args:
+        path (str): JSON file holding the state
+    """
+
+    def __init__(self, path="refresh_state.json"):
+        self.path = path
+        self.subreddits = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.subreddits = json.load(f)
+        self.start_run()
+
+    def start_run(self):
+        """
+        Resets the counters reported by summary(), which cover one run.
+        """
+        self.reused_posts = 0
+        self.reranked_posts = 0
+        self.rescored_comments = 0
+        self.reused_comments = 0
+
+    def post_state(self, subreddit, post_id):
+        """
+        Returns the mutable state dict of one post, creating it if needed.
+        """
+        posts = self.subreddits.setdefault(subreddit.lower(), {})
+        return posts.setdefault(post_id, {})
+
+    def save(self):
+        """
+        Writes the state to disk atomically.
+        """
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.subreddits, f)
+        os.replace(temp_path, self.path)
+
+    def summary(self):
+        return {
+            "reused_posts": self.reused_posts,
+            "reranked_posts": self.reranked_posts,
+            "rescored_comments": self.rescored_comments,
+            "reused_comments": self.reused_comments,
+        }
@@ -0,0 +1,267 @@
+import cProfile
+import io
+import json
+import math
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+# Latencies are counted in logarithmic buckets, BUCKETS_PER_DOUBLING per
+# power of two (about 2% wide), so every histogram uses constant memory
+# however many events a run records, and percentiles are accurate to a bucket.
+BUCKETS_PER_DOUBLING = 32
+
+# Profilers accepted by profiled()
+PROFILERS = ("cprofile", "pyinstrument")
+
+
+class _StageTimer:
+    __slots__ = ("metrics", "stage", "items", "start")
+
+    def __init__(self, metrics, stage, items):
+        self.metrics = metrics
+        self.stage = stage
+        self.items = items
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.stage, time.perf_counter() - self.start, self.items)
+
+
+class _NoTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NO_TIMER = _NoTimer()
+
+
+class RunMetrics:
+    """
+    Per-run counters and per-stage latency histograms.
+
+    Stages are timed with `with metrics.time("stage"):` or recorded directly
+    with record(). Each stage keeps its number of calls, the number of items
+    they covered (comments in a batch, for example), the total time, the
+    slowest call and a logarithmic histogram of call latencies. Recording is
+    thread-safe, and snapshots from other processes can be merged in.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.counters = {}
+        # stage -> [calls, items, total seconds, max seconds, {bucket: calls}]
+        self.stages = {}
+        self.lock = threading.Lock()
+
+    def time(self, stage, items=1):
+        """
+        Returns a context manager that records the time spent in its body.
+        """
+        return _StageTimer(self, stage, items)
+
+    def record(self, stage, seconds, items=1):
+        bucket = math.floor(math.log2(seconds) * BUCKETS_PER_DOUBLING) if seconds > 0 else None
+        with self.lock:
+            stats = self.stages.get(stage)
+            if stats is None:
+                stats = self.stages[stage] = [0, 0, 0.0, 0.0, {}]
+            stats[0] += 1
+            stats[1] += items
+            stats[2] += seconds
+            if seconds > stats[3]:
+                stats[3] = seconds
+            stats[4][bucket] = stats[4].get(bucket, 0) + 1
+
+    def count(self, counter, n=1):
+        with self.lock:
+            self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def finish(self):
+        """
+        Stops the run's wall clock.
+        """
+        self.finished = time.perf_counter()
+
+    def snapshot(self):
+        """
+        Returns the raw counters and histograms as plain picklable data.
+        """
+        with self.lock:
+            return {
+                "counters": dict(self.counters),
+                "stages": {stage: [calls, items, total, slowest, dict(buckets)]
+                           for stage, (calls, items, total, slowest, buckets) in self.stages.items()},
+            }
+
+    def merge(self, snapshot):
+        """
+        Adds a snapshot taken in another thread or process to this run.
+        """
+        with self.lock:
+            for counter, n in snapshot["counters"].items():
+                self.counters[counter] = self.counters.get(counter, 0) + n
+            for stage, (calls, items, total, slowest, buckets) in snapshot["stages"].items():
+                stats = self.stages.get(stage)
+                if stats is None:
+                    stats = self.stages[stage] = [0, 0, 0.0, 0.0, {}]
+                stats[0] += calls
+                stats[1] += items
+                stats[2] += total
+                stats[3] = max(stats[3], slowest)
+                for bucket, n in buckets.items():
+                    stats[4][bucket] = stats[4].get(bucket, 0) + n
+
+    def report(self):
+        """
+        Returns the run report: wall time, counters, and per stage the
+        number of calls and items, total time, mean, p50/p95/p99 and max
+        call latency. Latencies are in milliseconds.
+        """
+        snapshot = self.snapshot()
+        end = self.finished if self.finished is not None else time.perf_counter()
+        stages = {}
+        for stage, (calls, items, total, slowest, buckets) in snapshot["stages"].items():
+            stages[stage] = {
+                "calls": calls,
+                "items": items,
+                "total_seconds": total,
+                "mean_ms": total / calls * 1000,
+                "p50_ms": _percentile(buckets, calls, 0.50, slowest) * 1000,
+                "p95_ms": _percentile(buckets, calls, 0.95, slowest) * 1000,
+                "p99_ms": _percentile(buckets, calls, 0.99, slowest) * 1000,
+                "max_ms": slowest * 1000,
+            }
+        return {"wall_seconds": end - self.started, "counters": snapshot["counters"], "stages": stages}
+
+
+def _percentile(buckets, calls, fraction, slowest):
+    # Upper edge of the bucket holding the requested rank, capped at the maximum
+    rank = max(1, math.ceil(calls * fraction))
+    seen = 0
+    for bucket in sorted(buckets, key=lambda b: -math.inf if b is None else b):
+        seen += buckets[bucket]
+        if seen >= rank:
+            if bucket is None:
+                return 0.0
+            return min(2 ** ((bucket + 1) / BUCKETS_PER_DOUBLING), slowest)
+    return slowest
+
+
+def timed(metrics, stage, items=1):
+    """
+    Returns metrics.time(stage, items), or a no-op context manager when
+    metrics is None.
+    """
+    if metrics is None:
+        return _NO_TIMER
+    return _StageTimer(metrics, stage, items)
+
+
+def timed_iter(metrics, stage, iterable):
+    """
+    Yields the items of iterable, recording the time spent producing each
+    one under stage. Returns iterable unchanged when metrics is None.
+    """
+    if metrics is None:
+        return iterable
+    return _timed_iter(metrics, stage, iterable)
+
+
+def _timed_iter(metrics, stage, iterable):
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        metrics.record(stage, time.perf_counter() - start)
+        yield item
+
+
+def format_report(report):
+    """
+    Formats a run report as a text table.
+    """
+    lines = [f"Run time: {report['wall_seconds']:.2f}s"]
+    if report["stages"]:
+        lines.append(f"{'stage':<16}{'calls':>8}{'items':>8}{'total s':>10}"
+                     f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for stage, stats in sorted(report["stages"].items(), key=lambda item: -item[1]["total_seconds"]):
+            lines.append(f"{stage:<16}{stats['calls']:>8}{stats['items']:>8}{stats['total_seconds']:>10.3f}"
+                         f"{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}"
+                         f"{stats['max_ms']:>10.3f}")
+    if report["counters"]:
+        lines.append(", ".join(f"{counter}: {n}" for counter, n in sorted(report["counters"].items())))
+    return "\n".join(lines)
+
+
+def save_report(report, path):
+    """
+    Writes a run report as JSON.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+@contextmanager
+def profiled(profiler=None, output=None):
+    """
+    Profiles the body of the with block.
+
+    Only the calling thread is profiled, so comment trees fetched by worker
+    threads or scored in the process pool only show up as waiting time.
+
+    Args:
+        profiler (str, optional): "cprofile" or "pyinstrument"; None disables profiling
+        output (str, optional): File for the profile: pstats data for
+            cProfile, HTML for pyinstrument. Without it, a summary is printed.
+    """
+    if profiler is None:
+        yield
+        return
+
+    if profiler == "cprofile":
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            if output:
+                profile.dump_stats(output)
+                print(f"cProfile data written to {output}")
+            else:
+                stream = io.StringIO()
+                pstats.Stats(profile, stream=stream).sort_stats("cumulative").print_stats(25)
+                print(stream.getvalue())
+    elif profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise RuntimeError("pyinstrument is not installed. Install it with: pip install pyinstrument")
+        session = Profiler()
+        session.start()
+        try:
+            yield
+        finally:
+            session.stop()
+            if output:
+                with open(output, "w", encoding="utf-8") as f:
+                    f.write(session.output_html())
+                print(f"pyinstrument report written to {output}")
+            else:
+                print(session.output_text(unicode=True))
+    else:
+        raise ValueError(f"Unknown profiler {profiler!r}, expected one of {PROFILERS}")
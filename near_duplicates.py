@@ -0,0 +1,360 @@
+import numpy as np
+
+# Near-duplicate detection with MinHash and locality-sensitive hashing.
+#
+# Large threads are full of lightly edited repeats: "came here to say this"
+# variants, quoted replies, copypasta with a word changed. Exact hashing (the
+# ScoreCache) misses them. This stage sits between preprocess_text and
+# scoring: every preprocessed comment gets a MinHash signature of its
+# character shingles, and comments whose signatures agree on enough values
+# (an estimate of their shingle Jaccard similarity) join one cluster. Only
+# the first comment of a cluster, its representative, is scored; the others
+# reuse its scores, and the cluster sizes are kept.
+#
+# Finding candidates is sublinear: the signature is cut into bands, each band
+# is hashed (with its band number) to a key, and the keys are looked up in a
+# hash table of representatives, so a comment is only compared with the few
+# representatives sharing a band with it. The table and signatures are numpy
+# arrays (open addressing, 32-bit keys, 16 bits kept per signature value for
+# the comparison) rather than dicts of Python objects, so a run over millions
+# of comments stays within a few hundred MB.
+#
+# Signatures use one-permutation hashing: every shingle is hashed once, the
+# top bits of the hash pick one of num_perm bins and each bin keeps its lowest
+# value, instead of hashing every shingle num_perm times. Two texts agree on
+# a bin with probability close to their Jaccard similarity, as with classic
+# MinHash. Bins left empty by short texts borrow the value of the next filled
+# bin ("densification"). Signatures are computed for a whole batch of texts at
+# once.
+
+_MIX = np.uint64(0xBF58476D1CE4E5B9)
+_EMPTY = np.uint64(1 << 32)
+_LOW32 = np.uint64(0xFFFFFFFF)
+
+
+def _mix(values):
+    # Finalizer spreading the bits of 64-bit hashes (from splitmix64)
+    values = values ^ (values >> np.uint64(31))
+    values = values * _MIX
+    return values ^ (values >> np.uint64(29))
+
+
+class _BandTable:
+    # Open-addressing hash table from 32-bit band keys to representative
+    # ids, with batch lookups and inserts; key 0 marks an empty slot
+
+    def __init__(self, capacity=1024):
+        self.keys = np.zeros(capacity, dtype=np.uint32)
+        self.values = np.zeros(capacity, dtype=np.int32)
+        self.size = 0
+
+    def lookup(self, keys):
+        """
+        Returns the value stored for every key, or -1.
+        """
+        mask = len(self.keys) - 1
+        result = np.full(len(keys), -1, dtype=np.int32)
+        slots = keys & np.uint32(mask)
+        active = np.arange(len(keys))
+        while active.size:
+            found = self.keys[slots]
+            hit = found == keys[active]
+            result[active[hit]] = self.values[slots[hit]]
+            probing = ~hit & (found != 0)
+            active = active[probing]
+            slots = (slots[probing] + np.uint32(1)) & np.uint32(mask)
+        return result
+
+    def insert(self, keys, values):
+        """
+        Stores values under keys that are not in the table yet; keys already
+        present keep their value. The keys must be distinct.
+        """
+        if (self.size + len(keys)) * 10 > len(self.keys) * 7:
+            self._grow(self.size + len(keys))
+        mask = np.uint32(len(self.keys) - 1)
+        slots = keys & mask
+        active = np.arange(len(keys))
+        while active.size:
+            empty = self.keys[slots] == 0
+            # Of several keys probing the same empty slot, one takes it; the
+            # others find it taken when reading back and move on
+            self.keys[slots[empty]] = keys[active[empty]]
+            done = self.keys[slots] == keys[active]
+            taken = done & empty
+            self.values[slots[taken]] = values[active[taken]]
+            self.size += int(np.count_nonzero(taken))
+            active = active[~done]
+            slots = (slots[~done] + np.uint32(1)) & mask
+
+    def _grow(self, needed):
+        capacity = len(self.keys)
+        while needed * 10 > capacity * 7:
+            capacity *= 2
+        occupied = self.keys != 0
+        keys, values = self.keys[occupied], self.values[occupied]
+        self.keys = np.zeros(capacity, dtype=np.uint32)
+        self.values = np.zeros(capacity, dtype=np.int32)
+        self.size = 0
+        self.insert(keys, values)
+
+    @property
+    def nbytes(self):
+        return self.keys.nbytes + self.values.nbytes
+
+
+class _Rows:
+    # Growable 2-D numpy array, appended to in batches
+
+    def __init__(self, width, dtype):
+        self.data = np.zeros((1024, width) if width else 1024, dtype=dtype)
+        self.size = 0
+
+    def resize(self, size):
+        # New rows are zeros
+        if size > len(self.data):
+            capacity = len(self.data)
+            while capacity < size:
+                capacity *= 2
+            data = np.zeros((capacity,) + self.data.shape[1:], dtype=self.data.dtype)
+            data[:self.size] = self.data[:self.size]
+            self.data = data
+        self.size = size
+
+    def extend(self, rows):
+        start = self.size
+        self.resize(start + len(rows))
+        self.data[start:self.size] = rows
+
+    def view(self):
+        return self.data[:self.size]
+
+
+class ClusterScores:
+    """
+    VADER scores (neg, neu, pos, compound) of each cluster's representative,
+    in numpy columns indexed by cluster id.
+    """
+
+    FIELDS = ("neg", "neu", "pos", "compound")
+
+    def __init__(self):
+        self.rows = _Rows(len(self.FIELDS), np.float64)
+        self.known = _Rows(0, bool)
+
+    def put(self, cluster, scores):
+        if cluster >= self.rows.size:
+            self.rows.resize(cluster + 1)
+            self.known.resize(cluster + 1)
+        self.rows.data[cluster] = (scores["neg"], scores["neu"], scores["pos"], scores["compound"])
+        self.known.data[cluster] = True
+
+    def get(self, cluster):
+        """
+        Returns the scores of a cluster as a dict, or None if its
+        representative has not been scored yet.
+        """
+        if cluster >= self.rows.size or not self.known.data[cluster]:
+            return None
+        return dict(zip(self.FIELDS, self.rows.data[cluster].tolist()))
+
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index of the comments seen in a run, clustering near-duplicates.
+
+    Args:
+        threshold (float): Estimated Jaccard similarity of the shingles from
+            which a comment joins a cluster
+        num_perm (int): MinHash values per signature
+        bands (int): LSH bands; num_perm must be a multiple of it. More bands
+            find more candidates below the threshold, at the cost of memory
+        shingle_size (int): UTF-8 bytes per shingle, at most 8
+        batch_size (int): Texts hashed together, bounding the temporary arrays
+        seed (int): Seed of the MinHash permutations
+    """
+
+    def __init__(self, threshold=0.8, num_perm=32, bands=8, shingle_size=5, batch_size=1024, seed=1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        if not 1 <= shingle_size <= 8:
+            raise ValueError(f"shingle_size must be between 1 and 8, got {shingle_size}")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.batch_size = batch_size
+        rng = np.random.default_rng(seed)
+        self.salt = rng.integers(1, 2 ** 63, dtype=np.uint64)
+        self.densify_step = rng.integers(1, 2 ** 32, dtype=np.uint64)
+        self.band_weights = rng.integers(1, 2 ** 63, (self.rows, 1), dtype=np.uint64) | np.uint64(1)
+        self.shingle_mask = np.uint64((1 << 8 * shingle_size) - 1)
+        self.table = _BandTable()
+        # 16 bits of each representative's signature, for verifying candidates
+        self.signatures = _Rows(num_perm, np.uint16)
+        self.sizes = _Rows(0, np.int64)
+        self.scores = ClusterScores()
+        self.comments = 0
+
+    def signatures_of(self, texts):
+        """
+        Returns the MinHash signatures of non-empty texts, one row each.
+        """
+        k = self.shingle_size
+        encoded = [text.encode("utf-8", "surrogatepass") for text in texts]
+        lengths = np.array([len(data) for data in encoded], dtype=np.int64)
+        # Every text is followed by k - 1 zero bytes, so shorter texts still
+        # make one shingle and no shingle spans two texts. A shingle is read
+        # as one little-endian word starting at its first byte
+        data = bytes(k - 1).join(encoded) + bytes(k - 1 + 8)
+        words = np.ndarray((len(data) - 7,), dtype="<u8", buffer=data, strides=(1,))
+        starts = np.concatenate(([0], np.cumsum(lengths + k - 1)[:-1]))
+        counts = np.maximum(lengths - k + 1, 1)
+        first = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        positions = np.repeat(starts - first, counts) + np.arange(counts.sum())
+
+        hashed = _mix(_mix(words[positions] & self.shingle_mask) ^ self.salt)
+
+        # The lowest value of every (text, bin) is the first of its group once
+        # the (text, bin, value) triples are sorted
+        bins = ((hashed >> np.uint64(32)) * np.uint64(self.num_perm)) >> np.uint64(32)
+        groups = np.repeat(np.arange(len(texts), dtype=np.uint64) * np.uint64(self.num_perm), counts) + bins
+        keyed = np.sort((groups << np.uint64(32)) | (hashed & _LOW32))
+        group_starts = np.flatnonzero(np.diff(keyed >> np.uint64(32))) + 1
+        lowest = keyed[np.concatenate(([0], group_starts))]
+        signatures = np.full(len(texts) * self.num_perm, _EMPTY, dtype=np.uint64)
+        signatures[(lowest >> np.uint64(32)).astype(np.int64)] = lowest & _LOW32
+        signatures = signatures.reshape(len(texts), self.num_perm)
+
+        # An empty bin takes the value of the closest filled bin to its
+        # right, shifted by the distance so that borrowed values differ
+        sparse = np.flatnonzero((signatures == _EMPTY).any(axis=1))
+        if sparse.size:
+            original = signatures[sparse]
+            filled = original.copy()
+            empty = original == _EMPTY
+            step = 1
+            while empty.any():
+                borrowed = np.roll(original, -step, axis=1)
+                take = empty & (borrowed != _EMPTY)
+                filled[take] = (borrowed[take] + np.uint64(step) * self.densify_step) & _LOW32
+                empty &= ~take
+                step += 1
+            signatures[sparse] = filled
+        return signatures.astype(np.uint32)
+
+    def _band_keys(self, signatures):
+        keys = np.empty((len(signatures), self.bands), dtype=np.uint32)
+        for band in range(self.bands):
+            values = signatures[:, band * self.rows:(band + 1) * self.rows].astype(np.uint64)
+            combined = _mix((values @ self.band_weights)[:, 0] + np.uint64(band))
+            keys[:, band] = (combined >> np.uint64(32)).astype(np.uint32)
+        keys[keys == 0] = 1
+        return keys
+
+    def assign(self, texts):
+        """
+        Puts preprocessed texts into clusters, in order.
+
+        Returns:
+            tuple: (clusters, new): the cluster id of every text (None for
+            empty texts), and whether the text started its cluster and is
+            therefore its representative
+        """
+        clusters = [None] * len(texts)
+        new = [False] * len(texts)
+        for start in range(0, len(texts), self.batch_size):
+            batch = [(i, text) for i, text in enumerate(texts[start:start + self.batch_size], start) if text]
+            if batch:
+                self._assign_batch(batch, clusters, new)
+        return clusters, new
+
+    def _assign_batch(self, batch, clusters, new):
+        signatures = self.signatures_of([text for _, text in batch])
+        short = signatures.astype(np.uint16)
+        keys = self._band_keys(signatures)
+        rows = np.arange(len(batch))
+        min_matches = self.threshold * self.num_perm
+
+        # Representatives from earlier batches sharing a band with each text,
+        # all verified at once; the closest one above the threshold wins
+        earlier = self.table.lookup(keys.ravel()).reshape(keys.shape)
+        known = self.signatures.view()
+        if len(known):
+            matches = (known[np.maximum(earlier, 0)] == short[:, None, :]).sum(axis=2)
+            matches[earlier < 0] = -1
+            best_band = matches.argmax(axis=1)
+            prior = np.where(matches[rows, best_band] >= min_matches, earlier[rows, best_band], -1)
+        else:
+            prior = np.full(len(batch), -1)
+
+        # The first text of this batch sharing a band with each text
+        _, first, inverse = np.unique(keys.ravel(), return_index=True, return_inverse=True)
+        within = (first // self.bands)[np.ravel(inverse)].reshape(keys.shape)
+        has_within = (within < rows[:, None]).any(axis=1)
+
+        next_cluster = len(self.sizes.view())
+        batch_clusters = []
+        new_rows = []
+        within = within.tolist()
+        for row, (index, _), cluster, check_within in zip(rows.tolist(), batch, prior.tolist(), has_within.tolist()):
+            if cluster < 0 and check_within:
+                # Texts earlier in the batch are clustered by now; compare with
+                # the representatives of their clusters
+                candidates = list({batch_clusters[other] for other in within[row] if other < row})
+                representatives = [known[candidate] if candidate < next_cluster
+                                   else short[new_rows[candidate - next_cluster]] for candidate in candidates]
+                matches = (np.array(representatives) == short[row]).sum(axis=1)
+                best = matches.argmax()
+                if matches[best] >= min_matches:
+                    cluster = candidates[best]
+            if cluster < 0:
+                cluster = next_cluster + len(new_rows)
+                new_rows.append(row)
+                new[index] = True
+            batch_clusters.append(cluster)
+            clusters[index] = cluster
+
+        self.comments += len(batch)
+        if new_rows:
+            new_rows = np.array(new_rows)
+            self.signatures.extend(short[new_rows])
+            self.sizes.resize(self.sizes.size + len(new_rows))
+            ids = np.arange(next_cluster, next_cluster + len(new_rows), dtype=np.int32)
+            # Buckets keep their first representative
+            band_keys, first = np.unique(keys[new_rows].ravel(), return_index=True)
+            self.table.insert(band_keys, ids[first // self.bands])
+        sizes = self.sizes.view()
+        sizes += np.bincount(batch_clusters, minlength=len(sizes))
+
+    def __len__(self):
+        return self.sizes.size
+
+    @property
+    def nbytes(self):
+        """
+        Memory held by the index's arrays.
+        """
+        return (self.table.nbytes + self.signatures.data.nbytes + self.sizes.data.nbytes
+                + self.scores.rows.data.nbytes + self.scores.known.data.nbytes)
+
+    def stats(self, largest=5):
+        sizes = self.sizes.view()
+        return {
+            "comments": self.comments,
+            "clusters": len(sizes),
+            "duplicates": self.comments - len(sizes),
+            "clusters_with_duplicates": int(np.count_nonzero(sizes > 1)),
+            "largest_clusters": np.sort(sizes)[::-1][:largest].tolist(),
+        }
+
+    def format_stats(self):
+        """
+        Returns the one-line summary printed at the end of a run.
+        """
+        stats = self.stats()
+        share = stats["duplicates"] / stats["comments"] if stats["comments"] else 0.0
+        return (f"Near-duplicates: {stats['duplicates']} of {stats['comments']} comments ({share:.1%}) reused the "
+                f"scores of {stats['clusters_with_duplicates']} clusters; largest cluster sizes "
+                f"{stats['largest_clusters']}")
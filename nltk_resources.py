@@ -0,0 +1,124 @@
+import threading
+from functools import lru_cache
+
+# NLTK data resources used by the analyzers: resource path -> download package
+STOPWORDS_RESOURCE = ('corpora/stopwords', 'stopwords')
+VADER_LEXICON_RESOURCE = ('sentiment/vader_lexicon.zip', 'vader_lexicon')
+
+
+class ResourceUnavailableError(LookupError):
+    """Raised when an NLTK resource is missing and could not be downloaded."""
+
+
+_lock = threading.Lock()
+# resource path -> None when available, or the error raised when it was not
+_resolved = {}
+
+
+def ensure_resource(resource, allow_download=True):
+    """
+    Makes sure an NLTK data resource is available, downloading it at most once.
+
+    The outcome is remembered for the life of the process: later calls return
+    immediately, and a resource that could not be found or downloaded raises
+    straight away instead of hitting the filesystem or network again.
+
+    Args:
+        resource (tuple): (resource path, download package name)
+        allow_download (bool): Whether to try nltk.download when missing
+
+    Raises:
+        ResourceUnavailableError: If the resource is not available
+    """
+    path, package = resource
+    with _lock:
+        if path not in _resolved:
+            _resolved[path] = _resolve(path, package, allow_download)
+        error = _resolved[path]
+    if error is not None:
+        raise error
+
+
+def _resolve(path, package, allow_download):
+    # nltk is slow to import, so it is only loaded once a resource is needed
+    import nltk
+
+    try:
+        nltk.data.find(path)
+        return None
+    except LookupError:
+        pass
+
+    if allow_download:
+        try:
+            nltk.download(package, quiet=True, raise_on_error=True)
+            nltk.data.find(path)
+            return None
+        except Exception as e:
+            return ResourceUnavailableError(f"NLTK resource '{package}' could not be downloaded: {e}")
+
+    return ResourceUnavailableError(f"NLTK resource '{package}' is not installed")
+
+
+@lru_cache(maxsize=None)
+def _load_stopwords(language, extra_words, keep_words):
+    import nltk
+
+    ensure_resource(STOPWORDS_RESOURCE)
+    words = {word.lower() for word in nltk.corpus.stopwords.words(language)}
+    words.update(extra_words)
+    words.difference_update(keep_words)
+    return frozenset(words)
+
+
+def get_stopwords(language='english', extra_words=(), keep_words=()):
+    """
+    Returns a frozen stopword set, built once per distinct configuration.
+
+    Args:
+        language (str): NLTK stopword list to start from
+        extra_words (iterable): Additional words to treat as stopwords
+        keep_words (iterable): Words to remove from the stopword list
+
+    Raises:
+        ResourceUnavailableError: If the stopwords corpus is not available
+    """
+    return _load_stopwords(
+        language,
+        frozenset(word.lower() for word in extra_words),
+        frozenset(word.lower() for word in keep_words)
+    )
+
+
+@lru_cache(maxsize=32)
+def _normalize_frozen(stop_words):
+    return frozenset(word.lower() for word in stop_words)
+
+
+def normalize_stopwords(stop_words=None):
+    """
+    Returns stopwords as a lowercase frozenset, whatever collection they come
+    in, or the NLTK English list when stop_words is None. Frozensets, such as
+    the ones get_stopwords returns, are normalized once and cached; other
+    collections are normalized on every call.
+
+    Raises:
+        ResourceUnavailableError: If the default list is needed and the
+            stopwords corpus is not available
+    """
+    if stop_words is None:
+        return get_stopwords()
+    if isinstance(stop_words, frozenset):
+        return _normalize_frozen(stop_words)
+    return frozenset(word.lower() for word in stop_words)
+
+
+def remove_stopwords(text, stop_words):
+    """
+    Drops every whitespace-separated word of text that is in stop_words.
+
+    Args:
+        text (str): Lowercased input text
+        stop_words (set or frozenset): Words to drop
+    """
+    return ' '.join([word for word in text.split() if word not in stop_words])
@@ -0,0 +1,243 @@
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+# Plain stand-ins for the praw objects read by the analysis pipeline, so that
+# cached data can be analyzed without talking to Reddit.
+CachedAuthor = namedtuple("CachedAuthor", ["name"])
+CachedPost = namedtuple("CachedPost", ["id", "title", "permalink", "score", "stickied", "num_comments",
+                                       "created_utc"])
+CachedComment = namedtuple("CachedComment", ["id", "body", "score", "author", "created_utc", "edited"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    subreddit TEXT NOT NULL,
+    post_limit INTEGER NOT NULL,
+    post_ids TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (subreddit, post_limit)
+);
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    permalink TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    stickied INTEGER NOT NULL,
+    num_comments INTEGER,
+    created_utc REAL,
+    fetched_at REAL NOT NULL,
+    comments_fetched_at REAL
+);
+CREATE TABLE IF NOT EXISTS comments (
+    id TEXT PRIMARY KEY,
+    post_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    body TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    author TEXT,
+    created_utc REAL,
+    edited REAL,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS comments_post ON comments (post_id, position);
+CREATE INDEX IF NOT EXISTS posts_comments_fetched ON posts (comments_fetched_at);
+"""
+
+
+def to_cached_post(post):
+    """
+    Copies the fields the pipeline uses from a praw Submission.
+    """
+    return CachedPost(
+        id=post.id,
+        title=post.title,
+        permalink=post.permalink,
+        score=post.score,
+        stickied=bool(post.stickied),
+        num_comments=getattr(post, "num_comments", None),
+        created_utc=getattr(post, "created_utc", None),
+    )
+
+
+def to_cached_comment(comment):
+    """
+    Copies the fields the pipeline uses from a praw Comment.
+    """
+    return CachedComment(
+        id=comment.id,
+        body=comment.body,
+        score=comment.score,
+        author=CachedAuthor(comment.author.name) if comment.author else None,
+        created_utc=getattr(comment, "created_utc", None),
+        edited=getattr(comment, "edited", False) or False,
+    )
+
+
+class PostCache:
+    """
+    SQLite-backed cache of subreddit top listings and comment trees.
+
+    Entries older than ttl seconds count as misses. When more than
+    max_entries comment trees are stored, the least recently fetched ones
+    are evicted together with their comments.
+
+    Args:
+        path (str): SQLite database file, or ":memory:"
+        ttl (float): Seconds an entry stays fresh
+        max_entries (int): Maximum number of cached comment trees
+    """
+
+    def __init__(self, path="reddit_cache.sqlite3", ttl=24 * 3600, max_entries=20000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = {"listings": 0, "comment_trees": 0}
+        self.misses = {"listings": 0, "comment_trees": 0}
+        self.lock = threading.Lock()
+        # Comment trees may be fetched from several threads at once
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def _fresh(self, fetched_at):
+        return fetched_at is not None and time.time() - fetched_at <= self.ttl
+
+    def get_listing(self, subreddit, limit):
+        """
+        Returns the cached top listing as a list of CachedPost, or None on a miss.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT post_ids, fetched_at FROM listings WHERE subreddit = ? AND post_limit = ?",
+                (subreddit.lower(), limit)
+            ).fetchone()
+            posts = None
+            if row and self._fresh(row[1]):
+                post_ids = row[0].split(",") if row[0] else []
+                found = {
+                    post.id: post for post in map(CachedPost._make, self.connection.execute(
+                        f"SELECT id, title, permalink, score, stickied, num_comments, created_utc "
+                        f"FROM posts WHERE id IN ({','.join('?' * len(post_ids))})", post_ids
+                    ))
+                }
+                if len(found) == len(post_ids):
+                    posts = [found[post_id]._replace(stickied=bool(found[post_id].stickied))
+                             for post_id in post_ids]
+            self._count("listings", posts is not None)
+            return posts
+
+    def put_listing(self, subreddit, limit, posts):
+        """
+        Stores a top listing and its posts.
+        """
+        now = time.time()
+        posts = [post if isinstance(post, CachedPost) else to_cached_post(post) for post in posts]
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT INTO posts (id, title, permalink, score, stickied, num_comments, created_utc, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET title = excluded.title, permalink = excluded.permalink, "
+                "score = excluded.score, stickied = excluded.stickied, num_comments = excluded.num_comments, "
+                "fetched_at = excluded.fetched_at",
+                [(post.id, post.title, post.permalink, post.score, int(post.stickied), post.num_comments,
+                  post.created_utc, now) for post in posts]
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO listings (subreddit, post_limit, post_ids, fetched_at) VALUES (?, ?, ?, ?)",
+                (subreddit.lower(), limit, ",".join(post.id for post in posts), now)
+            )
+
+    def get_comments(self, post_id):
+        """
+        Returns the cached comments of a post as a list of CachedComment in
+        their original order, or None on a miss.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT comments_fetched_at FROM posts WHERE id = ?", (post_id,)
+            ).fetchone()
+            comments = None
+            if row and self._fresh(row[0]):
+                comments = [
+                    CachedComment(id, body, score, CachedAuthor(author) if author else None, created_utc,
+                                  edited or False)
+                    for id, body, score, author, created_utc, edited in self.connection.execute(
+                        "SELECT id, body, score, author, created_utc, edited FROM comments "
+                        "WHERE post_id = ? ORDER BY position", (post_id,)
+                    )
+                ]
+            self._count("comment_trees", comments is not None)
+            return comments
+
+    def put_comments(self, post, comments):
+        """
+        Stores the comments of a post, replacing any older copy, and evicts
+        the oldest comment trees when the cache is over max_entries.
+        """
+        now = time.time()
+        cached_post = post if isinstance(post, CachedPost) else to_cached_post(post)
+        comments = [comment if isinstance(comment, CachedComment) else to_cached_comment(comment)
+                    for comment in comments]
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO posts (id, title, permalink, score, stickied, num_comments, created_utc, "
+                "fetched_at, comments_fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET comments_fetched_at = excluded.comments_fetched_at",
+                (cached_post.id, cached_post.title, cached_post.permalink, cached_post.score,
+                 int(cached_post.stickied), cached_post.num_comments, cached_post.created_utc, now, now)
+            )
+            self.connection.execute("DELETE FROM comments WHERE post_id = ?", (cached_post.id,))
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO comments (id, post_id, position, body, score, author, created_utc, "
+                "edited, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(comment.id, cached_post.id, position, comment.body, comment.score,
+                  comment.author.name if comment.author else None, comment.created_utc,
+                  float(comment.edited) if comment.edited else None, now)
+                 for position, comment in enumerate(comments)]
+            )
+            self._evict()
+        return comments
+
+    def _evict(self):
+        count = self.connection.execute(
+            "SELECT COUNT(*) FROM posts WHERE comments_fetched_at IS NOT NULL"
+        ).fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        stale = [row[0] for row in self.connection.execute(
+            "SELECT id FROM posts WHERE comments_fetched_at IS NOT NULL "
+            "ORDER BY comments_fetched_at LIMIT ?", (excess,)
+        )]
+        placeholders = ",".join("?" * len(stale))
+        self.connection.execute(f"DELETE FROM comments WHERE post_id IN ({placeholders})", stale)
+        self.connection.execute(
+            f"UPDATE posts SET comments_fetched_at = NULL WHERE id IN ({placeholders})", stale
+        )
+
+    def _count(self, kind, hit):
+        if hit:
+            self.hits[kind] += 1
+        else:
+            self.misses[kind] += 1
+
+    def stats(self):
+        """
+        Returns hit/miss counts for this session and the cache's current size.
+        """
+        with self.lock:
+            entries = self.connection.execute(
+                "SELECT COUNT(*) FROM posts WHERE comments_fetched_at IS NOT NULL"
+            ).fetchone()[0]
+            comments = self.connection.execute("SELECT COUNT(*) FROM comments").fetchone()[0]
+        return {
+            "listing_hits": self.hits["listings"],
+            "listing_misses": self.misses["listings"],
+            "comment_tree_hits": self.hits["comment_trees"],
+            "comment_tree_misses": self.misses["comment_trees"],
+            "cached_comment_trees": entries,
+            "cached_comments": comments,
+        }
@@ -0,0 +1,265 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Reddit allows 100 requests per minute per OAuth client, averaged over a
+# ten minute window.
+REDDIT_REQUESTS_PER_MINUTE = 100
+
+# Every API response carries the state of the client's quota:
+#   X-Ratelimit-Used       requests made in the current window
+#   X-Ratelimit-Remaining  requests left in the current window
+#   X-Ratelimit-Reset      seconds until the window ends
+# The rate limiter follows them, so that the remaining quota is spread over
+# the rest of the window instead of assuming a fixed rate.
+
+# Lowest rate the limiter slows down to after repeated 429 responses
+MIN_REQUESTS_PER_MINUTE = 1
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket shared by every thread that talks to Reddit.
+
+    Args:
+        requests_per_minute (float): Sustained request rate
+        burst (int, optional): How many requests may start back to back after
+            an idle period. Defaults to one minute's worth of requests.
+    """
+
+    def __init__(self, requests_per_minute=REDDIT_REQUESTS_PER_MINUTE, burst=None):
+        self.rate = requests_per_minute / 60.0
+        self.base_rate = self.rate
+        self.capacity = burst if burst is not None else requests_per_minute
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens=1):
+        """
+        Blocks until tokens requests may be sent.
+        """
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait_seconds = self.paused_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= tokens:
+                        self.tokens -= tokens
+                        return
+                    wait_seconds = (tokens - self.tokens) / self.rate
+            time.sleep(wait_seconds)
+
+    def pause(self, seconds):
+        """
+        Holds back every request for the given number of seconds, e.g. after
+        a 429 response.
+        """
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def slow_down(self, factor=0.5):
+        """
+        Cuts the rate by factor, after the server refused a request. The
+        next rate-limit headers set it again.
+        """
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = max(self.rate * factor, MIN_REQUESTS_PER_MINUTE / 60.0)
+
+    def update_from_headers(self, headers):
+        """
+        Adjusts the bucket to a response's rate-limit headers: the remaining
+        requests are spread evenly over the rest of the window, and an
+        exhausted quota holds every request back until the window resets.
+        Responses without the headers are ignored.
+        """
+        headers = {name.lower(): value for name, value in headers.items()}
+        try:
+            remaining = float(headers["x-ratelimit-remaining"])
+            reset = float(headers["x-ratelimit-reset"])
+        except (KeyError, ValueError):
+            return
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens = min(self.tokens, remaining)
+            if remaining < 1:
+                # The next window's quota is unknown until its first response
+                self.paused_until = max(self.paused_until, now + reset)
+                self.tokens = 1.0
+                self.rate = self.base_rate
+            else:
+                self.rate = max(remaining / max(reset, 1.0), MIN_REQUESTS_PER_MINUTE / 60.0)
+
+
+class Backoff:
+    """
+    Adaptive exponential backoff for requests refused with a 429 or failed
+    with a 5xx, shared by every thread. The delay doubles with each failure
+    in a row, across all requests, and starts over after a success; a
+    Retry-After header takes precedence. Half the delay is randomized so
+    that retries from several threads do not line up.
+
+    Args:
+        base (float): Delay in seconds after the first failure
+        maximum (float): Longest delay in seconds
+        max_retries (int): Retries of one request before giving up
+    """
+
+    def __init__(self, base=1.0, maximum=60.0, max_retries=5):
+        self.base = base
+        self.maximum = maximum
+        self.max_retries = max_retries
+        self.failures = 0
+        self.retries = 0
+        self.throttled = 0
+        self.server_errors = 0
+        self.lock = threading.Lock()
+
+    def failed(self, throttled, retry_after=None):
+        """
+        Records a failure and returns the seconds to wait before retrying.
+        """
+        with self.lock:
+            self.failures += 1
+            self.retries += 1
+            if throttled:
+                self.throttled += 1
+            else:
+                self.server_errors += 1
+            delay = min(self.maximum, self.base * 2 ** (self.failures - 1))
+        if retry_after is not None:
+            return min(self.maximum, retry_after)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def succeeded(self):
+        with self.lock:
+            self.failures = 0
+
+    def summary(self):
+        return {"retries": self.retries, "throttled": self.throttled, "server_errors": self.server_errors}
+
+
+def retry_info(error):
+    """
+    Tells whether a failed request is worth retrying.
+
+    Returns:
+        tuple: (retryable, throttled, retry_after) where throttled is True for
+        429 responses and retry_after is the Retry-After header in seconds,
+        or None
+    """
+    from prawcore.exceptions import RequestException
+
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if status == 429:
+        retry_after = response.headers.get("retry-after")
+        try:
+            retry_after = float(retry_after) if retry_after is not None else None
+        except ValueError:
+            retry_after = None
+        return True, True, retry_after
+    if status is not None and status >= 500:
+        return True, False, None
+    # Connection errors and timeouts
+    return isinstance(error, RequestException), False, None
+
+
+def call_with_retries(call, rate_limiter=None, backoff=None):
+    """
+    Returns call(), retrying it when it fails with a 429, a 5xx or a
+    connection error. Throttled requests hold back the rate limiter (and so
+    every other thread) for the backoff delay and halve its rate.
+
+    Raises:
+        Exception: The last error, once backoff.max_retries retries failed or
+            for errors that are not worth retrying
+    """
+    backoff = backoff or Backoff()
+    attempt = 0
+    while True:
+        try:
+            result = call()
+        except Exception as e:
+            retryable, throttled, retry_after = retry_info(e)
+            if not retryable or attempt >= backoff.max_retries:
+                raise
+            delay = backoff.failed(throttled, retry_after)
+            if rate_limiter is not None:
+                rate_limiter.pause(delay)
+                if throttled:
+                    rate_limiter.slow_down()
+            else:
+                time.sleep(delay)
+            attempt += 1
+            continue
+        backoff.succeeded()
+        return result
+
+
+def create_session(pool_size=10, rate_limiter=None):
+    """
+    Creates an HTTP session whose connection pool keeps up to pool_size
+    connections per host, for use as praw.Reddit(requestor_kwargs={"session": ...}).
+    With a RateLimiter, every response's rate-limit headers are passed to it.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if rate_limiter is not None:
+        session.hooks["response"].append(lambda response, *args, **kwargs:
+                                         rate_limiter.update_from_headers(response.headers))
+    return session
+
+
+def fetch_concurrently(items, fetch, max_in_flight=8, rate_limiter=None):
+    """
+    Runs fetch(item) for every item on a thread pool, keeping at most
+    max_in_flight calls running, and yields results in input order.
+
+    Args:
+        items (iterable): Items to fetch, consumed lazily
+        fetch (callable): Blocking fetch function taking one item
+        max_in_flight (int): Maximum number of concurrent fetches
+        rate_limiter (RateLimiter, optional): Acquired before each fetch
+
+    Yields:
+        tuple: (item, result, error) where error is the exception raised by
+        fetch, or None
+    """
+    def run(item):
+        if rate_limiter:
+            rate_limiter.acquire()
+        return fetch(item)
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        window = deque()
+        for item in items:
+            window.append((item, pool.submit(run, item)))
+            if len(window) >= max_in_flight:
+                yield _result(*window.popleft())
+        while window:
+            yield _result(*window.popleft())
+
+
+def _result(item, future):
+    try:
+        return item, future.result(), None
+    except Exception as e:
+        return item, None, e
@@ -0,0 +1,385 @@
+import csv
+import numbers
+
+import numpy as np
+
+# Columnar container for result records.
+#
+# Runs used to keep their results as a list of dicts, about a kilobyte per
+# record once the dict, its keys and the boxed numbers are counted. Here each
+# field is one column: numbers in a growable NumPy array, text as a single
+# UTF-8 buffer plus an array of offsets (the layout Arrow uses for strings),
+# and a missing-value mask for columns that ever receive None. The per-record
+# cost is the text bytes plus a few machine words.
+#
+# Metrics are computed with NumPy over whole columns, sorting produces an
+# index array instead of a sorted copy, and CSV/Parquet exports read the
+# buffers directly. Rows can still be read back as dicts, so code written for
+# lists of records (iteration, indexing, len) keeps working.
+
+_INITIAL_CAPACITY = 1024
+
+# Column kinds and the NumPy dtypes their values are stored as
+_DTYPES = {"bool": np.bool_, "int": np.int64, "float": np.float64}
+
+
+def _kind(value):
+    if isinstance(value, (bool, np.bool_)):
+        return "bool"
+    if isinstance(value, numbers.Integral):
+        return "int"
+    if isinstance(value, numbers.Real):
+        return "float"
+    if isinstance(value, str):
+        return "str"
+    raise TypeError(f"Unsupported value {value!r} of type {type(value).__name__}")
+
+
+def _grow(array, size):
+    # Returns array with room for at least size items, doubling its capacity
+    if size <= len(array):
+        return array
+    grown = np.empty(max(size, 2 * len(array)), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class _Column:
+    # One field. kind is None until the column sees its first non-None value.
+
+    __slots__ = ("kind", "values", "data", "offsets", "missing", "size")
+
+    def __init__(self):
+        self.kind = None
+        self.values = None  # numbers
+        self.data = None  # text bytes
+        self.offsets = None  # text offsets, size + 1 of them
+        self.missing = None  # allocated on the first None
+        self.size = 0
+
+    def _start(self, kind):
+        self.kind = kind
+        capacity = max(_INITIAL_CAPACITY, self.size)
+        if kind == "str":
+            self.data = bytearray()
+            self.offsets = np.zeros(capacity + 1, dtype=np.int64)
+        else:
+            self.values = np.zeros(capacity, dtype=_DTYPES[kind])
+        if self.size:
+            # Every earlier row was None
+            self.missing = np.ones(capacity, dtype=bool)
+
+    def append(self, value):
+        index = self.size
+        if value is None:
+            if self.kind is not None:
+                if self.missing is None:
+                    self.missing = np.zeros(max(_INITIAL_CAPACITY, index + 1), dtype=bool)
+                self.missing = _grow(self.missing, index + 1)
+                self.missing[index] = True
+                self._append_value(index, None)
+            self.size += 1
+            return
+
+        kind = self.check(value)
+        if self.kind is None:
+            self._start(kind)
+        elif kind == "float" and self.kind == "int":
+            self.values = self.values.astype(np.float64)
+            self.kind = "float"
+        if self.missing is not None:
+            self.missing = _grow(self.missing, index + 1)
+            self.missing[index] = False
+        self._append_value(index, value)
+        self.size += 1
+
+    def check(self, value):
+        """
+        Returns the kind of a non-None value, or None for None, without
+        changing the column.
+
+        Raises:
+            TypeError: If the column cannot hold the value
+        """
+        if value is None:
+            return None
+        kind = _kind(value)
+        if self.kind is None or kind == self.kind:
+            return kind
+        # Integer columns widen to float; float columns take ints and bools
+        if (self.kind == "int" and kind == "float") or (self.kind == "float" and kind in ("int", "bool")):
+            return kind
+        raise TypeError(f"Column holds {self.kind} values, got {value!r}")
+
+    def _append_value(self, index, value):
+        if self.kind == "str":
+            if value is not None:
+                self.data += value.encode("utf-8")
+            self.offsets = _grow(self.offsets, index + 2)
+            self.offsets[index + 1] = len(self.data)
+        else:
+            self.values = _grow(self.values, index + 1)
+            self.values[index] = 0 if value is None else value
+
+    def is_missing(self, index):
+        return self.kind is None or (self.missing is not None and self.missing[index])
+
+    def get(self, index):
+        if self.is_missing(index):
+            return None
+        if self.kind == "str":
+            return self.data[self.offsets[index]:self.offsets[index + 1]].decode("utf-8")
+        return self.values[index].item()
+
+    def to_list(self, order=None):
+        """
+        Returns the column's values as Python objects, in order if given.
+        """
+        if self.kind is None:
+            return [None] * (self.size if order is None else len(order))
+        if self.kind == "str":
+            data = self.data
+            if order is None:
+                starts = self.offsets[:self.size]
+                ends = self.offsets[1:self.size + 1]
+            else:
+                starts = self.offsets[order]
+                ends = self.offsets[order + 1]
+            values = [data[start:end].decode("utf-8") for start, end in zip(starts.tolist(), ends.tolist())]
+        else:
+            array = self.values[:self.size]
+            values = (array if order is None else array[order]).tolist()
+        if self.missing is not None:
+            missing = self.missing[:self.size]
+            for position in np.flatnonzero(missing if order is None else missing[order]).tolist():
+                values[position] = None
+        return values
+
+    def nbytes(self):
+        total = 0
+        for array in (self.values, self.offsets, self.missing):
+            if array is not None:
+                total += array.nbytes
+        if self.data is not None:
+            total += len(self.data)
+        return total
+
+
+class ResultStore:
+    """
+    Columnar store of result records (dicts with the same keys).
+
+    Columns are created from the first record's keys, in order; each column's
+    type is taken from its first non-None value. Integer columns that later
+    receive a float are widened to float.
+
+    Args:
+        records (iterable, optional): Records to add
+    """
+
+    def __init__(self, records=()):
+        self.columns = {}
+        self.size = 0
+        self.extend(records)
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Returns records as a ResultStore, or records itself if it already is one.
+        """
+        return records if isinstance(records, cls) else cls(records)
+
+    def append(self, record):
+        """
+        Adds one record. The record is checked in full first, so a rejected
+        record leaves the store unchanged.
+
+        Raises:
+            KeyError: If the record's keys differ from the store's columns
+            TypeError: If a value does not match its column's type
+        """
+        columns = self.columns
+        if not columns and not self.size:
+            columns = {name: _Column() for name in record}
+        elif set(record) != set(columns):
+            raise KeyError(f"Record keys {list(record)} do not match the columns {list(columns)}")
+        for name, column in columns.items():
+            column.check(record[name])
+        self.columns = columns
+        for name, column in columns.items():
+            column.append(record[name])
+        self.size += 1
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def __len__(self):
+        return self.size
+
+    def __bool__(self):
+        return self.size > 0
+
+    def _row(self, index):
+        return {name: column.get(index) for name, column in self.columns.items()}
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(self.size))]
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("result index out of range")
+        return self._row(index)
+
+    def __iter__(self):
+        return self.rows()
+
+    def rows(self, order=None):
+        """
+        Yields the records as dicts, in order (an index array) if given.
+        """
+        indexes = range(self.size) if order is None else order
+        for index in indexes:
+            yield self._row(int(index))
+
+    def keys(self):
+        return list(self.columns)
+
+    def column(self, name):
+        """
+        Returns a numeric column as a NumPy array (a view, not a copy), with
+        missing values as 0; None for a column that only holds None.
+        """
+        column = self.columns[name]
+        if column.kind == "str":
+            raise TypeError(f"Column {name!r} holds text; use column_values")
+        if column.kind is None:
+            return None
+        return column.values[:self.size]
+
+    def column_values(self, name, order=None):
+        """
+        Returns a column as a list of Python values, in order if given.
+        """
+        return self.columns[name].to_list(order)
+
+    def missing(self, name):
+        """
+        Returns a boolean array marking the rows where the column is None.
+        """
+        column = self.columns[name]
+        if column.kind is None:
+            return np.ones(self.size, dtype=bool)
+        if column.missing is None:
+            return np.zeros(self.size, dtype=bool)
+        return column.missing[:self.size]
+
+    def argsort(self, name, descending=False):
+        """
+        Returns the row order sorting a numeric column, as an index array.
+        The sort is stable in both directions, like sorted(..., reverse=True),
+        and missing values come last.
+        """
+        values = self.column(name)
+        if values is None:
+            return np.arange(self.size)
+        keys = values.astype(np.float64) if values.dtype == np.bool_ else values
+        if descending:
+            keys = -keys
+        missing = self.missing(name)
+        # lexsort sorts by its last key first
+        return np.lexsort((np.arange(self.size), keys, missing)) if missing.any() \
+            else np.argsort(keys, kind="stable")
+
+    def summary(self, sentiment="sentiment", score="compound"):
+        """
+        Sentiment counts and mean absolute score over the rows that have a
+        label, computed over the whole columns at once.
+
+        Returns:
+            dict: "total", "positive", "negative", "neutral" and "mean_abs_score"
+            (0 without labelled rows)
+        """
+        labelled = ~self.missing(sentiment)
+        labels = self.column(sentiment)
+        if labels is None:
+            return {"total": 0, "positive": 0, "negative": 0, "neutral": 0, "mean_abs_score": 0}
+        labels = labels[labelled]
+        counts = np.bincount(labels + 1, minlength=3)
+        total = int(labelled.sum())
+        scores = self.column(score)
+        mean_abs_score = float(np.abs(scores[labelled]).mean()) if total and scores is not None else 0
+        return {
+            "total": total,
+            "negative": int(counts[0]),
+            "neutral": int(counts[1]),
+            "positive": int(counts[2]),
+            "mean_abs_score": mean_abs_score,
+        }
+
+    def nbytes(self):
+        """
+        Bytes held by the column buffers, including unused capacity.
+        """
+        return sum(column.nbytes() for column in self.columns.values())
+
+    def to_csv(self, path, order=None, chunk_size=65536):
+        """
+        Writes the records as CSV, with None as an empty field.
+
+        Args:
+            path (str): Output file
+            order (array, optional): Row order, e.g. from argsort()
+            chunk_size (int): Rows converted and written at a time
+        """
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.columns)
+            indexes = np.arange(self.size) if order is None else np.asarray(order)
+            for start in range(0, self.size, chunk_size):
+                chunk = indexes[start:start + chunk_size]
+                values = [column.to_list(chunk) for column in self.columns.values()]
+                writer.writerows(zip(*values))
+
+    def to_arrow(self, order=None):
+        """
+        Returns the records as a pyarrow Table. Text bytes are copied, as
+        the store's buffer for them grows in place; the other columns share
+        the store's arrays, whose rows never change once appended, so the
+        store can still be appended to afterwards.
+
+        Raises:
+            RuntimeError: If pyarrow is not installed
+        """
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise RuntimeError("pyarrow is not installed. Install it with: pip install pyarrow")
+
+        arrays = []
+        for name, column in self.columns.items():
+            missing = self.missing(name)
+            if column.kind is None:
+                array = pa.nulls(self.size)
+            elif column.kind == "str":
+                validity = pa.array(~missing).buffers()[1] if missing.any() else None
+                array = pa.Array.from_buffers(
+                    pa.large_string(), self.size,
+                    [validity, pa.py_buffer(column.offsets[:self.size + 1]), pa.py_buffer(bytes(column.data))]
+                )
+            else:
+                array = pa.array(column.values[:self.size], mask=missing if missing.any() else None)
+            arrays.append(array)
+        table = pa.Table.from_arrays(arrays, names=list(self.columns))
+        if order is not None:
+            table = table.take(pa.array(np.asarray(order)))
+        return table
+
+    def to_parquet(self, path, order=None):
+        """
+        Writes the records as a Parquet file (requires pyarrow).
+        """
+        table = self.to_arrow(order)
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
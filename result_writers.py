@@ -0,0 +1,411 @@
+import csv
+import glob
+import heapq
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+from itertools import islice
+
+from result_store import ResultStore
+
+# Streaming, append-friendly output for result records.
+#
+# A writer takes records one at a time as the pipeline yields them, buffers
+# them and writes the buffer out every flush_every records or flush_interval
+# seconds, whichever comes first. Whatever was flushed survives a crash, and
+# memory stays flat however many records a run produces.
+#
+#   csv      One header row, then one row per record. Appending to an
+#            existing file checks that its header matches.
+#   jsonl    One JSON object per line.
+#   (CSV and JSON Lines can also be written to standard output, as path "-".)
+#   parquet  A directory of part files (part-00000.parquet, ...). Each flush
+#            is written as a row group; a part is closed, and so becomes
+#            readable, every row_groups_per_file row groups and at close().
+#            Requires pyarrow.
+#
+# sort_file puts a finished output in order (e.g. by post_upvotes) with an
+# external merge sort: sorted runs of run_size records are spilled to
+# temporary files and merged, so the whole file is never in memory.
+
+FORMATS = ("csv", "jsonl", "parquet")
+
+
+def format_for(path):
+    """
+    Returns the output format named by path's extension.
+
+    Raises:
+        ValueError: For an unknown extension
+    """
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension == "json":
+        extension = "jsonl"
+    if extension not in FORMATS:
+        raise ValueError(f"Cannot tell the output format of {path}; expected one of {', '.join(FORMATS)}")
+    return extension
+
+
+class ResultWriter:
+    """
+    Base class of the streaming writers.
+
+    The output is only created or truncated when the first records are
+    flushed, so a run that produces nothing leaves an existing file alone.
+
+    Args:
+        path (str): Output file (a directory for Parquet)
+        append (bool): Add to an existing output instead of replacing it
+        flush_every (int): Records buffered before they are written
+        flush_interval (float): Seconds after which buffered records are
+            written even if fewer than flush_every have arrived
+        fsync (bool): Also ask the OS to put every flush on disk
+    """
+
+    format = None
+
+    def __init__(self, path, append=False, flush_every=500, flush_interval=5.0, fsync=False):
+        self.path = path
+        self.append = append
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.buffer = []
+        self.records_written = 0
+        self.opened = False
+        self.last_flush = time.monotonic()
+
+    def write(self, record):
+        self.buffer.append(record)
+        if len(self.buffer) >= self.flush_every or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        """
+        Writes the buffered records out.
+        """
+        self.last_flush = time.monotonic()
+        if not self.buffer:
+            return
+        if not self.opened:
+            self._open()
+            self.opened = True
+        self._write(self.buffer)
+        self.records_written += len(self.buffer)
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        if self.opened:
+            self._close()
+            self.opened = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _open(self):
+        raise NotImplementedError
+
+    def _write(self, records):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+    def _sync(self, f):
+        f.flush()
+        if self.fsync and f is not sys.stdout:
+            os.fsync(f.fileno())
+
+    def _open_file(self, **kwargs):
+        if self.path == "-":
+            return sys.stdout
+        return open(self.path, "a" if self.append else "w", encoding="utf-8", **kwargs)
+
+    def _close_file(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+class CsvResultWriter(ResultWriter):
+    """
+    Streams records to a CSV file, with None as an empty field.
+    """
+
+    format = "csv"
+
+    def _open(self):
+        fieldnames = list(self.buffer[0])
+        write_header = True
+        if self.append and self.path != "-" and os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, newline="", encoding="utf-8") as f:
+                header = next(csv.reader(f), [])
+            if header != fieldnames:
+                raise ValueError(f"{self.path} has columns {header}, records have {fieldnames}")
+            write_header = False
+        self.file = self._open_file(newline="")
+        self.fieldnames = fieldnames
+        self.writer = csv.writer(self.file)
+        if write_header:
+            self.writer.writerow(fieldnames)
+
+    def _write(self, records):
+        fieldnames = self.fieldnames
+        self.writer.writerows([[record[name] for name in fieldnames] for record in records])
+        self._sync(self.file)
+
+    def _close(self):
+        self._close_file()
+
+
+class JsonlResultWriter(ResultWriter):
+    """
+    Streams records to a JSON Lines file.
+    """
+
+    format = "jsonl"
+
+    def _open(self):
+        self.file = self._open_file()
+
+    def _write(self, records):
+        self.file.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+        self._sync(self.file)
+
+    def _close(self):
+        self._close_file()
+
+
+class ParquetResultWriter(ResultWriter):
+    """
+    Streams records to a directory of Parquet part files, one row group per
+    flush.
+
+    Args:
+        row_groups_per_file (int): Row groups written before a part file is
+            closed and the next one started
+        Other arguments as for ResultWriter.
+    """
+
+    format = "parquet"
+
+    def __init__(self, path, row_groups_per_file=16, **options):
+        super().__init__(path, **options)
+        self.row_groups_per_file = row_groups_per_file
+        self.part_writer = None
+        self.schema = None
+
+    def _open(self):
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("pyarrow is not installed. Install it with: pip install pyarrow")
+        os.makedirs(self.path, exist_ok=True)
+        parts = _parquet_parts(self.path)
+        if not self.append:
+            for part in parts:
+                os.remove(part)
+            parts = []
+        self.next_part = int(os.path.basename(parts[-1])[5:10]) + 1 if parts else 0
+
+    def _write(self, records):
+        import pyarrow.parquet as pq
+
+        table = ResultStore(records).to_arrow()
+        if self.schema is not None and table.schema != self.schema:
+            # A column that was all None (or all integers) in an earlier chunk
+            # gets its real type later; chunks that fit the part's schema are
+            # cast to it, others start a new part with their own schema
+            if _castable(table.schema, self.schema):
+                table = table.cast(self.schema)
+            else:
+                self._close()
+        if self.part_writer is None:
+            self.schema = table.schema
+            part = os.path.join(self.path, f"part-{self.next_part:05d}.parquet")
+            self.next_part += 1
+            self.part_writer = pq.ParquetWriter(part, table.schema)
+            self.part_row_groups = 0
+        self.part_writer.write_table(table)
+        self.part_row_groups += 1
+        if self.part_row_groups >= self.row_groups_per_file:
+            self._close()
+
+    def _close(self):
+        if self.part_writer is not None:
+            self.part_writer.close()
+            self.part_writer = None
+
+
+def _castable(schema, target):
+    import pyarrow as pa
+    return schema.names == target.names and all(
+        field.type == target_field.type
+        or pa.types.is_null(field.type)
+        or (pa.types.is_integer(field.type) and pa.types.is_floating(target_field.type))
+        for field, target_field in zip(schema, target)
+    )
+
+
+def _parquet_parts(path):
+    return sorted(glob.glob(os.path.join(path, "part-*.parquet")))
+
+
+WRITERS = {
+    "csv": CsvResultWriter,
+    "jsonl": JsonlResultWriter,
+    "parquet": ParquetResultWriter,
+}
+
+
+def open_writer(path, format=None, **options):
+    """
+    Returns a streaming writer for path, in the given format or the one
+    its extension names. Options are passed to the writer's constructor.
+    """
+    return WRITERS[format or format_for(path)](path, **options)
+
+
+def read_records(path, format=None):
+    """
+    Yields the records of an output written by one of the writers. CSV
+    fields come back as strings, empty for None.
+    """
+    format = format or format_for(path)
+    if format == "csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+    elif format == "jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        import pyarrow.parquet as pq
+        for part in _parquet_parts(path):
+            for batch in pq.ParquetFile(part).iter_batches():
+                yield from batch.to_pylist()
+
+
+def _sort_key(field, descending, numeric):
+    # Items are (sequence, record); field indexes the record. Missing values
+    # go last and ties keep their input order, like a stable sort.
+    def sort_key(item):
+        sequence, record = item
+        value = record[field]
+        if value is None or value == "":
+            return (1, 0, sequence)
+        if numeric:
+            value = float(value)
+            return (0, -value if descending else value, sequence)
+        return (0, value, sequence)
+    return sort_key
+
+
+_SPILL_BLOCK = 1024
+
+
+def _spill(run, directory):
+    # Pickled in blocks: one pickle call per item costs more than the sort
+    f = tempfile.NamedTemporaryFile(dir=directory, suffix=".run", delete=False)
+    with f:
+        for start in range(0, len(run), _SPILL_BLOCK):
+            pickle.dump(run[start:start + _SPILL_BLOCK], f, protocol=pickle.HIGHEST_PROTOCOL)
+    return f.name
+
+
+def _read_run(path):
+    with open(path, "rb") as f:
+        while True:
+            try:
+                yield from pickle.load(f)
+            except EOFError:
+                return
+
+
+def _merge_sorted(items, sort_key, run_size, directory):
+    # Sorts runs of run_size items in memory, spills all but the last, and
+    # returns an iterator merging them
+    runs = []
+    run = []
+    for item in items:
+        run.append(item)
+        if len(run) >= run_size:
+            run.sort(key=sort_key)
+            runs.append(_spill(run, directory))
+            run = []
+    run.sort(key=sort_key)
+    return heapq.merge(run, *(_read_run(spilled) for spilled in runs), key=sort_key)
+
+
+def sort_file(path, key, descending=False, format=None, run_size=100_000, output=None, numeric=True):
+    """
+    Sorts an output by one field with an external merge sort, holding at
+    most run_size records in memory, and replaces it (or writes output).
+
+    The sort is stable, records missing the field come last, and the
+    result is what sorting the records in memory would have written.
+
+    Args:
+        path (str): Output written by one of the writers
+        key (str): Field to sort by
+        descending (bool): Largest first, like sorted(..., reverse=True)
+        format (str, optional): Output format; defaults to path's extension
+        run_size (int): Records sorted in memory at a time
+        output (str, optional): Where to write the sorted records; path itself
+            (replaced once the sort is complete) when not given
+        numeric (bool): Compare the field as a number (needed for CSV,
+            where every field is text)
+
+    Returns:
+        int: Number of records sorted
+    """
+    format = format or format_for(path)
+    target = output or path
+    directory = os.path.dirname(os.path.abspath(target))
+    count = 0
+
+    with tempfile.TemporaryDirectory(dir=directory, prefix=".sort-") as spill_directory:
+        temp_target = os.path.join(spill_directory, "sorted" + ("" if format == "parquet" else f".{format}"))
+        if format == "csv":
+            # Rows are sorted as lists of fields and written back unchanged,
+            # without building a dict per record
+            with open(path, newline="", encoding="utf-8") as input_file:
+                reader = csv.reader(input_file)
+                header = next(reader, None)
+                if header is not None:
+                    merged = _merge_sorted(enumerate(reader), _sort_key(header.index(key), descending, numeric),
+                                           run_size, spill_directory)
+                    with open(temp_target, "w", newline="", encoding="utf-8") as output_file:
+                        writer = csv.writer(output_file)
+                        writer.writerow(header)
+                        for block in iter(lambda: list(islice(merged, _SPILL_BLOCK)), []):
+                            writer.writerows([row for _, row in block])
+                            count += len(block)
+        else:
+            merged = _merge_sorted(enumerate(read_records(path, format)), _sort_key(key, descending, numeric),
+                                   run_size, spill_directory)
+            with open_writer(temp_target, format, flush_every=run_size, flush_interval=float("inf")) as writer:
+                for _, record in merged:
+                    writer.write(record)
+            count = writer.records_written
+
+        if count:
+            if format == "parquet":
+                if os.path.isdir(target):
+                    shutil.rmtree(target)
+                os.rename(temp_target, target)
+            else:
+                os.replace(temp_target, target)
+    return count
@@ -0,0 +1,131 @@
+import json
+import os
+
+# Write-ahead journal for resuming interrupted runs.
+#
+# Every post a run settles is appended to a JSON Lines file, with its result
+# record (or null for posts that have none, e.g. stickied posts), and the line
+# is flushed before the record is passed on. A run started with resume=True
+# reads the journal back and replays those records instead of fetching and
+# scoring the posts again, so after a crash or a rate-limit failure only the
+# remaining posts cost anything. Posts that failed with an error are not
+# journaled and are retried.
+#
+# The first line holds the run's settings; resuming with different settings
+# is refused, since the journaled records would not match. Replayed records
+# come back in listing order, so a resumed run writes the same output as an
+# uninterrupted one as long as the listing is the same (the PostCache keeps
+# it for its TTL). A line cut short by a crash is dropped on load.
+
+
+class RunJournal:
+    """
+    Write-ahead journal of the posts settled by a run.
+
+    Args:
+        path (str): JSON Lines file holding the journal
+        resume (bool): Load an existing journal instead of starting over
+        fsync (bool): Ask the OS to put every entry on disk, not just flush it
+    """
+
+    def __init__(self, path="run_journal.jsonl", resume=False, fsync=False):
+        self.path = path
+        self.fsync = fsync
+        self.settings = None
+        self.records = {}
+        self.finished = False
+        self.replayed = 0
+
+        if resume and os.path.exists(path):
+            self._load()
+            self.file = open(path, "a", encoding="utf-8")
+        else:
+            self.file = open(path, "w", encoding="utf-8")
+
+    def _load(self):
+        good_bytes = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                good_bytes += len(line)
+                if "settings" in entry:
+                    self.settings = entry["settings"]
+                elif "post" in entry:
+                    self.records[entry["post"]] = (entry["record"], entry.get("skipped", False))
+                elif entry.get("finished"):
+                    self.finished = True
+        # Drop a partly written last line so new entries start on a fresh one
+        if good_bytes < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(good_bytes)
+
+    def begin(self, settings):
+        """
+        Starts (or continues) the run with the given settings.
+
+        Raises:
+            ValueError: If the journal was written by a run with other settings
+        """
+        settings = json.loads(json.dumps(settings))
+        if self.settings is None:
+            self.settings = settings
+            self._append({"settings": settings})
+        elif settings != self.settings:
+            raise ValueError(f"The journal {self.path} was written by a run with settings {self.settings}, "
+                             f"not {settings}; start the run without resuming")
+        self.finished = False
+
+    def __contains__(self, post_id):
+        return post_id in self.records
+
+    def __len__(self):
+        return len(self.records)
+
+    def replay(self, post_id):
+        """
+        Returns the journaled (record, skipped) of a post; record is None for
+        posts without one, and skipped is True for posts that were skipped
+        rather than analyzed.
+        """
+        self.replayed += 1
+        return self.records[post_id]
+
+    def record(self, post_id, record, skipped=False):
+        """
+        Journals a settled post and its record, or None if it has none.
+        """
+        self.records[post_id] = (record, skipped)
+        self._append({"post": post_id, "record": record, "skipped": skipped})
+
+    def finish(self):
+        """
+        Marks the run as complete.
+        """
+        self.finished = True
+        self._append({"finished": True})
+
+    def _append(self, entry):
+        self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+
+    def close(self, remove_finished=True):
+        """
+        Closes the journal, deleting it if the run completed and
+        remove_finished is set.
+        """
+        self.file.close()
+        if remove_finished and self.finished:
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,308 @@
+import argparse
+import csv
+import os
+from collections import Counter, deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import vadertest
+from instrumentation import RunMetrics, format_report, timed
+from post_cache import PostCache
+from reddit_fetch import Backoff, call_with_retries
+from result_writers import open_writer, sort_file
+from score_cache import ScoreCache
+from vadertest import (get_top_posts, get_valid_comments, has_candidates, print_cache_notice, reddit_client,
+                       select_record)
+
+# Runs many subreddit jobs against one shared request budget.
+#
+# Running subreddits one after another leaves quota unused: each run starts
+# with a lone listing request and ends waiting on its last few comment trees.
+# The scheduler keeps up to fetch_concurrency requests in flight, taking the
+# next request from each job in turn (a job's listing first, then its comment
+# trees), so every job advances and the budget is spent evenly. All requests
+# go through the shared RateLimiter, which follows Reddit's rate-limit headers,
+# and are retried with a shared Backoff on 429s, 5xx errors and connection
+# errors. Comments are scored on the main thread as their trees arrive.
+
+SubredditJob = namedtuple("SubredditJob", ["name", "limit", "min_comment_length", "min_words", "min_compound_score"],
+                          defaults=(100, 10, 3, 0.1))
+
+# Column types of a jobs file; only "subreddit" is required
+JOB_COLUMNS = {"limit": int, "min_comment_length": int, "min_words": int, "min_compound_score": float}
+
+
+def load_jobs(path):
+    """
+    Reads jobs from a CSV file with a "subreddit" column and optional
+    "limit", "min_comment_length", "min_words" and "min_compound_score"
+    columns; empty cells take the defaults.
+
+    Raises:
+        ValueError: If the file has no "subreddit" column
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        if "subreddit" not in (reader.fieldnames or []):
+            raise ValueError(f"{path} has no 'subreddit' column")
+        jobs = []
+        for row in reader:
+            options = {name: convert(row[name]) for name, convert in JOB_COLUMNS.items() if row.get(name)}
+            jobs.append(SubredditJob(row["subreddit"].strip(), **options))
+    return jobs
+
+
+def output_paths(jobs, output_dir, format="csv"):
+    """
+    Returns the output file of every job, keyed by job. A subreddit listed
+    by several jobs (with different thresholds) gets one file per job, named
+    after its settings, so their records are never mixed.
+
+    Raises:
+        ValueError: If a job is listed twice with the same settings
+    """
+    names = Counter(job.name.lower() for job in jobs)
+    seen = set()
+    paths = {}
+    for job in jobs:
+        key = job._replace(name=job.name.lower())
+        if key in seen:
+            raise ValueError(f"r/{job.name} is listed twice with the same settings")
+        seen.add(key)
+        stem = job.name
+        if names[key.name] > 1:
+            stem = (f"{job.name}_limit{job.limit}_length{job.min_comment_length}_words{job.min_words}"
+                    f"_compound{job.min_compound_score}")
+        paths[job] = os.path.join(output_dir, f"{stem}.{format}")
+    return paths
+
+
+class _JobState:
+    # Progress of one job: its listing, the next post to fetch, and the
+    # settled posts waiting for earlier ones so records come out in order
+
+    def __init__(self, job, progress_callback=None):
+        self.job = job
+        self.progress_callback = progress_callback
+        self.listing_requested = False
+        self.posts = None
+        self.next_fetch = 0
+        self.finished = {}
+        self.next_yield = 0
+        self.processed = 0
+        self.skipped = 0
+
+    def next_task(self):
+        """
+        Returns the index of the next post to fetch, "listing" if the
+        listing has not been requested, or None if nothing can be started.
+        Stickied posts are settled here without a request.
+        """
+        if not self.listing_requested:
+            self.listing_requested = True
+            return "listing"
+        while self.posts is not None and self.next_fetch < len(self.posts):
+            index = self.next_fetch
+            self.next_fetch += 1
+            if self.posts[index].stickied:
+                has_candidates(self.posts[index], None, None)
+                self.settle(index, None, skipped=True)
+                continue
+            return index
+        return None
+
+    def settle(self, index, record, skipped=False):
+        self.finished[index] = record
+        if skipped:
+            self.skipped += 1
+        else:
+            self.processed += 1
+        if self.progress_callback:
+            self.progress_callback(self.job, self.processed + self.skipped)
+
+    def ready(self):
+        while self.next_yield in self.finished:
+            record = self.finished.pop(self.next_yield)
+            self.next_yield += 1
+            if record:
+                yield record
+
+    def done(self):
+        return self.posts is not None and self.next_yield == len(self.posts)
+
+
+def iter_scheduled_posts(jobs, fetch_concurrency=8, rate_limiter=None, backoff=None, cache=None,
+                         metrics=None, progress_callback=None, score_cache=None):
+    """
+    Runs subreddit jobs with interleaved requests and yields (job, record)
+    for every analyzed post. Jobs are interleaved, but each job's records
+    come in its listing order, as with iter_top_posts.
+
+    Args:
+        jobs (iterable): SubredditJob entries
+        fetch_concurrency (int): Requests in flight at once, across all jobs
+        rate_limiter (RateLimiter, optional): Shared token bucket; defaults to
+            vadertest.rate_limiter, which the Reddit client keeps updated from
+            the rate-limit headers
+        backoff (Backoff, optional): Retry policy for 429s, 5xx errors and
+            connection errors
+        cache (PostCache, optional): Listings and comment trees to reuse
+        metrics (RunMetrics, optional): Times the fetch and scoring stages
+        progress_callback (callable, optional): Called as
+            progress_callback(job, settled_posts) after every post a job
+            settles, analyzed or skipped. Unlike iter_top_posts' callback it
+            is given the job too, since the jobs' posts are interleaved
+        score_cache (ScoreCache, optional): Scores of comment bodies already
+            seen, shared by all jobs; crossposts and copypasta are scored once
+    """
+    rate_limiter = rate_limiter or vadertest.rate_limiter
+    backoff = backoff or Backoff()
+
+    # Requests run on pool threads, each attempt with a Reddit client of its own
+    def listing(job):
+        with reddit_client():
+            return list(get_top_posts(job.name, job.limit, cache, rate_limiter))
+
+    def comments(job, post):
+        with reddit_client():
+            return get_valid_comments(post, job.min_comment_length, cache, rate_limiter)
+
+    def fetch_listing(job):
+        with timed(metrics, "fetch_listing"):
+            return call_with_retries(lambda: listing(job), rate_limiter, backoff)
+
+    def fetch_comments(job, post):
+        with timed(metrics, "fetch_comments"):
+            return call_with_retries(lambda: comments(job, post), rate_limiter, backoff)
+
+    states = deque(_JobState(job, progress_callback) for job in jobs)
+    # future -> (job state, "listing" or post index)
+    in_flight = {}
+
+    with ThreadPoolExecutor(max_workers=fetch_concurrency) as pool:
+        while states:
+            # Fill the free slots, one request from each job in turn
+            idle = 0
+            while len(in_flight) < fetch_concurrency and idle < len(states):
+                state = states[0]
+                states.rotate(-1)
+                task = state.next_task()
+                if task is None:
+                    idle += 1
+                    continue
+                idle = 0
+                if task == "listing":
+                    future = pool.submit(fetch_listing, state.job)
+                else:
+                    future = pool.submit(fetch_comments, state.job, state.posts[task])
+                in_flight[future] = (state, task)
+
+            if in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            else:
+                done = []
+            for future in done:
+                state, task = in_flight.pop(future)
+                job = state.job
+                if task == "listing":
+                    try:
+                        state.posts = future.result()
+                    except Exception as e:
+                        print(f"Error accessing subreddit {job.name}: {str(e)}")
+                        state.posts = []
+                    continue
+
+                post = state.posts[task]
+                try:
+                    valid_comments = future.result()
+                    error = None
+                except Exception as e:
+                    valid_comments = None
+                    error = e
+                if not has_candidates(post, valid_comments, error):
+                    state.settle(task, None, skipped=True)
+                    continue
+                try:
+                    record = select_record(post, valid_comments, job.min_words, job.min_compound_score, metrics,
+                                           score_cache)
+                except Exception as e:
+                    print(f"Error processing post {post.title}: {str(e)}")
+                    state.settle(task, None, skipped=True)
+                    continue
+                state.settle(task, record)
+
+            for state in list(states):
+                for record in state.ready():
+                    yield state.job, record
+                if state.done():
+                    states.remove(state)
+                    print(f"r/{state.job.name}: {state.processed} posts processed, {state.skipped} skipped")
+
+    if metrics is not None:
+        metrics.finish()
+    summary = backoff.summary()
+    print(f"Retries: {summary['retries']} ({summary['throttled']} throttled, "
+          f"{summary['server_errors']} server or connection errors)")
+    if score_cache is not None:
+        print(score_cache.format_stats())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze many subreddits against one shared Reddit rate limit")
+    parser.add_argument("subreddits", nargs="*", help="Subreddits to analyze with the default thresholds")
+    parser.add_argument("--jobs", help="CSV file of jobs: subreddit[, limit, min_comment_length, min_words, "
+                                       "min_compound_score]")
+    parser.add_argument("--limit", type=int, default=100, help="Posts per subreddit given on the command line")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight across all jobs")
+    parser.add_argument("--max-retries", type=int, default=5, help="Retries of a throttled or failed request")
+    parser.add_argument("--output-dir", default="results", help="Directory for one output file per subreddit")
+    parser.add_argument("--format", default="csv", choices=["csv", "jsonl", "parquet"], help="Output format")
+    parser.add_argument("--cache", help="Post cache file, reusing listings and comment trees for 24 hours; "
+                                         "by default every run fetches live data")
+    parser.add_argument("--score-cache", default="score_cache.json", help="Score cache file")
+    parser.add_argument("--score-cache-size", type=int, default=100_000, help="Most comment bodies in the score cache")
+    args = parser.parse_args(argv)
+
+    jobs = [SubredditJob(name, limit=args.limit) for name in args.subreddits]
+    if args.jobs:
+        jobs.extend(load_jobs(args.jobs))
+    if not jobs:
+        parser.error("give subreddits or a --jobs file")
+
+    try:
+        paths = output_paths(jobs, args.output_dir, args.format)
+    except ValueError as e:
+        parser.error(str(e))
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    writers = {job: open_writer(path) for job, path in paths.items()}
+    cache = None
+    if args.cache:
+        cache = PostCache(args.cache)
+        print_cache_notice(cache)
+    score_cache = ScoreCache(args.score_cache_size, args.score_cache)
+    run_metrics = RunMetrics()
+    print(f"Running {len(jobs)} jobs with {args.concurrency} requests in flight...")
+    try:
+        for job, record in iter_scheduled_posts(jobs, fetch_concurrency=args.concurrency,
+                                                backoff=Backoff(max_retries=args.max_retries),
+                                                cache=cache, metrics=run_metrics, score_cache=score_cache):
+            writers[job].write(record)
+    finally:
+        for writer in writers.values():
+            writer.close()
+        if cache is not None:
+            cache.close()
+        score_cache.save()
+
+    print(f"\nRun Report:")
+    print(format_report(run_metrics.report()))
+    for job, writer in writers.items():
+        if writer.records_written:
+            sort_file(paths[job], "post_upvotes", descending=True)
+    saved = sum(1 for writer in writers.values() if writer.records_written)
+    print(f"Saved {sum(writer.records_written for writer in writers.values())} results for {saved} jobs "
+          f"to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
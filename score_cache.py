@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+# Content-hash cache of scored comment bodies.
+#
+# Bot replies, copypasta and crossposts bring the same comment body back again
+# and again, across posts and subreddits. Instead of cleaning, preprocessing
+# and scoring every copy, the result is cached under a hash of the raw body and
+# of the settings that shape it: the cleaning and stopword options, the
+# thresholds deciding whether a comment is meaningful, and the scorer (the
+# scalar and the vectorized VADER scorers agree only to about 1e-4). A change
+# to any of them gives new keys, so stale results are never returned; they
+# just age out of the LRU order.
+#
+# The cache is bounded to max_entries, evicting the least recently used entry,
+# and can be kept in a JSON file between runs.
+
+
+def score_config(min_words=3, min_compound_score=0.1, remove_stopwords=True, remove_numbers=True,
+                 remove_emojis=True, scorer="vader"):
+    """
+    Returns the settings that a cached result depends on, as a hashable
+    key for ScoreCache.get and ScoreCache.put.
+    """
+    return (("min_words", min_words), ("min_compound_score", min_compound_score),
+            ("remove_stopwords", remove_stopwords), ("remove_numbers", remove_numbers),
+            ("remove_emojis", remove_emojis), ("scorer", scorer))
+
+
+class ScoreCache:
+    """
+    Bounded LRU cache of (preprocessed text, scores) by raw comment body and
+    settings. Not thread-safe: use it from the thread that does the scoring.
+
+    Args:
+        max_entries (int): Most results kept; the least recently used go first
+        path (str, optional): JSON file to load the cache from and save it to
+    """
+
+    def __init__(self, max_entries=100_000, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self.entries = OrderedDict()
+        self._config_digests = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for key, text, result in json.load(f)["entries"][-max_entries:]:
+                    self.entries[bytes.fromhex(key)] = (text, result)
+
+    def _key(self, body, config):
+        digest = self._config_digests.get(config)
+        if digest is None:
+            digest = self._config_digests[config] = hashlib.blake2b(repr(config).encode("utf-8"),
+                                                                   digest_size=16).digest()
+        return hashlib.blake2b(body.encode("utf-8", "surrogatepass"), digest_size=16, key=digest).digest()
+
+    def get(self, body, config):
+        """
+        Returns the cached (preprocessed text, scores) of a raw body under
+        the given score_config, or None.
+        """
+        key = self._key(body, config)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, body, config, text, result):
+        """
+        Caches the preprocessed text and scores of a raw body.
+        """
+        key = self._key(body, config)
+        self.entries[key] = (text, result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def save(self):
+        """
+        Writes the cache to its path atomically, oldest entries first.
+        """
+        if not self.path:
+            return
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"entries": [[key.hex(), text, result] for key, (text, result) in self.entries.items()]}, f)
+        os.replace(temp_path, self.path)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+            "evictions": self.evictions,
+        }
+
+    def format_stats(self):
+        """
+        Returns the one-line summary printed at the end of a run.
+        """
+        stats = self.stats()
+        return (f"Score cache: {stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.1%} hit rate), "
+                f"{stats['entries']} entries, {stats['evictions']} evicted")
@@ -0,0 +1,453 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import combinations, islice
+
+from comment_ranking import RankedComments
+from instrumentation import RunMetrics, format_report, timed
+from result_store import ResultStore
+from vadertest import (CANDIDATE_WINDOW, comment_filter, get_analyzer, get_top_posts, has_candidates,
+                       iter_post_comments, print_summary, select_comment)
+
+# Scores one fetch of a subreddit with several sentiment engines.
+#
+# vadertest and blobtest each fetch the subreddit themselves, so comparing
+# VADER with TextBlob used to cost two runs' worth of API quota. Here the
+# posts and comment trees are fetched once (with vadertest's cache, rate
+# limiter and concurrent fetching) and every engine ranks the same comments
+# with its own candidate rules and picks and scores its own comment, the way
+# its script would. The
+# result is one record per post with a column group per engine, plus
+# agreement statistics between each pair of engines.
+#
+# An engine is a Scorer subclass registered in SCORERS. With a process pool,
+# the engines score the candidate windows of a post in parallel while the
+# main thread keeps fetching. In-process (workers=1) they score one after
+# another.
+#
+# Usage:
+#     python scorers.py SUBREDDIT [--engines vader textblob] [--limit 100]
+#         [--workers 0] [--output sentiment_comparison.csv]
+
+class Scorer:
+    """
+    Base class of the sentiment engines.
+
+    A scorer turns a post's candidate comment bodies, best ranked first, into
+    the engine's pick: the first comment its filters consider meaningful,
+    with the engine's sentiment label (1, 0 or -1) and score. Scorers are
+    pickled to the process pool, so options must be plain attributes.
+    """
+
+    name = None
+
+    def candidates(self, comments, min_comment_length=10):
+        """
+        Returns the engine's candidates among a post's comments (a
+        re-iterable collection in tree order), best ranked first. By default
+        these are vadertest's valid comments.
+        """
+        return RankedComments(comments, comment_filter(min_comment_length), window=CANDIDATE_WINDOW)
+
+    def prepare(self):
+        """
+        Loads lexicons and models, so that pool workers forked afterwards
+        inherit them instead of loading their own.
+        """
+
+    def select(self, bodies):
+        """
+        Returns (index, comment text, sentiment, score) for the first
+        meaningful body, or None if there is none.
+        """
+        raise NotImplementedError
+
+
+class VaderScorer(Scorer):
+    """
+    VADER, as in vadertest: one score per comment decides both the
+    meaningfulness filter and the label; the score is the compound score.
+    """
+
+    name = "vader"
+
+    def __init__(self, min_words=3, min_compound_score=0.1):
+        self.min_words = min_words
+        self.min_compound_score = min_compound_score
+
+    def prepare(self):
+        get_analyzer()
+
+    def select(self, bodies):
+        selection = select_comment(bodies, self.min_words, self.min_compound_score)
+        if selection is None:
+            return None
+        index, comment_text, result = selection
+        return index, comment_text, result["sentiment"], result["compound"]
+
+
+class TextBlobScorer(Scorer):
+    """
+    TextBlob, as in blobtest: every comment but MoreComments is a candidate,
+    whatever its author or length; spelling correction, more than min_words
+    words and a subjectivity above 0.1 make a comment meaningful; the score
+    is the polarity.
+    """
+
+    name = "textblob"
+
+    def __init__(self, min_words=5):
+        self.min_words = min_words
+
+    def prepare(self):
+        from blobtest import CommentAnalysis
+        from spelling import get_corrector
+        get_corrector()
+        CommentAnalysis("warm up").sentiment
+
+    def candidates(self, comments, min_comment_length=10):
+        from blobtest import is_candidate
+        return RankedComments(comments, is_candidate, window=CANDIDATE_WINDOW)
+
+    def select(self, bodies):
+        from blobtest import select_comment as select_blob_comment
+        return select_blob_comment(bodies, self.min_words)
+
+
+# Engine name -> Scorer class; add an entry to plug in another engine
+SCORERS = {
+    VaderScorer.name: VaderScorer,
+    TextBlobScorer.name: TextBlobScorer,
+}
+
+
+def get_scorers(names):
+    """
+    Returns a default-configured scorer for each engine name.
+
+    Raises:
+        ValueError: For an unknown engine name
+    """
+    scorers = []
+    for name in names:
+        if name not in SCORERS:
+            raise ValueError(f"Unknown engine {name!r}, expected one of {', '.join(SCORERS)}")
+        scorers.append(SCORERS[name]())
+    return scorers
+
+
+def _select_window(scorer, bodies):
+    # Pool task; returns the selection and the time it took
+    start = time.perf_counter()
+    selection = scorer.select(bodies)
+    return selection, time.perf_counter() - start
+
+
+def build_comparison_record(post, scorers, picks):
+    """
+    Builds the combined output row for a post: the post's columns, then
+    comment id, text, upvotes, sentiment and score for each engine, left
+    empty (None) when the engine found no meaningful comment.
+
+    Args:
+        picks (dict): Engine name -> (comment, comment text, sentiment, score) or None
+    """
+    record = {
+        "title": post.title,
+        "url": f"https://www.reddit.com{post.permalink}",
+        "post_upvotes": post.score,
+    }
+    for scorer in scorers:
+        comment, comment_text, sentiment, score = picks.get(scorer.name) or (None, None, None, None)
+        record[f"{scorer.name}_comment_id"] = comment.id if comment else None
+        record[f"{scorer.name}_comment_text"] = comment_text
+        record[f"{scorer.name}_comment_upvotes"] = comment.score if comment else None
+        record[f"{scorer.name}_sentiment"] = sentiment
+        record[f"{scorer.name}_score"] = score
+    return record
+
+
+class _CandidateWindows:
+    # One engine's ranked candidates for a post, cut into windows on demand
+
+    def __init__(self, candidates, metrics):
+        self.candidates = candidates
+        self.ranked = iter(candidates)
+        self.windows = []
+        self.metrics = metrics
+
+    def __bool__(self):
+        return bool(self.candidates)
+
+    def get(self, number):
+        while len(self.windows) <= number:
+            if self.windows and len(self.windows[-1]) < CANDIDATE_WINDOW:
+                return []
+            with timed(self.metrics, "rank_comments"):
+                self.windows.append(list(islice(self.ranked, CANDIDATE_WINDOW)))
+        return self.windows[number]
+
+
+def _candidate_windows(scorers, valid_comments, min_comment_length, metrics):
+    # Each engine ranks the post's whole comment collection with its own
+    # rules; None when no engine has a candidate
+    if valid_comments is None:
+        return None
+    windows = {scorer.name: _CandidateWindows(scorer.candidates(valid_comments.comments, min_comment_length),
+                                              metrics)
+               for scorer in scorers}
+    return windows if any(windows.values()) else None
+
+
+def iter_compared_posts(subreddit_name, engines=("vader", "textblob"), limit=100, min_comment_length=10,
+                        workers=1, fetch_concurrency=1, cache=None, metrics=None, progress_callback=None):
+    """
+    Fetches the subreddit's top posts once and yields one combined record
+    per post that at least one engine found a meaningful comment for, in
+    listing order.
+
+    Args:
+        subreddit_name (str): Subreddit to analyze
+        engines (iterable): Engine names from SCORERS, or Scorer instances
+        limit (int): Number of top posts
+        min_comment_length (int): Shorter comments are not candidates for the
+            engines that filter on length (vader)
+        workers (int): Process pool size for scoring; 0 uses one process
+            per CPU core and 1 scores in-process, one engine after another
+        fetch_concurrency (int): Comment trees fetched at once
+        cache (PostCache, optional): Cache for listings and comment trees
+        metrics (RunMetrics, optional): Times fetching, ranking and each
+            engine (as "score_<engine>", per candidate window)
+        progress_callback (callable, optional): Called with the number of
+            posts processed so far
+    """
+    scorers = [engine if isinstance(engine, Scorer) else get_scorers([engine])[0] for engine in engines]
+    workers = workers or os.cpu_count()
+    for scorer in scorers:
+        scorer.prepare()
+
+    try:
+        top_posts = get_top_posts(subreddit_name, limit, cache)
+        post_comments = iter_post_comments(top_posts, min_comment_length, fetch_concurrency, cache, metrics)
+        processed_posts = 0
+        skipped_posts = 0
+
+        if workers == 1:
+            for post, valid_comments, error in post_comments:
+                windows = _candidate_windows(scorers, valid_comments, min_comment_length, metrics)
+                if not has_candidates(post, windows, error):
+                    skipped_posts += 1
+                    continue
+                picks = {}
+                try:
+                    for scorer in scorers:
+                        number = 0
+                        while scorer.name not in picks:
+                            window = windows[scorer.name].get(number)
+                            if not window:
+                                break
+                            with timed(metrics, f"score_{scorer.name}", len(window)):
+                                selection = scorer.select([comment.body for comment in window])
+                            if selection:
+                                index, comment_text, sentiment, score = selection
+                                picks[scorer.name] = (window[index], comment_text, sentiment, score)
+                            number += 1
+                except Exception as e:
+                    print(f"Error processing post {post.title}: {str(e)}")
+                    skipped_posts += 1
+                    continue
+                processed_posts += 1
+                if progress_callback:
+                    progress_callback(processed_posts)
+                if picks:
+                    yield build_comparison_record(post, scorers, picks)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # post index -> [post, windows by engine, picks, engines still scoring]
+                posts = {}
+                # post index -> record, or None for posts without one
+                finished = {}
+                # future -> (post index, scorer, window number)
+                pending = {}
+                next_index = 0
+
+                def submit(post_index, scorer, number):
+                    window = posts[post_index][1][scorer.name].get(number)
+                    if not window:
+                        return False
+                    future = pool.submit(_select_window, scorer, [comment.body for comment in window])
+                    pending[future] = (post_index, scorer, number)
+                    return True
+
+                def settle(post_index):
+                    nonlocal processed_posts
+                    posts[post_index][3] -= 1
+                    if posts[post_index][3] == 0:
+                        post, _, picks, _ = posts.pop(post_index)
+                        finished[post_index] = build_comparison_record(post, scorers, picks) if picks else None
+                        processed_posts += 1
+                        if progress_callback:
+                            progress_callback(processed_posts)
+
+                def collect(done):
+                    nonlocal skipped_posts
+                    for future in done:
+                        post_index, scorer, number = pending.pop(future)
+                        if post_index not in posts:
+                            continue
+                        try:
+                            selection, seconds = future.result()
+                        except Exception as e:
+                            print(f"Error processing post {posts.pop(post_index)[0].title}: {str(e)}")
+                            finished[post_index] = None
+                            skipped_posts += 1
+                            continue
+                        if metrics is not None:
+                            metrics.record(f"score_{scorer.name}", seconds,
+                                           len(posts[post_index][1][scorer.name].get(number)))
+                        if selection:
+                            index, comment_text, sentiment, score = selection
+                            window = posts[post_index][1][scorer.name].get(number)
+                            posts[post_index][2][scorer.name] = (window[index], comment_text, sentiment, score)
+                            settle(post_index)
+                        elif not submit(post_index, scorer, number + 1):
+                            settle(post_index)
+
+                def ready():
+                    nonlocal next_index
+                    while next_index in finished:
+                        record = finished.pop(next_index)
+                        next_index += 1
+                        if record:
+                            yield record
+
+                for post_index, (post, valid_comments, error) in enumerate(post_comments):
+                    windows = _candidate_windows(scorers, valid_comments, min_comment_length, metrics)
+                    if has_candidates(post, windows, error):
+                        posts[post_index] = [post, windows, {}, len(scorers)]
+                        for scorer in scorers:
+                            if not submit(post_index, scorer, 0):
+                                settle(post_index)
+                    else:
+                        skipped_posts += 1
+                        finished[post_index] = None
+                    collect([future for future in pending if future.done()])
+                    yield from ready()
+
+                while pending:
+                    with timed(metrics, "pool_wait"):
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                    yield from ready()
+
+        print_summary(processed_posts, skipped_posts, cache, metrics=metrics)
+
+    except Exception as e:
+        print(f"Error accessing subreddit {subreddit_name}: {str(e)}")
+
+
+def _pearson(xs, ys):
+    n = len(xs)
+    if n < 2:
+        return None
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    spread_x = sum((x - mean_x) ** 2 for x in xs) ** 0.5
+    spread_y = sum((y - mean_y) ** 2 for y in ys) ** 0.5
+    if not spread_x or not spread_y:
+        return None
+    return covariance / (spread_x * spread_y)
+
+
+def agreement_stats(records, engines):
+    """
+    Compares each pair of engines over the posts both of them scored.
+
+    Returns:
+        dict: "a/b" -> {"posts": posts scored by both, "label_agreement":
+        share of them with the same label, "same_comment": posts where both
+        picked the same comment, "same_comment_agreement": label agreement
+        on those, "score_correlation": Pearson correlation of the scores}.
+        Shares are fractions, None when there is nothing to compare.
+    """
+    stats = {}
+    for a, b in combinations(engines, 2):
+        both = [record for record in records
+                if record[f"{a}_sentiment"] is not None and record[f"{b}_sentiment"] is not None]
+        same = [record for record in both if record[f"{a}_comment_id"] == record[f"{b}_comment_id"]]
+
+        def agreement(rows):
+            if not rows:
+                return None
+            return sum(row[f"{a}_sentiment"] == row[f"{b}_sentiment"] for row in rows) / len(rows)
+
+        stats[f"{a}/{b}"] = {
+            "posts": len(both),
+            "label_agreement": agreement(both),
+            "same_comment": len(same),
+            "same_comment_agreement": agreement(same),
+            "score_correlation": _pearson([row[f"{a}_score"] for row in both],
+                                          [row[f"{b}_score"] for row in both]),
+        }
+    return stats
+
+
+def format_agreement(stats):
+    """
+    Formats agreement_stats as text, one line per pair of engines.
+    """
+    def share(value):
+        return "n/a" if value is None else f"{value * 100:.1f}%"
+
+    lines = []
+    for pair, pair_stats in stats.items():
+        correlation = pair_stats["score_correlation"]
+        lines.append(f"{pair}: {pair_stats['posts']} posts scored by both, "
+                     f"labels agree on {share(pair_stats['label_agreement'])}; "
+                     f"same comment on {pair_stats['same_comment']} posts, "
+                     f"labels agree on {share(pair_stats['same_comment_agreement'])}; "
+                     f"score correlation {'n/a' if correlation is None else f'{correlation:.3f}'}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score one fetch of a subreddit with several sentiment engines")
+    parser.add_argument("subreddit", help="Subreddit name, without the r/ prefix")
+    parser.add_argument("--engines", nargs="+", default=list(SCORERS), choices=list(SCORERS),
+                        help="Engines to compare")
+    parser.add_argument("--limit", type=int, default=100, help="Number of top posts")
+    parser.add_argument("--min-comment-length", type=int, default=10, help="Shorter comments are skipped")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Scoring processes; 0 uses one per CPU core, 1 scores in-process")
+    parser.add_argument("--fetch-concurrency", type=int, default=1, help="Comment trees fetched at once")
+    parser.add_argument("--cache", help="Post cache file, reusing listings and comment trees for 24 hours; "
+                                         "by default every run fetches live data")
+    parser.add_argument("--output", default="sentiment_comparison.csv", help="Combined results CSV")
+    args = parser.parse_args()
+
+    from post_cache import PostCache
+    from vadertest import print_cache_notice, save_to_csv
+
+    print(f"Starting comparison of {', '.join(args.engines)} on r/{args.subreddit}...")
+
+    cache = None
+    if args.cache:
+        cache = PostCache(args.cache)
+        print_cache_notice(cache)
+    run_metrics = RunMetrics()
+    records = ResultStore(iter_compared_posts(
+        args.subreddit, args.engines, limit=args.limit, min_comment_length=args.min_comment_length,
+        workers=args.workers, fetch_concurrency=args.fetch_concurrency, cache=cache, metrics=run_metrics
+    ))
+
+    print(f"\nRun Report:")
+    print(format_report(run_metrics.report()))
+    print(f"\nAgreement:")
+    print(format_agreement(agreement_stats(records, args.engines)))
+    save_to_csv(records, args.output)
+
+
+if __name__ == "__main__":
+    main()
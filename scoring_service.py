@@ -0,0 +1,334 @@
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import RunMetrics
+from vadertest import analyze_sentiment_vader, clean_text, get_batch_scorer, preprocess_text
+
+# HTTP scoring service.
+#
+#   POST /score        {"text": "..."}         -> {"sentiment", "compound", "neg", "neu", "pos"}
+#   POST /score_batch  {"texts": ["...", ...]} -> {"results": [...]}
+#   GET  /metrics      queue depth, batch sizes and latency percentiles
+#   GET  /health       {"status": "ok"}
+#
+# Concurrent requests are not scored one by one. Their texts go into a queue
+# and a single batching task takes them out in micro-batches: a batch closes
+# when it holds max_batch_size texts or max_latency seconds after its first
+# text arrived, and is scored at once by the vectorized VADER scorer on a
+# worker thread, so the event loop keeps accepting requests meanwhile. Under
+# load the queue fills while a batch is being scored and batches grow on their
+# own; when idle a lone request waits at most max_latency. The lexicon is
+# loaded and the scorer warmed up before the server starts listening.
+#
+# The server speaks plain HTTP/1.1 with keep-alive on asyncio streams, so it
+# needs no web framework.
+
+MAX_BODY_BYTES = 10 * 2 ** 20
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def score_texts(texts, preprocess=False):
+    """
+    Scores texts with the vectorized VADER scorer; with preprocess, they are
+    cleaned and preprocessed as in the analysis pipeline first.
+
+    Returns:
+        list: {"sentiment", "compound", "neg", "neu", "pos"} dicts, in order
+    """
+    if preprocess:
+        texts = [preprocess_text(clean_text(text)) for text in texts]
+    results = []
+    for text, scores in zip(texts, get_batch_scorer().polarity_scores_batch(texts)):
+        sentiment, compound = analyze_sentiment_vader(text, scores)
+        results.append({"sentiment": sentiment, "compound": compound,
+                        "neg": scores["neg"], "neu": scores["neu"], "pos": scores["pos"]})
+    return results
+
+
+class MicroBatcher:
+    """
+    Collects texts from concurrent requests into batches for score_batch.
+
+    Args:
+        score_batch (callable): Scores a list of texts, returning one result each
+        max_batch_size (int): Most texts scored at once
+        max_latency (float): Seconds a batch stays open after its first text
+        metrics (RunMetrics, optional): Records the "queue_wait" and
+            "score_batch" stages and the texts and batches counters
+    """
+
+    def __init__(self, score_batch, max_batch_size=64, max_latency=0.005, metrics=None):
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.metrics = metrics
+        self.max_queue_depth = 0
+        self.queue = None
+        self.task = None
+        # One scoring thread: batches are scored one after another
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.executor.shutdown()
+
+    @property
+    def queue_depth(self):
+        return self.queue.qsize() if self.queue is not None else 0
+
+    async def submit(self, texts):
+        """
+        Queues texts for scoring and returns their results, in order.
+        """
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self.queue.put_nowait((text, future, now))
+            futures.append(future)
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        return await asyncio.gather(*futures)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = batch[0][2] + self.max_latency
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            started = loop.time()
+            if self.metrics is not None:
+                for _, _, enqueued in batch:
+                    self.metrics.record("queue_wait", started - enqueued)
+            try:
+                results = await loop.run_in_executor(self.executor, self.score_batch, [text for text, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            if self.metrics is not None:
+                self.metrics.record("score_batch", loop.time() - started, len(batch))
+                self.metrics.count("texts", len(batch))
+                self.metrics.count("batches")
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+class _HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ScoringService:
+    """
+    Asyncio HTTP server in front of a MicroBatcher.
+
+    Args:
+        host (str): Address to listen on
+        port (int): Port to listen on, 0 for any free port
+        max_batch_size (int): Most texts scored at once
+        max_latency (float): Seconds a micro-batch stays open after its first text
+        preprocess (bool): Clean and preprocess texts before scoring, as the
+            analysis pipeline does
+    """
+
+    def __init__(self, host="127.0.0.1", port=8080, max_batch_size=64, max_latency=0.005, preprocess=False):
+        self.host = host
+        self.port = port
+        self.metrics = RunMetrics()
+        self.batcher = MicroBatcher(lambda texts: score_texts(texts, preprocess), max_batch_size,
+                                    max_latency, self.metrics)
+        self.server = None
+
+    async def start(self):
+        """
+        Warms up the scorer, then starts listening. Returns the bound port.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.batcher.executor, self.batcher.score_batch, ["Warming up is great!"])
+        self.batcher.start()
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        await self.batcher.stop()
+
+    def metrics_report(self):
+        """
+        Returns the service metrics: current and highest queue depth, request
+        and text counts, mean batch size and per-stage latency percentiles
+        ("request" end to end, "queue_wait", "score_batch").
+        """
+        report = self.metrics.report()
+        counters = report["counters"]
+        batches = counters.get("batches", 0)
+        return {
+            "uptime_seconds": report["wall_seconds"],
+            "queue_depth": self.batcher.queue_depth,
+            "max_queue_depth": self.batcher.max_queue_depth,
+            "max_batch_size": self.batcher.max_batch_size,
+            "max_latency_ms": self.batcher.max_latency * 1000,
+            "mean_batch_size": counters.get("texts", 0) / batches if batches else 0,
+            "counters": counters,
+            "stages": report["stages"],
+        }
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except _HttpError as e:
+                    # The rest of the stream cannot be trusted: answer and hang up
+                    self.metrics.count("errors")
+                    self._write_response(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                start = time.perf_counter()
+                try:
+                    status, payload = 200, await self._route(method, path, body)
+                except _HttpError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+                if status != 200:
+                    self.metrics.count("errors")
+                if path.startswith("/score"):
+                    self.metrics.record("request", time.perf_counter() - start)
+                    self.metrics.count("requests")
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise _HttpError(400, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise _HttpError(413, f"Request bodies are limited to {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method, target.split("?", 1)[0], headers, body
+
+    def _write_response(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body
+        )
+
+    async def _route(self, method, path, body):
+        if path in ("/health", "/metrics"):
+            if method != "GET":
+                raise _HttpError(405, f"{path} only accepts GET")
+            return {"status": "ok"} if path == "/health" else self.metrics_report()
+        if path not in ("/score", "/score_batch"):
+            raise _HttpError(404, f"No endpoint {path}")
+        if method != "POST":
+            raise _HttpError(405, f"{path} only accepts POST")
+        try:
+            request = json.loads(body)
+        except ValueError:
+            raise _HttpError(400, "The body must be JSON")
+        if path == "/score":
+            text = request.get("text") if isinstance(request, dict) else None
+            if not isinstance(text, str):
+                raise _HttpError(400, 'Expected {"text": "..."}')
+            return (await self.batcher.submit([text]))[0]
+        texts = request.get("texts") if isinstance(request, dict) else None
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            raise _HttpError(400, 'Expected {"texts": ["...", ...]}')
+        return {"results": await self.batcher.submit(texts)}
+
+
+async def serve(host="127.0.0.1", port=8080, **options):
+    """
+    Runs a ScoringService until cancelled.
+    """
+    service = ScoringService(host, port, **options)
+    await service.start()
+    print(f"Scoring service listening on http://{service.host}:{service.port} "
+          f"(micro-batches of up to {service.batcher.max_batch_size} texts, "
+          f"{service.batcher.max_latency * 1000:g} ms window)", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve VADER sentiment scores over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch-size", type=int, default=64, help="Most texts scored in one micro-batch")
+    parser.add_argument("--max-latency-ms", type=float, default=5.0,
+                        help="Milliseconds a micro-batch waits for more texts after its first one")
+    parser.add_argument("--preprocess", action="store_true",
+                        help="Clean and preprocess texts as the analysis pipeline does before scoring")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, max_batch_size=args.max_batch_size,
+                          max_latency=args.max_latency_ms / 1000, preprocess=args.preprocess))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
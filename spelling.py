@@ -0,0 +1,223 @@
+import functools
+import re
+import string
+import threading
+
+import numpy as np
+
+# Spelling correction that gives the same output as TextBlob's correct().
+#
+# TextBlob (after Norvig) corrects each word by generating every string one
+# edit away (~54n+25 strings for an n-letter word) and, when none of them is a
+# known word, every string two edits away (~(54n+25)^2, hundreds of thousands),
+# then picks the most frequent known word. That costs up to a second per word.
+#
+# Here the dictionary is indexed up front by its deletion neighbourhood (every
+# string obtained by deleting up to MAX_DISTANCE characters from a word), as in
+# SymSpell. A word within two edits of the input shares at least one such
+# deletion with it, so looking up the input's own deletions (at most a few
+# hundred strings) yields a small candidate set. The exact edit distance of
+# each candidate then decides between the same "one edit" and "two edits"
+# tiers TextBlob uses, and the winner is chosen by TextBlob's rules:
+# highest frequency, ties going to the alphabetically last word, and title
+# case preserved. The edit distance is the unrestricted Damerau-Levenshtein
+# distance, which counts exactly the deletions, adjacent transpositions,
+# substitutions and insertions TextBlob applies one after another.
+#
+# To keep the index small, deletions are stored by their hash in one sorted
+# array, alongside the id of the word they came from. A hash collision only
+# adds a candidate, which the distance check then rejects.
+#
+# Corrections are cached per word in an LRU cache, since comment text repeats
+# the same words over and over.
+
+MAX_DISTANCE = 2
+
+# Per-word corrections kept by each corrector
+WORD_CACHE_SIZE = 100_000
+
+# The tokenization TextBlob's correct() uses: words, punctuation, whitespace
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]|\s", re.UNICODE | re.MULTILINE | re.DOTALL)
+
+# textblob._text.PUNCTUATION; TextBlob tests tokens with a substring check
+PUNCTUATION = ".,;:!?()[]{}`''\"@#$^&*+-|=~_"
+
+_lock = threading.Lock()
+_corrector = None
+
+
+def load_frequencies(path=None):
+    """
+    Reads a TextBlob spelling model: one "word count" pair per line.
+
+    Args:
+        path (str, optional): Model file; defaults to TextBlob's English model
+
+    Returns:
+        dict: Word -> count
+    """
+    if path is None:
+        from textblob.en import spelling
+        path = spelling.path
+
+    frequencies = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith(";;;"):
+                continue
+            word, count = line.split()[:2]
+            frequencies[word] = int(count)
+    return frequencies
+
+
+def _deletes(word, distance=MAX_DISTANCE):
+    """
+    Returns the set of strings obtained by deleting up to distance characters.
+    """
+    result = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        result |= frontier
+    return result
+
+
+def edit_distance(a, b):
+    """
+    Unrestricted Damerau-Levenshtein distance between two strings.
+
+    Counts the minimum number of single-character deletions, insertions,
+    substitutions and adjacent transpositions turning a into b, allowing a
+    substring to be edited more than once (so "ca" -> "abc" is 2).
+    """
+    inf = len(a) + len(b)
+    last_row = {}
+    # Rows and columns are shifted by one to hold the sentinel
+    d = [[inf] * (len(b) + 2)]
+    d += [[inf] + list(range(len(b) + 1))]
+    for i in range(1, len(a) + 1):
+        d.append([inf, i] + [0] * len(b))
+        last_match_col = 0
+        char = a[i - 1]
+        for j in range(1, len(b) + 1):
+            k = last_row.get(b[j - 1], 0)
+            l = last_match_col
+            if char == b[j - 1]:
+                cost = 0
+                last_match_col = j
+            else:
+                cost = 1
+            d[i + 1][j + 1] = min(
+                d[i][j] + cost,
+                d[i + 1][j] + 1,
+                d[i][j + 1] + 1,
+                d[k][l] + (i - k - 1) + 1 + (j - l - 1),
+            )
+        last_row[char] = i
+    return d[len(a) + 1][len(b) + 1]
+
+
+class SpellingCorrector:
+    """
+    Drop-in replacement for TextBlob's spelling correction.
+
+    correct(text) returns the same string as str(TextBlob(text).correct()),
+    and correct_word(word) the same as TextBlob's Word(word).correct().
+
+    Args:
+        frequencies (dict): Word -> count, e.g. from load_frequencies()
+        cache_size (int): Per-word corrections kept in the LRU cache
+    """
+
+    def __init__(self, frequencies, cache_size=WORD_CACHE_SIZE):
+        self.frequencies = frequencies
+        self.words = list(frequencies)
+
+        hashes = []
+        ids = []
+        for word_id, word in enumerate(self.words):
+            for deletion in _deletes(word):
+                hashes.append(hash(deletion))
+                ids.append(word_id)
+        hashes = np.array(hashes, dtype=np.int64)
+        order = np.argsort(hashes, kind="stable")
+        self._hashes = hashes[order]
+        self._ids = np.array(ids, dtype=np.int32)[order]
+
+        self.correct_word = functools.lru_cache(maxsize=cache_size)(self._correct_word)
+
+    def candidates(self, word):
+        """
+        Returns the known words within MAX_DISTANCE edits of word, closest
+        first, the way TextBlob tiers them: the word itself if known, else
+        the known words one edit away, else those two edits away.
+
+        Returns:
+            list: Candidate words, empty when none are close enough
+        """
+        if word in self.frequencies:
+            return [word]
+
+        keys = np.fromiter((hash(deletion) for deletion in _deletes(word)), dtype=np.int64)
+        starts = np.searchsorted(self._hashes, keys, side="left")
+        ends = np.searchsorted(self._hashes, keys, side="right")
+        ids = set()
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            if start != end:
+                ids.update(self._ids[start:end].tolist())
+
+        tiers = ([], [])
+        for word_id in ids:
+            candidate = self.words[word_id]
+            if abs(len(candidate) - len(word)) > MAX_DISTANCE:
+                continue
+            distance = edit_distance(word, candidate)
+            if distance <= MAX_DISTANCE:
+                tiers[distance - 1].append(candidate)
+        return tiers[0] or tiers[1]
+
+    def _correct_word(self, word):
+        # Same special cases as textblob._text.Spelling.suggest
+        if len(word) == 1 or word in PUNCTUATION or word in string.whitespace or word.replace(".", "").isdigit():
+            return word
+        candidates = self.candidates(word)
+        if not candidates:
+            best = word
+        else:
+            frequencies = self.frequencies
+            best = max(candidates, key=lambda candidate: (frequencies[candidate], candidate))
+        if word.istitle():
+            best = best.title()
+        return best
+
+    def correct(self, text):
+        """
+        Corrects the spelling of every word in text, keeping punctuation
+        and whitespace as they are.
+        """
+        return "".join([self.correct_word(token) for token in TOKEN_PATTERN.findall(text)])
+
+    def cache_info(self):
+        return self.correct_word.cache_info()
+
+
+def get_corrector():
+    """
+    Returns the shared corrector for TextBlob's English model, building its
+    index on first use (about two seconds).
+    """
+    global _corrector
+    if _corrector is None:
+        with _lock:
+            if _corrector is None:
+                _corrector = SpellingCorrector(load_frequencies())
+    return _corrector
+
+
+def correct(text):
+    """
+    Corrects the spelling of text with the shared corrector; returns the
+    same string as str(TextBlob(text).correct()).
+    """
+    return get_corrector().correct(text)
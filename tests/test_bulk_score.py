@@ -0,0 +1,40 @@
+import os
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bulk_score import iter_scored, read_records
+
+LINES = [
+    '{"id": "a", "body": "I love this so much, best thing ever"}',
+    "[1]",
+    '"x"',
+    '{"id": "b", "body": 5}',
+    "{bad",
+    '{"body": "This is awful and I hate it so much"}',
+    '{"id": "c"}',
+]
+
+
+def test_invalid_records_are_skipped_and_counted(tmp_path):
+    path = tmp_path / "comments.jsonl"
+    path.write_text("\n".join(LINES) + "\n", encoding="utf-8")
+    skipped = Counter()
+
+    records = read_records([str(path)], skipped=skipped)
+    scored = list(iter_scored(records, workers=1, skipped=skipped))
+
+    # Skipped records keep their position, so default ids do not shift
+    assert [record["id"] for record in scored] == ["a", 2, "c"]
+    assert scored[0]["sentiment"] == 1 and scored[1]["sentiment"] == -1
+    assert scored[2]["sentiment"] is None
+    assert skipped == {"not an object": 2, "malformed line": 1, "text not a string": 1}
+
+
+def test_records_that_are_not_dicts_are_skipped():
+    skipped = Counter()
+    scored = list(iter_scored([["body"], {"id": "a", "body": "Great answer, thank you so much"}],
+                              workers=1, skipped=skipped))
+    assert [record["id"] for record in scored] == ["a"]
+    assert skipped == {"not an object": 1}
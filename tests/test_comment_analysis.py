@@ -0,0 +1,41 @@
+import csv
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+textblob = pytest.importorskip("textblob")
+
+import blobtest
+from blobtest import CommentAnalysis, analyze_sentiment, is_meaningful
+from instrumentation import RunMetrics
+
+
+def texts():
+    found = ["I really love this, it's great!", "Not bad... but not good either?", "", "The end."]
+    with open(os.path.join(REPO_ROOT, "sentiment_analysis_results.csv"), newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            found.append(row["title"])
+            found.append(row["comment_text"])
+            found.append(blobtest.preprocess_text(blobtest.clean_text(row["comment_text"])))
+    return found
+
+
+def test_sentiment_matches_textblob():
+    for text in texts():
+        analysis = CommentAnalysis(text)
+        assert analysis.sentiment == tuple(textblob.TextBlob(text).sentiment), text
+        assert is_meaningful(analysis) == is_meaningful(text)
+        assert analyze_sentiment(analysis) == analyze_sentiment(text)
+
+
+def test_sentiment_is_computed_once():
+    metrics = RunMetrics()
+    analysis = CommentAnalysis("What a wonderful, thoughtful reply", metrics)
+    is_meaningful(analysis)
+    analyze_sentiment(analysis)
+    assert metrics.counters["sentiment_computations"] == 1
+    assert metrics.counters["sentiment_computations_avoided"] == 1
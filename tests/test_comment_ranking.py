@@ -0,0 +1,46 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comment_ranking import CommentTree, RankedComments
+
+
+class Comment:
+    def __init__(self, score, valid=True, replies=()):
+        self.score = score
+        self.valid = valid
+        self.replies = list(replies)
+
+
+def test_ranking_matches_a_stable_sort_past_the_first_window():
+    rng = random.Random(0)
+    comments = [Comment(rng.randint(-3, 5), rng.random() < 0.8) for _ in range(200)]
+    expected = sorted((c for c in comments if c.valid), key=lambda c: c.score, reverse=True)
+    for window in (1, 3, 8):
+        ranked = list(RankedComments(comments, lambda c: c.valid, window=window))
+        assert [id(c) for c in ranked] == [id(c) for c in expected]
+
+
+def test_each_pass_keeps_at_most_one_window(monkeypatch):
+    comments = [Comment(0) for _ in range(50)]
+    ranked = RankedComments(comments, lambda c: c.valid, window=4)
+    sizes = []
+    top = ranked._top
+
+    def recorded_top(bound=None):
+        window = top(bound)
+        sizes.append(len(window))
+        return window
+
+    monkeypatch.setattr(ranked, "_top", recorded_top)
+    assert len(list(ranked)) == 50
+    assert max(sizes) == 4
+
+
+def test_comment_tree_walks_breadth_first():
+    leaf = Comment(3)
+    tree = CommentTree([Comment(1, replies=[leaf]), Comment(2)])
+    assert [c.score for c in tree] == [1, 2, 3]
+    assert [c.score for c in tree] == [1, 2, 3]
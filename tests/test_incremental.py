@@ -0,0 +1,129 @@
+import csv
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vadertest
+from incremental import RefreshState
+from post_cache import PostCache
+
+
+class Author:
+    def __init__(self, name):
+        self.name = name
+
+
+class Comment:
+    def __init__(self, id, body, score, edited=False):
+        self.id = id
+        self.body = body
+        self.score = score
+        self.author = Author("someone")
+        self.created_utc = 0
+        self.edited = edited
+        self.replies = []
+
+
+class Forest(list):
+    def replace_more(self, limit=0):
+        return []
+
+
+class Post:
+    def __init__(self, id, comments):
+        self.id = id
+        self.title = f"Post {id}"
+        self.permalink = f"/r/test/comments/{id}/x/"
+        self.score = 10
+        self.stickied = False
+        self.num_comments = len(comments)
+        self.comments = Forest(comments)
+
+
+class Reddit:
+    def __init__(self, posts):
+        self.posts = posts
+
+    def subreddit(self, name):
+        return self
+
+    def top(self, limit=100):
+        return iter(self.posts[:limit])
+
+
+def run(posts, cache, state, monkeypatch):
+    monkeypatch.setattr(vadertest, "get_reddit", lambda: Reddit(posts))
+    return list(vadertest.iter_top_posts("test", limit=10, cache=cache, state=state))
+
+
+def test_incremental_rerun_sees_edits_despite_shared_cache(tmp_path, monkeypatch):
+    cache = PostCache(":memory:")
+    state = RefreshState(str(tmp_path / "state.json"))
+    comment = Comment("c1", "I absolutely love this wonderful community", 50)
+    posts = [Post("p1", [comment, Comment("c2", "This is a terrible and awful idea", 5)])]
+
+    (first,) = run(posts, cache, state, monkeypatch)
+    assert first["sentiment"] == 1
+    assert state.summary()["rescored_comments"] == 1
+
+    # Edited after the first run; a cached comment tree would hide the change
+    posts = [Post("p1", [Comment("c1", "I absolutely hate this horrible community", 50, edited=1700000000.0),
+                         Comment("c2", "This is a terrible and awful idea", 5)])]
+    (second,) = run(posts, cache, state, monkeypatch)
+    assert second["sentiment"] == -1
+    assert second["comment_text"] != first["comment_text"]
+    # Counters cover the second run only
+    assert state.summary() == {"reused_posts": 0, "reranked_posts": 1, "rescored_comments": 1,
+                               "reused_comments": 0}
+    # The fresh comment tree was written back to the cache
+    assert cache.get_comments("p1")[0].body == "I absolutely hate this horrible community"
+
+
+def test_incremental_rerun_reuses_unchanged_posts(tmp_path, monkeypatch):
+    cache = PostCache(":memory:")
+    state = RefreshState(str(tmp_path / "state.json"))
+    posts = [Post("p1", [Comment("c1", "I absolutely love this wonderful community", 50)])]
+
+    first = run(posts, cache, state, monkeypatch)
+    second = run(posts, cache, state, monkeypatch)
+    assert first == second
+    assert state.summary()["reused_posts"] == 1
+    assert state.summary()["reranked_posts"] == 0
+
+
+def test_incremental_scores_only_comments_with_enough_words(tmp_path, monkeypatch):
+    state = RefreshState(str(tmp_path / "state.json"))
+    posts = [Post("p1", [Comment("c1", "Love this so much", 50),
+                         Comment("c2", "I absolutely love this wonderful community", 5)])]
+    scored = []
+    analyzer = vadertest.get_analyzer()
+    monkeypatch.setattr(vadertest, "get_analyzer", lambda: analyzer)
+    polarity_scores = analyzer.polarity_scores
+    monkeypatch.setattr(analyzer, "polarity_scores", lambda text: scored.append(text) or polarity_scores(text))
+
+    monkeypatch.setattr(vadertest, "get_reddit", lambda: Reddit(posts))
+    (first,) = vadertest.iter_top_posts("test", limit=10, state=state, min_words=4)
+    assert len(scored) == 1
+    assert first["comment_text"] == scored[0]
+
+    # The short comment kept from the first run is scored once it is long enough
+    (second,) = vadertest.iter_top_posts("test", limit=10, state=state, min_words=2)
+    assert len(scored) == 2
+    assert second["comment_text"] == scored[1]
+    assert state.summary()["reused_comments"] == 1
+
+
+def record(url, upvotes):
+    return {"title": url, "url": url, "post_upvotes": upvotes, "comment_text": "text", "sentiment": 1}
+
+
+def test_merge_replaces_rows_and_drops_posts_no_longer_returned(tmp_path):
+    path = str(tmp_path / "results.csv")
+    vadertest.save_to_csv([record("a", 1), record("b", 2)], path)
+
+    vadertest.merge_into_csv([record("b", 5), record("c", 3)], path)
+
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [(row["url"], row["post_upvotes"]) for row in rows] == [("b", "5"), ("c", "3")]
@@ -0,0 +1,82 @@
+import os
+import random
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bulk_score import iter_scored
+from near_duplicates import NearDuplicateIndex
+
+BASE = "the quick brown fox jumps over the lazy dog near the river bank today"
+OTHER = "completely unrelated sentence about cooking pasta with garlic and olive oil"
+
+
+def shingles(text, k=5):
+    data = text.encode("utf-8")
+    return {data[i:i + k] for i in range(max(len(data) - k + 1, 1))}
+
+
+def random_texts(n, seed=0):
+    rng = random.Random(seed)
+    words = ["".join(rng.choice("abcdefghij") for _ in range(rng.randint(3, 7))) for _ in range(300)]
+    texts = []
+    for _ in range(n):
+        if texts and rng.random() < 0.3:
+            tokens = rng.choice(texts).split()
+            tokens.append(rng.choice(words))
+            texts.append(" ".join(tokens))
+        else:
+            texts.append(" ".join(rng.choice(words) for _ in range(rng.randint(10, 25))))
+    return texts
+
+
+def test_copies_and_light_edits_join_the_first_comments_cluster():
+    index = NearDuplicateIndex(threshold=0.8)
+    clusters, new = index.assign([BASE, OTHER, BASE, BASE + " lol", ""])
+    assert clusters == [0, 1, 0, 0, None]
+    assert new == [True, True, False, False, False]
+    assert index.stats()["largest_clusters"][0] == 3
+    assert index.stats()["duplicates"] == 2
+
+
+def test_clusters_do_not_depend_on_batch_boundaries():
+    texts = random_texts(300)
+    expected = NearDuplicateIndex(batch_size=1024).assign(texts)
+    assert NearDuplicateIndex(batch_size=1).assign(texts) == expected
+    chunked = NearDuplicateIndex(batch_size=16)
+    clusters, new = [], []
+    for start in range(0, len(texts), 50):
+        batch_clusters, batch_new = chunked.assign(texts[start:start + 50])
+        clusters += batch_clusters
+        new += batch_new
+    assert (clusters, new) == expected
+
+
+def test_signature_agreement_estimates_shingle_jaccard():
+    index = NearDuplicateIndex(num_perm=256, bands=8)
+    texts = random_texts(200, seed=1)
+    rng = random.Random(2)
+    errors = []
+    for _ in range(100):
+        a, b = rng.sample(texts, 2)
+        b = " ".join(a.split()[:rng.randint(3, 10)] + b.split())
+        signatures = index.signatures_of([a, b])
+        estimate = np.mean(signatures[0] == signatures[1])
+        exact = len(shingles(a) & shingles(b)) / len(shingles(a) | shingles(b))
+        errors.append(abs(estimate - exact))
+    assert np.mean(errors) < 0.05
+    assert max(errors) < 0.2
+
+
+def test_bulk_scoring_reuses_the_representatives_scores():
+    body = "I love this so much, best thing ever honestly"
+    records = [{"id": "a", "body": body}, {"id": "b", "body": body + "!!"},
+               {"id": "c", "body": "What a terrible, awful, horrible decision this was"}]
+    plain = {record["id"]: record for record in iter_scored(records, workers=1)}
+    clustered = {record["id"]: record for record in iter_scored(records, workers=1,
+                                                                 near_duplicates=NearDuplicateIndex(0.8))}
+    assert clustered["a"]["cluster"] == clustered["b"]["cluster"] != clustered["c"]["cluster"]
+    assert clustered["b"]["compound"] == plain["a"]["compound"]
+    assert clustered["c"]["compound"] == plain["c"]["compound"]
@@ -0,0 +1,82 @@
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vadertest
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    created = []
+
+    def create():
+        created.append(object())
+        return created[-1]
+
+    monkeypatch.setattr(vadertest, "reddit", None)
+    monkeypatch.setattr(vadertest, "_create_reddit", create)
+    vadertest.configure_reddit()
+    yield created
+    vadertest.configure_reddit()
+
+
+def fetch(_):
+    with vadertest.reddit_client():
+        client = vadertest.get_reddit()
+        time.sleep(0.01)
+        assert vadertest.get_reddit() is client
+        return client
+
+
+def test_fetch_workers_borrow_and_return_their_own_clients(clients):
+    with ThreadPoolExecutor(4) as pool:
+        first = set(map(id, pool.map(fetch, range(16))))
+    with ThreadPoolExecutor(4) as pool:
+        second = set(map(id, pool.map(fetch, range(16))))
+    assert len(first) > 1 and second <= first
+    assert len(vadertest._idle_clients) == len(clients) <= 4
+    # Code outside a fetch worker has a client of its own
+    assert vadertest.get_reddit() not in vadertest._idle_clients
+
+
+def test_client_is_returned_when_the_fetch_fails(clients):
+    with pytest.raises(RuntimeError):
+        with vadertest.reddit_client():
+            vadertest.get_reddit()
+            raise RuntimeError("request failed")
+    assert len(vadertest._idle_clients) == 1
+
+
+def test_blocks_served_from_the_cache_take_no_client(clients):
+    with vadertest.reddit_client():
+        pass
+    assert clients == []
+
+
+def test_assigned_client_is_used_by_one_fetch_at_a_time(clients, monkeypatch):
+    shared = object()
+    monkeypatch.setattr(vadertest, "reddit", shared)
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def use(_):
+        with vadertest.reddit_client():
+            client = vadertest.get_reddit()
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.005)
+            with lock:
+                active[0] -= 1
+            return client
+
+    with ThreadPoolExecutor(4) as pool:
+        assert set(pool.map(use, range(12))) == {shared}
+    assert peak[0] == 1
+    assert clients == []
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_store import ResultStore
+
+
+def test_append_after_to_arrow_keeps_exported_table():
+    pytest.importorskip("pyarrow")
+    store = ResultStore([{"title": "first", "score": 1}, {"title": None, "score": 2}])
+    table = store.to_arrow()
+
+    # Outgrows the text buffer the table was built from
+    store.append({"title": "second " * 1000, "score": 3})
+
+    assert table.to_pylist() == [{"title": "first", "score": 1}, {"title": None, "score": 2}]
+    assert len(store) == 3
+    assert store.to_arrow().column("title").to_pylist()[-1] == "second " * 1000
+
+
+def test_rejected_record_leaves_store_unchanged():
+    store = ResultStore([{"title": "first", "score": 1}])
+
+    with pytest.raises(KeyError):
+        store.append({"title": "second", "upvotes": 2})
+    with pytest.raises(TypeError):
+        store.append({"title": "second", "score": "many"})
+    with pytest.raises(TypeError):
+        store.append({"title": 3, "score": 2})
+
+    store.append({"title": "second", "score": 2.5})
+    assert list(store) == [{"title": "first", "score": 1.0}, {"title": "second", "score": 2.5}]
+    assert all(column.size == 2 for column in store.columns.values())
+
+
+def test_rejected_first_record_creates_no_columns():
+    store = ResultStore()
+    with pytest.raises(TypeError):
+        store.append({"title": "first", "score": object()})
+    store.append({"url": "a"})
+    assert list(store) == [{"url": "a"}]
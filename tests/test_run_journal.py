@@ -0,0 +1,87 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vadertest
+from run_journal import RunJournal
+from test_incremental import Comment, Post, Reddit
+
+BODIES = ["I absolutely love this wonderful community", "This is a terrible and awful idea",
+          "What a great and thoughtful answer", "too short"]
+
+
+class CountedPost(Post):
+    fetched = []
+
+    def __getattribute__(self, name):
+        if name == "comments":
+            CountedPost.fetched.append(object.__getattribute__(self, "id"))
+        return object.__getattribute__(self, name)
+
+
+def posts():
+    made = [CountedPost(f"p{i}", [Comment(f"c{i}", BODIES[i % len(BODIES)], 10)]) for i in range(8)]
+    made[3].stickied = True
+    return made
+
+
+def run(path, monkeypatch, resume=False, stop_after=None):
+    monkeypatch.setattr(vadertest, "get_reddit", lambda: Reddit(posts()))
+    journal = RunJournal(path, resume=resume)
+    records = []
+    try:
+        for record in vadertest.iter_top_posts("test", limit=10, journal=journal):
+            records.append(record)
+            if len(records) == stop_after:
+                break
+    finally:
+        journal.close()
+    return records
+
+
+def test_resumed_run_replays_settled_posts_and_matches_uninterrupted_run(tmp_path, monkeypatch):
+    expected = run(str(tmp_path / "full.jsonl"), monkeypatch)
+    assert not os.path.exists(tmp_path / "full.jsonl")
+
+    path = str(tmp_path / "journal.jsonl")
+    CountedPost.fetched = []
+    first = run(path, monkeypatch, stop_after=2)
+    settled = set(CountedPost.fetched)
+    assert os.path.exists(path)
+
+    CountedPost.fetched = []
+    resumed = run(path, monkeypatch, resume=True)
+    assert first + resumed[len(first):] == expected
+    assert resumed == expected
+    # Settled posts are replayed from the journal, not fetched again
+    assert settled and CountedPost.fetched
+    assert not settled & set(CountedPost.fetched)
+    assert not os.path.exists(path)
+
+
+def test_resume_with_other_settings_is_refused(tmp_path, monkeypatch):
+    path = str(tmp_path / "journal.jsonl")
+    run(path, monkeypatch, stop_after=1)
+    journal = RunJournal(path, resume=True)
+    with pytest.raises(ValueError):
+        list(vadertest.iter_top_posts("test", limit=5, journal=journal))
+    journal.close()
+
+
+def test_torn_last_line_is_dropped(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    with RunJournal(path) as journal:
+        journal.begin({"a": 1})
+        journal.record("p1", {"title": "one"})
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"post": "p2", "rec')
+
+    journal = RunJournal(path, resume=True)
+    assert list(journal.records) == ["p1"]
+    journal.record("p2", None, skipped=True)
+    journal.close()
+    with RunJournal(path, resume=True) as journal:
+        assert journal.replay("p2") == (None, True)
@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+textblob = pytest.importorskip("textblob")
+
+import spelling
+
+# Misspellings one and two edits away, capitalized and apostrophe words,
+# numbers and words TextBlob leaves alone
+TEXTS = [
+    "I havv goood speling",
+    "Thiss is teh best postt evr",
+    "Recieve the pakage tomorow",
+    "AI alignmnt is an unsolvd problm",
+    "dont worry it's fine 2 go",
+    "qwxz zzyzx",
+]
+
+
+def test_correct_matches_textblob():
+    assert [spelling.correct(text) for text in TEXTS] == [str(textblob.TextBlob(text).correct()) for text in TEXTS]
+
+
+def test_cached_corrections_are_stable():
+    corrector = spelling.SpellingCorrector(spelling.load_frequencies())
+    first = [corrector.correct(text) for text in TEXTS]
+    assert [corrector.correct(text) for text in TEXTS] == first
+    assert corrector.cache_info().hits > 0
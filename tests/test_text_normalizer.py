@@ -0,0 +1,60 @@
+import csv
+import os
+import re
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from text_normalizer import clean_batch, normalize
+from vadertest import clean_text
+
+
+def legacy_clean_text(text, remove_numbers=True, remove_emojis=True):
+    # The original five-pass clean_text, kept as the reference
+    if not text:
+        return ""
+    text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
+    if remove_emojis:
+        emoji_pattern = re.compile("["
+            u"\U0001F600-\U0001F64F"
+            u"\U0001F300-\U0001F5FF"
+            u"\U0001F680-\U0001F6FF"
+            u"\U0001F1E0-\U0001F1FF"
+            u"\U00002702-\U000027B0"
+            u"\U000024C2-\U0001F251"
+            "]+", flags=re.UNICODE)
+        text = emoji_pattern.sub(r'', text)
+    if remove_numbers:
+        text = re.sub(r'\d+', '', text)
+    text = re.sub(r'[^a-zA-Z\s\'\"]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def corpus():
+    texts = [
+        "Great post 😀👍 check https://example.com/a?b=1&c=%20 now!!",
+        "2024 was wild… 100% agree 🚀🚀",
+        "Ｆｕｌｌ-width ｔｅｘｔ and café — “quotes” 'single'\t\ttabs\nnewlines",
+        "http://a.b/c(d),e and https://x.y/%zz%41 left",
+        "",
+        None,
+    ]
+    with open(os.path.join(REPO_ROOT, "sentiment_analysis_results_VADER.csv"), newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            texts.append(row["title"])
+            texts.append(f"{row['comment_text']} see {row['url']} ({row['comment_upvotes']} upvotes)")
+    return texts
+
+
+@pytest.mark.parametrize("remove_numbers", [True, False])
+@pytest.mark.parametrize("remove_emojis", [True, False])
+def test_output_identical_to_legacy_clean_text(remove_numbers, remove_emojis):
+    texts = corpus()
+    expected = [legacy_clean_text(text, remove_numbers, remove_emojis) for text in texts]
+    assert [normalize(text, remove_numbers, remove_emojis) for text in texts] == expected
+    assert [clean_text(text, remove_numbers, remove_emojis) for text in texts] == expected
+    assert clean_batch(texts, remove_numbers, remove_emojis) == expected
@@ -0,0 +1,81 @@
+import csv
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from nltk.sentiment.vader import SentimentIntensityAnalyzer, VaderConstants
+
+from nltk_resources import VADER_LEXICON_RESOURCE, ensure_resource
+from vader_batch import SCORE_TOLERANCE, BatchVaderScorer
+from vader_lexicon import CompiledLexicon, compile_lexicon
+
+TEXTS = [
+    "I love this!!! :)",
+    "This is NOT good at all",
+    "The movie was kind of great, but the ending was terrible",
+    "At least it isn't the worst",
+    "He's very very VERY happy",
+    "I don't hate it, I just can't stand it",
+    "yeah right, the bomb",
+    "Never so bad, never this good",
+    "",
+    "?!",
+]
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    ensure_resource(VADER_LEXICON_RESOURCE)
+    return SentimentIntensityAnalyzer()
+
+
+def corpus():
+    with open(os.path.join(REPO_ROOT, "sentiment_analysis_results_VADER.csv"), newline="", encoding="utf-8") as f:
+        return TEXTS + [row["comment_text"] for row in csv.DictReader(f)]
+
+
+def assert_scores_match(analyzer, scorer):
+    texts = corpus()
+    for text, scores in zip(texts, scorer.polarity_scores_batch(texts)):
+        expected = analyzer.polarity_scores(text)
+        assert abs(scores["compound"] - expected["compound"]) <= SCORE_TOLERANCE + 1e-12, text
+        for key in ("neg", "neu", "pos"):
+            assert abs(scores[key] - expected[key]) <= 1e-3 + 1e-12, (text, key)
+
+
+def test_batch_scores_match_nltk(analyzer):
+    assert_scores_match(analyzer, BatchVaderScorer(analyzer.lexicon))
+
+
+def test_batch_scores_match_nltk_with_compiled_lexicon(analyzer, tmp_path):
+    path = str(tmp_path / "vader_lexicon.bin")
+    constants = VaderConstants()
+    compile_lexicon(analyzer.lexicon, constants.BOOSTER_DICT, constants.NEGATE, path)
+    assert_scores_match(analyzer, BatchVaderScorer(CompiledLexicon(path)))
+
+
+class ShiftedScorer:
+    # Batch scores with a fixed compound, to land within the tolerance of a threshold
+    def __init__(self, compounds):
+        self.compounds = compounds
+
+    def polarity_scores_batch(self, texts):
+        return [{"neg": 0.0, "neu": 1.0, "pos": 0.0, "compound": self.compounds[text]} for text in texts]
+
+
+def test_scores_near_a_threshold_are_decided_by_nltk(analyzer, monkeypatch):
+    import vadertest
+
+    texts = ["good enough answer here", "quite okay answer here", "absolutely wonderful amazing answer"]
+    compounds = {texts[0]: 0.1 - SCORE_TOLERANCE / 2, texts[1]: -0.05 - SCORE_TOLERANCE / 2, texts[2]: 0.5}
+    monkeypatch.setattr(vadertest, "get_batch_scorer", lambda: ShiftedScorer(compounds))
+
+    results = vadertest.score_comments(texts, min_words=3, min_compound_score=0.1)
+    for text, result in zip(texts[:2], results):
+        assert result == vadertest.score_comment(text, min_words=3, min_compound_score=0.1)
+    # Scores away from the thresholds are the batch scorer's
+    assert results[2]["compound"] == 0.5
@@ -0,0 +1,104 @@
+import re
+
+# Patterns are compiled once at import time and shared by every call.
+#
+# The original clean_text ran five regex substitutions per comment (URLs,
+# emojis, numbers, special characters, whitespace). Here they become:
+#
+#   1. URL removal, only attempted when the text contains "http".
+#   2. One removal pass for emoji characters and digits together. Both were
+#      deleted outright, so removing the union in one go is equivalent. Pure
+#      ASCII text cannot contain emojis, so it uses the digit-only pattern.
+#   3. Runs of special characters become a single space.
+#   4. Whitespace is collapsed with str.split/join, which uses the same
+#      definition of whitespace as the regex "\s" class.
+
+URL_PATTERN = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+
+EMOJI_CHARS = (
+    u"\U0001F600-\U0001F64F"  # emoticons
+    u"\U0001F300-\U0001F5FF"  # symbols & pictographs
+    u"\U0001F680-\U0001F6FF"  # transport & map symbols
+    u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
+    u"\U00002702-\U000027B0"
+    u"\U000024C2-\U0001F251"
+)
+
+SPECIAL_CHARS_PATTERN = re.compile(r'[^a-zA-Z\s\'\"]+')
+
+
+def _build_removal_pattern(remove_numbers, remove_emojis):
+    chars = ""
+    if remove_emojis:
+        chars += EMOJI_CHARS
+    if remove_numbers:
+        chars += r"\d"
+    if not chars:
+        return None
+    return re.compile(f"[{chars}]+", flags=re.UNICODE)
+
+
+# Keyed by (remove_numbers, remove_emojis, is_ascii)
+_REMOVAL_PATTERNS = {
+    (remove_numbers, remove_emojis, is_ascii): _build_removal_pattern(
+        remove_numbers, remove_emojis and not is_ascii)
+    for remove_numbers in (True, False)
+    for remove_emojis in (True, False)
+    for is_ascii in (True, False)
+}
+
+
+def normalize(text, remove_numbers=True, remove_emojis=True):
+    """
+    Cleans a single piece of text using the precompiled patterns.
+
+    Args:
+        text (str): Input text to clean
+        remove_numbers (bool): Whether to remove numerical digits
+        remove_emojis (bool): Whether to remove emoji characters
+    """
+    if not text:
+        return ""
+
+    if 'http' in text:
+        text = URL_PATTERN.sub('', text)
+
+    removal = _REMOVAL_PATTERNS[(bool(remove_numbers), bool(remove_emojis), text.isascii())]
+    if removal is not None:
+        text = removal.sub('', text)
+
+    return ' '.join(SPECIAL_CHARS_PATTERN.sub(' ', text).split())
+
+
+def clean_batch(texts, remove_numbers=True, remove_emojis=True):
+    """
+    Cleans many texts at once, resolving the options a single time.
+
+    Args:
+        texts (iterable): Texts to clean
+        remove_numbers (bool): Whether to remove numerical digits
+        remove_emojis (bool): Whether to remove emoji characters
+
+    Returns:
+        list: Cleaned texts in the same order as the input
+    """
+    remove_numbers = bool(remove_numbers)
+    remove_emojis = bool(remove_emojis)
+    ascii_removal = _REMOVAL_PATTERNS[(remove_numbers, remove_emojis, True)]
+    unicode_removal = _REMOVAL_PATTERNS[(remove_numbers, remove_emojis, False)]
+    strip_urls = URL_PATTERN.sub
+    replace_special = SPECIAL_CHARS_PATTERN.sub
+
+    cleaned = []
+    append = cleaned.append
+    for text in texts:
+        if not text:
+            append("")
+            continue
+        if 'http' in text:
+            text = strip_urls('', text)
+        removal = ascii_removal if text.isascii() else unicode_removal
+        if removal is not None:
+            text = removal.sub('', text)
+        append(' '.join(replace_special(' ', text).split()))
+    return cleaned
@@ -0,0 +1,374 @@
+import string
+
+import numpy as np
+from nltk.sentiment.vader import VaderConstants
+
+from vader_lexicon import OOV as _OOV, OOV_NEGATED as _OOV_NEGATED, CompiledLexicon, build_tables
+
+# Vectorized re-implementation of NLTK's SentimentIntensityAnalyzer.polarity_scores.
+#
+# Texts are tokenized in Python exactly like NLTK's SentiText, and every token
+# is mapped to an integer id through a vocabulary built once from the lexicon,
+# booster and negation tables. All tokens of a batch are then laid out in flat
+# NumPy buffers, and the valence, capitalization, booster, negation, "least",
+# idiom and "but" rules are applied as array operations over the whole batch.
+#
+# Scores agree with NLTK up to floating point rounding. Sums are accumulated in
+# the same order as NLTK, but the final rounding uses np.round rather than
+# Python's round, which can differ on exact ties. The documented tolerance is
+# SCORE_TOLERANCE for compound and 0.001 for neg/neu/pos, one unit in the last
+# reported digit.
+
+SCORE_TOLERANCE = 1e-4
+
+_CONSTANTS = VaderConstants()
+_PUNCTUATION = frozenset(string.punctuation)
+_PUNC_LIST = frozenset(_CONSTANTS.PUNC_LIST)
+
+# Exact-case words that some rules compare without lowercasing
+_EXACT_NEVER = "never"
+_EXACT_SO_THIS = ("so", "this")
+
+
+class BatchVaderScorer:
+    """
+    Scores many texts at once with the VADER rules, using NumPy buffers.
+
+    Args:
+        lexicon (dict or CompiledLexicon): VADER lexicon mapping lowercase
+            words to valences, typically SentimentIntensityAnalyzer().lexicon.
+            A CompiledLexicon is used in place, without copying its tables.
+    """
+
+    def __init__(self, lexicon):
+        self.lexicon = lexicon
+        self._build_tables()
+
+    def _build_tables(self):
+        if isinstance(self.lexicon, CompiledLexicon):
+            tables = self.lexicon.tables
+            # Ids of words not seen yet are looked up in the compiled key table
+            self._vocab_id = self.lexicon.word_id
+            self._token_ids = {}
+        else:
+            words, tables = build_tables(self.lexicon, _CONSTANTS.BOOSTER_DICT, _CONSTANTS.NEGATE)
+            vocab = {word: index for index, word in enumerate(words, start=2)}
+            self._vocab_id = vocab.get
+            self._token_ids = dict(vocab)
+        self._in_lexicon = tables["in_lexicon"]
+        self._valence = tables["valence"]
+        self._booster = tables["booster"]
+        self._negation = tables["negation"]
+
+        self._least_id = self._vocab_id("least")
+        self._at_id = self._vocab_id("at")
+        self._very_id = self._vocab_id("very")
+        self._but_id = self._vocab_id("but")
+        self._kind_id = self._vocab_id("kind")
+        self._of_id = self._vocab_id("of")
+
+        # Multi-word idioms and booster bigrams are matched on exact-case tokens
+        phrases = list(_CONSTANTS.SPECIAL_CASE_IDIOMS)
+        phrases += [word for word in _CONSTANTS.BOOSTER_DICT if ' ' in word]
+        exact_words = {_EXACT_NEVER, *_EXACT_SO_THIS}
+        for phrase in phrases:
+            exact_words.update(phrase.split())
+        self._exact_ids = {word: index for index, word in enumerate(sorted(exact_words), start=1)}
+        self._idioms = [
+            (tuple(self._exact_ids[word] for word in phrase.split()), value)
+            for phrase, value in _CONSTANTS.SPECIAL_CASE_IDIOMS.items()
+        ]
+        self._booster_bigrams = [
+            tuple(self._exact_ids[word] for word in phrase.split())
+            for phrase in _CONSTANTS.BOOSTER_DICT if ' ' in phrase
+        ]
+
+    def _token_id(self, word):
+        token_id = self._token_ids.get(word)
+        if token_id is None:
+            token_id = self._vocab_id(word)
+            if token_id is None:
+                token_id = _OOV_NEGATED if "n't" in word else _OOV
+            if len(self._token_ids) < 1_000_000:
+                self._token_ids[word] = token_id
+        return token_id
+
+    @staticmethod
+    def tokenize(text):
+        """
+        Splits text into tokens the same way as NLTK's SentiText: singletons
+        are dropped and one leading or trailing punctuation mark is stripped
+        from otherwise punctuation-free words.
+        """
+        tokens = []
+        for token in text.split():
+            if len(token) <= 1:
+                continue
+            if token[0] in _PUNCTUATION or token[-1] in _PUNCTUATION:
+                token = _strip_punctuation(token)
+            tokens.append(token)
+        return tokens
+
+    def _flatten(self, texts):
+        token_ids = []
+        exact_ids = []
+        upper = []
+        first = []
+        lengths = []
+        cap_diff = []
+        exclamations = []
+        questions = []
+
+        exact_get = self._exact_ids.get
+        token_id = self._token_id
+        offset = 0
+        for text in texts:
+            if not isinstance(text, str):
+                text = str(text.encode("utf-8"))
+            tokens = self.tokenize(text)
+            n = len(tokens)
+            seen = {}
+            allcaps = 0
+            for position, token in enumerate(tokens):
+                is_upper = token.isupper()
+                allcaps += is_upper
+                upper.append(is_upper)
+                token_ids.append(token_id(token.lower()))
+                exact_ids.append(exact_get(token, 0))
+                first.append(offset + seen.setdefault(token, position))
+            lengths.append(n)
+            cap_diff.append(0 < n - allcaps < n)
+            exclamations.append(text.count("!"))
+            questions.append(text.count("?"))
+            offset += n
+
+        return {
+            "ids": np.array(token_ids, dtype=np.int64),
+            "exact": np.array(exact_ids, dtype=np.int64),
+            "upper": np.array(upper, dtype=bool),
+            "first": np.array(first, dtype=np.int64),
+            "lengths": np.array(lengths, dtype=np.int64),
+            "cap_diff": np.array(cap_diff, dtype=bool),
+            "exclamations": np.array(exclamations, dtype=np.int64),
+            "questions": np.array(questions, dtype=np.int64),
+        }
+
+    def _token_valences(self, batch, text_index, position, length):
+        """
+        Applies the per-token VADER rules to every token of the batch.
+        """
+        ids = batch["ids"]
+        exact = batch["exact"]
+        upper = batch["upper"]
+        cap_diff = batch["cap_diff"][text_index]
+
+        def before(values, distance, fill):
+            shifted = np.empty_like(values)
+            shifted[:distance] = fill
+            shifted[distance:] = values[:-distance] if distance < len(values) else fill
+            return np.where(position >= distance, shifted, fill)
+
+        def after(values, distance, fill):
+            shifted = np.empty_like(values)
+            shifted[-distance:] = fill
+            shifted[:-distance] = values[distance:] if distance < len(values) else fill
+            return np.where(position < length - distance, shifted, fill)
+
+        in_lexicon = self._in_lexicon[ids]
+        valence = self._valence[ids].copy()
+
+        # ALL CAPS emphasis on the sentiment word itself
+        emphasized = upper & cap_diff
+        valence = np.where(emphasized, np.where(valence > 0, valence + _CONSTANTS.C_INCR,
+                                                valence - _CONSTANTS.C_INCR), valence)
+
+        exact_before = {d: before(exact, d, 0) for d in (1, 2, 3)}
+        is_so_this = {
+            d: np.isin(exact_before[d], [self._exact_ids[w] for w in _EXACT_SO_THIS])
+            for d in (1, 2)
+        }
+        is_never = {d: exact_before[d] == self._exact_ids[_EXACT_NEVER] for d in (2, 3)}
+
+        for start_i in range(3):
+            distance = start_i + 1
+            prev_ids = before(ids, distance, _OOV)
+            applies = (position > start_i) & ~self._in_lexicon[prev_ids]
+
+            # Booster/dampener scalar from the preceding word
+            scalar = self._booster[prev_ids].copy()
+            scalar = np.where(valence < 0, -scalar, scalar)
+            prev_emphasized = (self._booster[prev_ids] != 0) & before(upper, distance, False) & cap_diff
+            scalar = np.where(prev_emphasized, np.where(valence > 0, scalar + _CONSTANTS.C_INCR,
+                                                        scalar - _CONSTANTS.C_INCR), scalar)
+            if start_i == 1:
+                scalar = np.where(scalar != 0, scalar * 0.95, scalar)
+            elif start_i == 2:
+                scalar = np.where(scalar != 0, scalar * 0.9, scalar)
+            valence = np.where(applies, valence + scalar, valence)
+
+            # Negation, including the "never so/this" intensifiers
+            negated = self._negation[prev_ids]
+            if start_i == 0:
+                factor = np.where(negated, _CONSTANTS.N_SCALAR, 1.0)
+                valence = np.where(applies & negated, valence * factor, valence)
+            elif start_i == 1:
+                never_so = is_never[2] & is_so_this[1]
+                valence = np.where(applies & never_so, valence * 1.5, valence)
+                valence = np.where(applies & ~never_so & negated, valence * _CONSTANTS.N_SCALAR, valence)
+            else:
+                never_so = (is_never[3] & is_so_this[2]) | is_so_this[1]
+                valence = np.where(applies & never_so, valence * 1.25, valence)
+                valence = np.where(applies & ~never_so & negated, valence * _CONSTANTS.N_SCALAR, valence)
+                valence = self._apply_idioms(valence, applies, exact, before, after)
+
+        # Negation through a preceding "least"
+        prev_ids = before(ids, 1, _OOV)
+        prev_least = (position > 0) & ~self._in_lexicon[prev_ids] & (prev_ids == self._least_id)
+        second_ids = before(ids, 2, _OOV)
+        not_at_least = (second_ids != self._at_id) & (second_ids != self._very_id)
+        least_negates = prev_least & ((position <= 1) | not_at_least)
+        valence = np.where(least_negates, valence * _CONSTANTS.N_SCALAR, valence)
+
+        valence = np.where(in_lexicon, valence, 0.0)
+
+        # Boosters and the first word of "kind of" carry no valence themselves
+        skipped = self._booster[ids] != 0
+        kind_of = (ids == self._kind_id) & (after(ids, 1, _OOV) == self._of_id)
+        skipped |= kind_of & (position < length - 1)
+        return np.where(skipped, 0.0, valence)
+
+    def _apply_idioms(self, valence, applies, exact, before, after):
+        def matches(phrase, offsets):
+            if len(phrase) != len(offsets):
+                return None
+            matched = np.ones(len(exact), dtype=bool)
+            for word_id, offset in zip(phrase, offsets):
+                if offset < 0:
+                    matched &= before(exact, -offset, 0) == word_id
+                elif offset > 0:
+                    matched &= after(exact, offset, 0) == word_id
+                else:
+                    matched &= exact == word_id
+            return matched
+
+        # The first matching window wins, in NLTK's order
+        windows = [(-1, 0), (-2, -1, 0), (-2, -1), (-3, -2, -1), (-3, -2)]
+        idiom_value = np.full(len(exact), np.nan)
+        for offsets in windows:
+            for phrase, value in self._idioms:
+                matched = matches(phrase, offsets)
+                if matched is not None:
+                    idiom_value = np.where(np.isnan(idiom_value) & matched, value, idiom_value)
+        # Idioms starting at the word itself override the preceding ones
+        for offsets in [(0, 1), (0, 1, 2)]:
+            for phrase, value in self._idioms:
+                matched = matches(phrase, offsets)
+                if matched is not None:
+                    idiom_value = np.where(matched, value, idiom_value)
+        valence = np.where(applies & ~np.isnan(idiom_value), idiom_value, valence)
+
+        booster_bigram = np.zeros(len(exact), dtype=bool)
+        for phrase in self._booster_bigrams:
+            booster_bigram |= matches(phrase, (-3, -2)) | matches(phrase, (-2, -1))
+        return np.where(applies & booster_bigram, valence + _CONSTANTS.B_DECR, valence)
+
+    def score_batch(self, texts):
+        """
+        Scores a batch of texts.
+
+        Args:
+            texts (iterable): Texts to score
+
+        Returns:
+            dict: NumPy arrays "neg", "neu", "pos" and "compound", one entry per text
+        """
+        batch = self._flatten(texts)
+        lengths = batch["lengths"]
+        n_texts = len(lengths)
+        n_tokens = len(batch["ids"])
+
+        text_index = np.repeat(np.arange(n_texts), lengths)
+        starts = np.cumsum(lengths) - lengths
+        position = np.arange(n_tokens) - starts[text_index]
+        length = lengths[text_index]
+
+        if n_tokens:
+            valences = self._token_valences(batch, text_index, position, length)
+        else:
+            valences = np.zeros(0)
+
+        # Every token reuses the valence computed for its first occurrence
+        sentiments = valences[batch["first"]]
+
+        # "but" halves the sentiment before it and boosts the sentiment after it
+        no_but = np.iinfo(np.int64).max
+        is_but = batch["ids"] == self._but_id
+        but_position = np.full(n_texts, no_but)
+        np.minimum.at(but_position, text_index[is_but], position[is_but])
+        but_at = but_position[text_index]
+        factor = np.where(position < but_at, 0.5, np.where(position > but_at, 1.5, 1.0))
+        sentiments = np.where(but_at == no_but, sentiments, sentiments * factor)
+
+        # np.bincount accumulates in input order, like NLTK's running sums
+        sum_s = np.bincount(text_index, weights=sentiments, minlength=n_texts)
+        pos_sum = np.bincount(text_index, weights=np.where(sentiments > 0, sentiments + 1, 0.0),
+                              minlength=n_texts)
+        neg_sum = np.bincount(text_index, weights=np.where(sentiments < 0, sentiments - 1, 0.0),
+                              minlength=n_texts)
+        neu_count = np.bincount(text_index, weights=(sentiments == 0).astype(np.float64),
+                                minlength=n_texts)
+
+        questions = batch["questions"]
+        amplifier = np.minimum(batch["exclamations"], 4) * 0.292
+        amplifier = amplifier + np.where(questions > 1, np.where(questions <= 3, questions * 0.18, 0.96), 0)
+
+        sum_s = np.where(sum_s > 0, sum_s + amplifier, np.where(sum_s < 0, sum_s - amplifier, sum_s))
+        compound = sum_s / np.sqrt(sum_s * sum_s + 15)
+
+        positive_wins = pos_sum > np.abs(neg_sum)
+        negative_wins = pos_sum < np.abs(neg_sum)
+        pos_sum = np.where(positive_wins, pos_sum + amplifier, pos_sum)
+        neg_sum = np.where(negative_wins, neg_sum - amplifier, neg_sum)
+        total = pos_sum + np.abs(neg_sum) + neu_count
+
+        has_tokens = lengths > 0
+        safe_total = np.where(has_tokens, total, 1.0)
+        return {
+            "neg": np.where(has_tokens, np.round(np.abs(neg_sum / safe_total), 3), 0.0),
+            "neu": np.where(has_tokens, np.round(np.abs(neu_count / safe_total), 3), 0.0),
+            "pos": np.where(has_tokens, np.round(np.abs(pos_sum / safe_total), 3), 0.0),
+            "compound": np.where(has_tokens, np.round(compound, 4), 0.0),
+        }
+
+    def polarity_scores_batch(self, texts):
+        """
+        Scores a batch of texts and returns one NLTK-style score dict per text.
+        """
+        scores = self.score_batch(texts)
+        return [
+            {"neg": float(neg), "neu": float(neu), "pos": float(pos), "compound": float(compound)}
+            for neg, neu, pos, compound in zip(scores["neg"], scores["neu"], scores["pos"], scores["compound"])
+        ]
+
+
+def _strip_punctuation(token):
+    """
+    Removes a leading or trailing PUNC_LIST mark from a word that otherwise
+    has no punctuation, mirroring SentiText's word/punctuation lookup table.
+    """
+    start = 0
+    while start < len(token) and token[start] in _PUNCTUATION:
+        start += 1
+    if start:
+        word = token[start:]
+        if token[:start] in _PUNC_LIST and len(word) > 1 and not any(c in _PUNCTUATION for c in word):
+            return word
+        return token
+
+    end = len(token)
+    while end > 0 and token[end - 1] in _PUNCTUATION:
+        end -= 1
+    word = token[:end]
+    if token[end:] in _PUNC_LIST and len(word) > 1 and not any(c in _PUNCTUATION for c in word):
+        return word
+    return token
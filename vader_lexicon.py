@@ -0,0 +1,300 @@
+import argparse
+import json
+import mmap
+import os
+from collections.abc import Mapping
+
+import numpy as np
+
+# Compiled, memory-mappable form of the VADER lexicon.
+#
+# NLTK's SentimentIntensityAnalyzer parses the lexicon text into a dict in every
+# process that creates one. The compiled file holds the same data as a sorted
+# table of UTF-8 keys plus flat arrays of valences, booster increments and
+# negation flags, indexed by word id. Loading it only maps the file, so every
+# process using it shares one page-cached copy and lookups return the exact
+# float values NLTK would have parsed.
+#
+# The tables suit BatchVaderScorer, which maps each distinct token to an id
+# once. Single-word lookups through the Mapping interface cost a binary search
+# each, which makes polarity_scores about 20% slower than with NLTK's dict, so
+# the per-text analyzer keeps NLTK's parsed lexicon.
+#
+# File layout: MAGIC, a little-endian uint32 header length, a JSON header
+# describing the sections and the NLTK lexicon file they were built from,
+# then each section's raw array data, 8-byte aligned.
+#
+# Build it with:
+#     python vader_lexicon.py [--output vader_lexicon.bin]
+# load_compiled_lexicon rebuilds it when the NLTK lexicon it was built from
+# has changed (a different path, size or modification time).
+
+MAGIC = b"VADERLEX"
+FORMAT_VERSION = 1
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vader_lexicon.bin")
+
+# NLTK resource holding the lexicon text, and the file inside it that
+# SentimentIntensityAnalyzer reads by default
+SOURCE_RESOURCE = "sentiment/vader_lexicon.zip"
+LEXICON_FILE = "sentiment/vader_lexicon.zip/vader_lexicon/vader_lexicon.txt"
+
+# Ids 0 and 1 are reserved for tokens outside the vocabulary, with 1 marking
+# out-of-vocabulary words that contain "n't" and therefore count as negations.
+OOV = 0
+OOV_NEGATED = 1
+
+# Words the scoring rules look up by id, whether or not they carry a valence
+RULE_WORDS = ("least", "at", "very", "but", "kind", "of")
+
+_SECTIONS = ("keys", "in_lexicon", "valence", "booster", "negation")
+
+
+def build_tables(lexicon, booster_dict, negations):
+    """
+    Builds the word tables shared by the batch scorer and the compiled file.
+
+    The vocabulary is every lexicon word, single-word booster, negation and
+    rule word, sorted, with word ids starting at 2. The arrays are indexed by
+    word id.
+
+    Args:
+        lexicon (dict): Lowercase word -> valence
+        booster_dict (dict): VaderConstants.BOOSTER_DICT
+        negations (iterable): VaderConstants.NEGATE
+
+    Returns:
+        tuple: (sorted list of words, dict of arrays "in_lexicon", "valence",
+        "booster" and "negation")
+    """
+    words = set(lexicon)
+    words.update(word for word in booster_dict if ' ' not in word)
+    words.update(negations)
+    words.update(RULE_WORDS)
+    words = sorted(words)
+
+    size = len(words) + 2
+    tables = {
+        "in_lexicon": np.zeros(size, dtype=bool),
+        "valence": np.zeros(size, dtype=np.float64),
+        "booster": np.zeros(size, dtype=np.float64),
+        "negation": np.zeros(size, dtype=bool),
+    }
+    tables["negation"][OOV_NEGATED] = True
+
+    negations = frozenset(negations)
+    for index, word in enumerate(words, start=2):
+        if word in lexicon:
+            tables["in_lexicon"][index] = True
+            tables["valence"][index] = lexicon[word]
+        tables["booster"][index] = booster_dict.get(word, 0.0)
+        tables["negation"][index] = word in negations or "n't" in word
+    return words, tables
+
+
+def source_fingerprint():
+    """
+    Returns the path, size and modification time of the installed NLTK
+    lexicon, recorded in the compiled file to tell when it is out of date.
+
+    Raises:
+        LookupError: If the lexicon is not installed
+    """
+    import nltk
+
+    path = os.path.abspath(str(nltk.data.find(SOURCE_RESOURCE)))
+    stat = os.stat(path)
+    return {"path": path, "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def compile_lexicon(lexicon, booster_dict, negations, path=DEFAULT_PATH, source=None):
+    """
+    Writes the compiled lexicon file, replacing any existing one atomically.
+
+    Args:
+        lexicon (dict): Lowercase word -> valence
+        booster_dict (dict): VaderConstants.BOOSTER_DICT
+        negations (iterable): VaderConstants.NEGATE
+        path (str): Output file
+        source (dict, optional): source_fingerprint() of the NLTK lexicon
+            the words come from
+    """
+    words, tables = build_tables(lexicon, booster_dict, negations)
+    encoded = [word.encode("utf-8") for word in words]
+    arrays = dict(tables, keys=np.array(encoded, dtype=f"S{max(map(len, encoded))}"))
+
+    sections = {}
+    offset = 0
+    for name in _SECTIONS:
+        array = arrays[name]
+        sections[name] = {"offset": offset, "dtype": array.dtype.str, "count": len(array)}
+        offset += -(-array.nbytes // 8) * 8
+    header = json.dumps({"version": FORMAT_VERSION, "words": len(words), "sections": sections,
+                         "source": source}).encode("utf-8")
+    # Pad the header so the first section starts 8-byte aligned
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % 8)
+
+    # Several processes may rebuild a stale file at once
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(4, "little"))
+        f.write(header)
+        for name in _SECTIONS:
+            data = arrays[name].tobytes()
+            f.write(data)
+            f.write(b"\0" * (-len(data) % 8))
+    os.replace(temp_path, path)
+
+
+class CompiledLexicon(Mapping):
+    """
+    Read-only, memory-mapped view of a compiled lexicon file.
+
+    Behaves like NLTK's lexicon dict (word -> valence) for the words that
+    carry a valence, and exposes the word-id tables used by BatchVaderScorer.
+
+    Args:
+        path (str): Compiled lexicon file
+
+    Raises:
+        ValueError: If the file is not a compiled lexicon of this version
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a compiled VADER lexicon")
+        header_length = int.from_bytes(self._mmap[len(MAGIC):len(MAGIC) + 4], "little")
+        data_start = len(MAGIC) + 4 + header_length
+        header = json.loads(self._mmap[len(MAGIC) + 4:data_start])
+        if header["version"] != FORMAT_VERSION:
+            raise ValueError(f"{path} has format version {header['version']}, expected {FORMAT_VERSION}; "
+                             f"rebuild it with python vader_lexicon.py")
+
+        self.tables = {
+            name: np.frombuffer(self._mmap, dtype=section["dtype"], count=section["count"],
+                                offset=data_start + section["offset"])
+            for name, section in header["sections"].items()
+        }
+        self.keys = self.tables.pop("keys")
+        # source_fingerprint() of the NLTK lexicon it was built from, if known
+        self.source = header.get("source")
+        self._size = int(np.count_nonzero(self.tables["in_lexicon"]))
+        # word -> id, filled on demand; the vocabulary bounds the hits
+        self._ids = {}
+
+    def word_id(self, word):
+        """
+        Returns the id of a vocabulary word, or None for unknown words.
+        """
+        word_id = self._ids.get(word, False)
+        if word_id is False:
+            key = word.encode("utf-8")
+            index = int(np.searchsorted(self.keys, key))
+            word_id = index + 2 if index < len(self.keys) and self.keys[index] == key else None
+            if len(self._ids) < 100_000:
+                self._ids[word] = word_id
+        return word_id
+
+    def __getitem__(self, word):
+        word_id = self.word_id(word)
+        if word_id is None or not self.tables["in_lexicon"][word_id]:
+            raise KeyError(word)
+        return float(self.tables["valence"][word_id])
+
+    def __contains__(self, word):
+        word_id = self.word_id(word)
+        return word_id is not None and bool(self.tables["in_lexicon"][word_id])
+
+    def __iter__(self):
+        in_lexicon = self.tables["in_lexicon"]
+        for index, key in enumerate(self.keys, start=2):
+            if in_lexicon[index]:
+                yield key.decode("utf-8")
+
+    def __len__(self):
+        return self._size
+
+
+def load_analyzer(lexicon, lexicon_file=LEXICON_FILE):
+    """
+    Returns an NLTK SentimentIntensityAnalyzer that uses the given lexicon
+    mapping instead of parsing the lexicon text. The analyzer goes through
+    NLTK's own constructor; only make_lex_dict, which parses the text, is
+    replaced.
+
+    Args:
+        lexicon (Mapping): Word -> valence, e.g. a CompiledLexicon
+        lexicon_file (str): NLTK resource of the lexicon text, passed on to
+            the constructor
+
+    Raises:
+        ValueError: If NLTK's constructor no longer builds the lexicon
+            through make_lex_dict
+    """
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+    class CompiledAnalyzer(SentimentIntensityAnalyzer):
+        def make_lex_dict(self):
+            return lexicon
+
+    analyzer = CompiledAnalyzer(lexicon_file)
+    if analyzer.lexicon is not lexicon:
+        raise ValueError("SentimentIntensityAnalyzer no longer builds its lexicon with make_lex_dict")
+    return analyzer
+
+
+def compile_from_nltk(path=DEFAULT_PATH):
+    """
+    Compiles the installed NLTK lexicon to path and returns the number of
+    lexicon words.
+
+    Raises:
+        ResourceUnavailableError: If the lexicon is not available
+    """
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer, VaderConstants
+    from nltk_resources import VADER_LEXICON_RESOURCE, ensure_resource
+
+    ensure_resource(VADER_LEXICON_RESOURCE)
+    lexicon = SentimentIntensityAnalyzer(LEXICON_FILE).lexicon
+    constants = VaderConstants()
+    compile_lexicon(lexicon, constants.BOOSTER_DICT, constants.NEGATE, path, source=source_fingerprint())
+    return len(lexicon)
+
+
+def load_compiled_lexicon(path=DEFAULT_PATH):
+    """
+    Returns the compiled lexicon at path, first rebuilding the file if it
+    was compiled from another version of the NLTK lexicon than the one
+    installed (or predates this check).
+
+    Raises:
+        OSError: If the file cannot be read or rebuilt
+        ValueError: If the file is not a compiled lexicon of this version
+        ResourceUnavailableError: If the NLTK lexicon is not available
+    """
+    from nltk_resources import VADER_LEXICON_RESOURCE, ensure_resource
+
+    ensure_resource(VADER_LEXICON_RESOURCE)
+    lexicon = CompiledLexicon(path)
+    if lexicon.source != source_fingerprint():
+        print(f"The NLTK VADER lexicon changed since {path} was compiled, rebuilding it")
+        compile_from_nltk(path)
+        lexicon = CompiledLexicon(path)
+    return lexicon
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the VADER lexicon into a memory-mappable file")
+    parser.add_argument("--output", default=DEFAULT_PATH, help="Compiled lexicon file to write")
+    args = parser.parse_args()
+
+    words = compile_from_nltk(args.output)
+    print(f"Compiled {words} lexicon words to {args.output} ({os.path.getsize(args.output)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
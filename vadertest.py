@@ -1,31 +1,209 @@
-import praw
+import argparse
 import re
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-import nltk
 import csv
 import os
-from dotenv import load_dotenv
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice, tee
+from text_normalizer import normalize, clean_batch
+from nltk_resources import VADER_LEXICON_RESOURCE, ensure_resource, normalize_stopwords
+from nltk_resources import remove_stopwords as strip_stopwords
+from reddit_fetch import RateLimiter, create_session, fetch_concurrently
+from post_cache import CachedPost, PostCache
+from incremental import RefreshState, comments_signature
+from comment_ranking import CommentTree, RankedComments
+from instrumentation import RunMetrics, format_report, profiled, save_report, timed, timed_iter
+from result_store import ResultStore
+from result_writers import open_writer, sort_file
+from run_journal import RunJournal
+from score_cache import ScoreCache, score_config
+from near_duplicates import NearDuplicateIndex
 
-# Load environment variables
-load_dotenv()
+# Size of the HTTP connection pool shared by concurrent comment fetches
+REDDIT_POOL_SIZE = 16
 
-# Reddit API credentials from environment variables
-CLIENT_ID = os.getenv('REDDIT_CLIENT_ID')
-CLIENT_SECRET = os.getenv('REDDIT_CLIENT_SECRET')
-USER_AGENT = os.getenv('REDDIT_USER_AGENT')
+# The Reddit clients and the VADER analyzers are built on first use by
+# get_reddit, get_analyzer and get_batch_scorer, so importing this module
+# neither needs credentials nor parses the lexicon. Assigning them directly
+# (e.g. a client pointed at a test server) skips the lazy construction.
+reddit = None
+sid = None
+batch_scorer = None
+_init_lock = threading.Lock()
 
-if not all([CLIENT_ID, CLIENT_SECRET, USER_AGENT]):
-    raise ValueError("Missing Reddit API credentials. Please check your .env file.")
+# praw.Reddit is not thread-safe. Code running outside a fetch worker shares
+# one client, created on first use. Fetch workers on thread pools borrow a
+# client of their own with reddit_client() for each fetch and hand it back
+# when the fetch ends, so clients (and their OAuth tokens) are reused across
+# fetches and thread pools. All of them share one HTTP session, so
+# concurrent fetches still draw on one connection pool. A client assigned to
+# reddit (e.g. a test double) replaces them all; fetch workers hold a lock
+# while they use it, so they take turns with it.
+_main_client = None
+_leases = threading.local()
+_idle_clients = deque()
+_override_lock = threading.Lock()
+_session = None
+_session_lock = threading.Lock()
 
-# Authenticate with Reddit
-reddit = praw.Reddit(
-    client_id=CLIENT_ID,
-    client_secret=CLIENT_SECRET,
-    user_agent=USER_AGENT
-)
+# Extra praw.Reddit settings for the clients get_reddit creates, set with
+# configure_reddit
+reddit_settings = {}
 
-# Initialize VADER sentiment analyzer
-sid = SentimentIntensityAnalyzer()
+# Shared by every thread that fetches comment trees
+rate_limiter = RateLimiter()
+
+def configure_reddit(**settings):
+    """
+    Sets extra praw.Reddit settings, such as the oauth_url and reddit_url of
+    a test server or requestor_kwargs with another session, for the clients
+    created from now on. Clients created before are dropped.
+    """
+    global reddit_settings, _main_client, _idle_clients
+    reddit_settings = settings
+    _main_client = None
+    _idle_clients = deque()
+
+def get_reddit():
+    """
+    Returns the Reddit client for the calling code: inside a reddit_client()
+    block, the client lent to the block; otherwise the shared client. Clients
+    are created on first use from the credentials in the environment or the
+    .env file. A client assigned to the module's reddit is used instead.
+    
+    Raises:
+        ValueError: If the Reddit API credentials are missing
+    """
+    global _main_client
+    if getattr(_leases, "active", False):
+        if _leases.client is None:
+            _leases.client = _borrow_client()
+        return _leases.client
+    if reddit is not None:
+        return reddit
+    if _main_client is None:
+        with _init_lock:
+            if _main_client is None:
+                _main_client = _create_reddit()
+    return _main_client
+
+def _borrow_client():
+    if reddit is not None:
+        _override_lock.acquire()
+        _leases.locked = True
+        return reddit
+    try:
+        return _idle_clients.pop()
+    except IndexError:
+        return _create_reddit()
+
+@contextmanager
+def reddit_client():
+    """
+    Lends the calling thread a Reddit client of its own for the block, for
+    fetches running on a thread pool: get_reddit returns it inside the
+    block, and it goes back to the idle clients when the block exits. The
+    client is only taken on the first get_reddit call, so a block served
+    from the cache needs no client.
+    """
+    if getattr(_leases, "active", False):
+        # Nested blocks share the outer block's client
+        yield
+        return
+    idle = _idle_clients
+    _leases.active, _leases.client, _leases.locked = True, None, False
+    try:
+        yield
+    finally:
+        client, locked = _leases.client, _leases.locked
+        _leases.active, _leases.client, _leases.locked = False, None, False
+        if locked:
+            _override_lock.release()
+        elif client is not None:
+            idle.append(client)
+
+def _create_reddit():
+    global _session
+    import praw
+    from dotenv import load_dotenv
+    
+    # Load environment variables
+    load_dotenv()
+    
+    # Reddit API credentials from environment variables
+    client_id = os.getenv('REDDIT_CLIENT_ID')
+    client_secret = os.getenv('REDDIT_CLIENT_SECRET')
+    user_agent = os.getenv('REDDIT_USER_AGENT')
+    
+    if not all([client_id, client_secret, user_agent]):
+        raise ValueError("Missing Reddit API credentials. Please check your .env file.")
+    
+    settings = dict(reddit_settings)
+    if "requestor_kwargs" not in settings:
+        with _session_lock:
+            if _session is None:
+                _session = create_session(REDDIT_POOL_SIZE, rate_limiter)
+        settings["requestor_kwargs"] = {"session": _session}
+    return praw.Reddit(
+        client_id=client_id,
+        client_secret=client_secret,
+        user_agent=user_agent,
+        **settings
+    )
+
+def get_analyzer():
+    """
+    Returns the shared VADER SentimentIntensityAnalyzer, loading the lexicon
+    on first use. It always uses NLTK's parsed lexicon dict, which is faster
+    for scoring one text at a time than the compiled lexicon.
+    """
+    global sid
+    if sid is None:
+        with _init_lock:
+            if sid is None:
+                from nltk.sentiment.vader import SentimentIntensityAnalyzer
+                ensure_resource(VADER_LEXICON_RESOURCE)
+                sid = SentimentIntensityAnalyzer()
+    return sid
+
+def _load_compiled_lexicon():
+    from vader_lexicon import DEFAULT_PATH, load_compiled_lexicon
+    
+    if not os.path.exists(DEFAULT_PATH):
+        return None
+    try:
+        return load_compiled_lexicon(DEFAULT_PATH)
+    except (OSError, ValueError, LookupError) as e:
+        print(f"Warning: Could not load the compiled lexicon, parsing the text lexicon instead: {str(e)}")
+        return None
+
+def get_batch_scorer():
+    """
+    Returns the shared vectorized scorer for batches of texts.
+    
+    When the compiled lexicon built by `python vader_lexicon.py` exists, the
+    scorer uses it in place instead of parsing the lexicon text, so pool
+    workers share one memory-mapped copy. It is rebuilt first if the NLTK
+    lexicon changed since. Otherwise the scorer uses the analyzer's lexicon.
+    """
+    global batch_scorer
+    from vader_batch import BatchVaderScorer
+    
+    if batch_scorer is None:
+        with _init_lock:
+            if batch_scorer is None:
+                compiled = _load_compiled_lexicon()
+                if compiled is not None:
+                    batch_scorer = BatchVaderScorer(compiled)
+    if batch_scorer is None:
+        # get_analyzer takes the lock itself
+        lexicon = get_analyzer().lexicon
+        with _init_lock:
+            if batch_scorer is None:
+                batch_scorer = BatchVaderScorer(lexicon)
+    return batch_scorer
 
 def clean_text(text, remove_numbers=True, remove_emojis=True):
     """
@@ -36,43 +214,17 @@ def clean_text(text, remove_numbers=True, remove_emojis=True):
         remove_numbers (bool): Whether to remove numerical digits
         remove_emojis (bool): Whether to remove emoji characters
     """
-    if not text:
-        return ""
-        
-    # Remove URLs
-    text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
-    
-    # Remove emoji characters
-    if remove_emojis:
-        emoji_pattern = re.compile("["
-            u"\U0001F600-\U0001F64F"  # emoticons
-            u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-            u"\U0001F680-\U0001F6FF"  # transport & map symbols
-            u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
-            u"\U00002702-\U000027B0"
-            u"\U000024C2-\U0001F251"
-            "]+", flags=re.UNICODE)
-        text = emoji_pattern.sub(r'', text)
-    
-    # Remove numbers if specified
-    if remove_numbers:
-        text = re.sub(r'\d+', '', text)
-    
-    # Remove special characters but keep apostrophes and quotes
-    text = re.sub(r'[^a-zA-Z\s\'\"]', ' ', text)
-    
-    # Remove extra whitespace and normalize spaces
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    return text
+    return normalize(text, remove_numbers=remove_numbers, remove_emojis=remove_emojis)
 
-def preprocess_text(text, remove_stopwords=True):
+def preprocess_text(text, remove_stopwords=True, stop_words=None):
     """
     Enhanced text preprocessing with additional options.
     
     Args:
         text (str): Input text to preprocess
         remove_stopwords (bool): Whether to remove common stopwords
+        stop_words (iterable, optional): Stopwords to remove, in any case.
+            Defaults to the NLTK English list, loaded once per process
     """
     if not text:
         return ""
@@ -82,19 +234,14 @@ def preprocess_text(text, remove_stopwords=True):
     
     if remove_stopwords:
         try:
-            # Download stopwords if not already downloaded
-            nltk.download('stopwords', quiet=True)
-            stop_words = set(nltk.corpus.stopwords.words('english'))
-            
             # Remove stopwords
-            words = text.split()
-            text = ' '.join([word for word in words if word.lower() not in stop_words])
+            text = strip_stopwords(text, normalize_stopwords(stop_words))
         except Exception as e:
             print(f"Warning: Could not remove stopwords: {str(e)}")
     
     return text
 
-def is_meaningful(text, min_words=3, min_compound_score=0.1):
+def is_meaningful(text, min_words=3, min_compound_score=0.1, scores=None):
     """
     Enhanced meaningful text detection with configurable parameters.
     
@@ -102,108 +249,818 @@ def is_meaningful(text, min_words=3, min_compound_score=0.1):
         text (str): Input text to check
         min_words (int): Minimum number of words required
         min_compound_score (float): Minimum absolute compound score to be considered meaningful
+        scores (dict, optional): Precomputed VADER scores for text, to avoid scoring it again
     """
     if not text or len(text.split()) < min_words:
         return False
         
-    scores = sid.polarity_scores(text)
+    if scores is None:
+        scores = get_analyzer().polarity_scores(text)
     # Consider text meaningful if compound score exceeds threshold in either direction
     return abs(scores['compound']) >= min_compound_score
 
-def analyze_sentiment_vader(text):
+# Compound scores within this distance of zero are neutral
+NEUTRAL_COMPOUND = 0.05
+
+def classify_compound(compound):
+    """
+    Maps a VADER compound score to a sentiment label
+    (1 for positive, 0 for neutral, -1 for negative).
+    """
+    # Adjust thresholds if necessary
+    if compound > NEUTRAL_COMPOUND:
+        return 1
+    elif compound < -NEUTRAL_COMPOUND:
+        return -1
+    else:
+        return 0
+
+def analyze_sentiment_vader(text, scores=None):
     """
     Analyzes the sentiment of the input text using VADER.
     Returns a tuple of sentiment (1 for positive, 0 for neutral, -1 for negative)
     and the compound score.
+    
+    Args:
+        text (str): Input text to analyze
+        scores (dict, optional): Precomputed VADER scores for text, to avoid scoring it again
     """
-    scores = sid.polarity_scores(text)
+    if scores is None:
+        scores = get_analyzer().polarity_scores(text)
     compound = scores['compound']
-    # Adjust thresholds if necessary
-    if compound > 0.05:
-        return 1, compound
-    elif compound < -0.05:
-        return -1, compound
+    return classify_compound(compound), compound
+
+def has_enough_words(text, min_words=3):
+    """
+    Returns True if a preprocessed text is long enough to be scored.
+    """
+    return bool(text) and len(text.split()) >= min_words
+
+def cluster_result(scores, min_compound_score=0.1):
+    """
+    Completes the VADER scores shared by a cluster of near-duplicate comments
+    (see near_duplicates.ClusterScores) into a score_comment-style result.
+    """
+    result = dict(scores)
+    result["meaningful"] = abs(result["compound"]) >= min_compound_score
+    result["sentiment"] = classify_compound(result["compound"])
+    return result
+
+def score_comment(text, min_words=3, min_compound_score=0.1):
+    """
+    Scores a preprocessed comment with VADER once and derives both the
+    meaningfulness decision and the sentiment classification from that result.
+    
+    Args:
+        text (str): Preprocessed comment text
+        min_words (int): Minimum number of words required
+        min_compound_score (float): Minimum absolute compound score to be considered meaningful
+    
+    Returns:
+        dict: The VADER scores (neg, neu, pos, compound) plus "meaningful" and
+        "sentiment". Texts shorter than min_words are not scored at all and
+        come back with scores set to None and meaningful set to False.
+    """
+    if not text or len(text.split()) < min_words:
+        return {"neg": None, "neu": None, "pos": None, "compound": None,
+                "meaningful": False, "sentiment": None}
+    
+    result = dict(get_analyzer().polarity_scores(text))
+    result["meaningful"] = abs(result["compound"]) >= min_compound_score
+    result["sentiment"] = classify_compound(result["compound"])
+    return result
+
+def score_comments(texts, min_words=3, min_compound_score=0.1):
+    """
+    Batch version of score_comment, using the vectorized VADER scorer.
+    
+    The vectorized scores agree with NLTK's within vader_batch.SCORE_TOLERANCE.
+    Texts whose compound score falls that close to min_compound_score or to
+    the neutral band are rescored with NLTK's analyzer, so the meaningfulness
+    and sentiment decisions are always those score_comment makes.
+    
+    Args:
+        texts (list): Preprocessed comment texts
+        min_words (int): Minimum number of words required
+        min_compound_score (float): Minimum absolute compound score to be considered meaningful
+    
+    Returns:
+        list: One score_comment-style dict per text, in input order
+    """
+    results = [
+        {"neg": None, "neu": None, "pos": None, "compound": None,
+         "meaningful": False, "sentiment": None}
+        for _ in texts
+    ]
+    eligible = [i for i, text in enumerate(texts) if text and len(text.split()) >= min_words]
+    if not eligible:
+        return results
+    
+    from vader_batch import SCORE_TOLERANCE
+    
+    scores = get_batch_scorer().polarity_scores_batch([texts[i] for i in eligible])
+    for i, result in zip(eligible, scores):
+        magnitude = abs(result["compound"])
+        if (abs(magnitude - min_compound_score) <= SCORE_TOLERANCE
+                or abs(magnitude - NEUTRAL_COMPOUND) <= SCORE_TOLERANCE):
+            result = dict(get_analyzer().polarity_scores(texts[i]))
+        result["meaningful"] = abs(result["compound"]) >= min_compound_score
+        result["sentiment"] = classify_compound(result["compound"])
+        results[i] = result
+    return results
+
+# Posts per page of a listing; each page is one request
+LISTING_PAGE_SIZE = 100
+
+def get_top_posts(subreddit_name, limit=100, cache=None, rate_limiter=None, refresh=False):
+    """
+    Yields the subreddit's top posts, from the cache when it holds a fresh
+    copy of the listing. Otherwise the listing is fetched from Reddit and
+    stored in the cache once it has been read in full; the rate limiter, if
+    given, is acquired for every page up front. With refresh, the cache is
+    not read but still updated.
+    """
+    if cache and not refresh:
+        cached_posts = cache.get_listing(subreddit_name, limit)
+        if cached_posts is not None:
+            yield from cached_posts
+            return
+    
+    if rate_limiter:
+        rate_limiter.acquire(max(1, -(-limit // LISTING_PAGE_SIZE)))
+    
+    fetched_posts = []
+    for post in get_reddit().subreddit(subreddit_name).top(limit=limit):
+        fetched_posts.append(post)
+        yield post
+    
+    if cache:
+        cache.put_listing(subreddit_name, limit, fetched_posts)
+
+def fetch_comments(post, cache=None, rate_limiter=None, refresh=False):
+    """
+    Returns a re-iterable collection of a post's comments in breadth-first
+    order, from the cache when it holds a fresh copy. The rate limiter, if
+    given, is only used when the comments have to be fetched from Reddit.
+    With refresh, the cache is not read but still updated.
+    """
+    if cache and not refresh:
+        cached_comments = cache.get_comments(post.id)
+        if cached_comments is not None:
+            return cached_comments
+    
+    if rate_limiter:
+        rate_limiter.acquire()
+    
+    # Posts from a cached listing are plain records, and posts from a listing
+    # read on another thread belong to that thread's client; their comments
+    # come from a fresh Submission of this thread's client. Either way it
+    # takes one request, as a listing's posts hold no comments yet.
+    client = get_reddit()
+    if isinstance(post, CachedPost) or getattr(post, "_reddit", client) is not client:
+        submission = client.submission(id=post.id)
     else:
-        return 0, compound
+        submission = post
+    
+    # Replace comments.list() with comments.replace_more(limit=0) for better performance
+    submission.comments.replace_more(limit=0)
+    comments = CommentTree(submission.comments)
+    
+    if cache:
+        return cache.put_comments(post, comments)
+    return comments
+
+def comment_filter(min_comment_length=10):
+    """
+    Returns the predicate selecting the comments worth analyzing: comments
+    (not MoreComments) with an author other than AutoModerator and at least
+    min_comment_length characters.
+    """
+    from praw.models import MoreComments
+    
+    def is_valid(comment):
+        return (
+            not isinstance(comment, MoreComments)
+            and comment.author
+            and comment.author.name.lower() not in ['automoderator']
+            and len(comment.body) >= min_comment_length
+        )
+    
+    return is_valid
+
+def get_valid_comments(post, min_comment_length=10, cache=None, rate_limiter=None, refresh=False):
+    """
+    Fetches a post's comment tree and returns the comments worth analyzing
+    as a RankedComments view, which yields them by score in descending order
+    without flattening or fully sorting the tree.
+    """
+    comments = fetch_comments(post, cache, rate_limiter, refresh)
+    return RankedComments(comments, comment_filter(min_comment_length), window=CANDIDATE_WINDOW)
+
+def iter_post_comments(posts, min_comment_length=10, fetch_concurrency=1, cache=None, metrics=None, skip=(),
+                       refresh=False):
+    """
+    Yields (post, valid_comments, error) for each post, in order.
+    
+    Stickied posts and posts whose id is in skip are not fetched and come
+    back with valid_comments set to None. With fetch_concurrency > 1, up to that many comment trees are
+    fetched at once on a thread pool, throttled by the shared rate limiter.
+    With RunMetrics, reading the listing and fetching each comment tree are
+    timed as the "fetch_listing" and "fetch_comments" stages. With refresh,
+    comment trees are fetched from Reddit even when cached, and the cache is
+    updated.
+    """
+    def fetch(post):
+        if post.stickied or post.id in skip:
+            return None
+        with timed(metrics, "fetch_comments"):
+            if fetch_concurrency == 1:
+                return get_valid_comments(post, min_comment_length, cache, None, refresh)
+            # On a pool thread, with a client of its own
+            with reddit_client():
+                return get_valid_comments(post, min_comment_length, cache, rate_limiter, refresh)
+    
+    posts = timed_iter(metrics, "fetch_listing", posts)
+    if fetch_concurrency > 1:
+        yield from fetch_concurrently(posts, fetch, max_in_flight=fetch_concurrency)
+        return
+    
+    for post in posts:
+        try:
+            yield post, fetch(post), None
+        except Exception as e:
+            yield post, None, e
+
+def build_record(post, comment, comment_text, result):
+    """
+    Builds the output row for a post and its analyzed comment.
+    """
+    return {
+        "title": post.title,
+        "url": f"https://www.reddit.com{post.permalink}",
+        "post_upvotes": post.score,
+        "comment_text": comment_text,
+        "comment_upvotes": comment.score,
+        "sentiment": result["sentiment"],
+        "compound": result["compound"]
+    }
+
+def select_comment(bodies, min_words=3, min_compound_score=0.1, metrics=None, score_cache=None,
+                   near_duplicates=None):
+    """
+    Cleans, preprocesses and scores candidate comment bodies in order and
+    stops at the first meaningful one. Bodies found in the ScoreCache, if
+    given, are not processed again, and new results are added to it.
+    
+    With a NearDuplicateIndex, every preprocessed comment long enough to be
+    scored is clustered first, and comments close to one already scored in
+    the run reuse its scores instead of being scored again.
+    
+    Returns:
+        tuple: (index, preprocessed text, scores) of the selected comment,
+        or None if no candidate is meaningful
+    """
+    config = score_config(min_words, min_compound_score) if score_cache is not None else None
+    for index, body in enumerate(bodies):
+        cached = score_cache.get(body, config) if score_cache is not None else None
+        if cached is not None:
+            preprocessed_comment, result = cached
+        else:
+            with timed(metrics, "clean_text"):
+                cleaned = clean_text(body)
+            with timed(metrics, "preprocess_text"):
+                preprocessed_comment = preprocess_text(cleaned)
+            result = None
+        
+        cluster, new = None, False
+        if near_duplicates is not None and has_enough_words(preprocessed_comment, min_words):
+            with timed(metrics, "near_duplicates"):
+                (cluster,), (new,) = near_duplicates.assign([preprocessed_comment])
+            if not new:
+                # Members share their representative's scores, even when their own are cached
+                result = cluster_result(near_duplicates.scores.get(cluster), min_compound_score)
+        
+        if result is None:
+            with timed(metrics, "vader_score"):
+                result = score_comment(
+                    preprocessed_comment,
+                    min_words=min_words,
+                    min_compound_score=min_compound_score
+                )
+            # Only a comment's own scores are cached
+            if score_cache is not None and (cluster is None or new):
+                score_cache.put(body, config, preprocessed_comment, result)
+        if new:
+            near_duplicates.scores.put(cluster, result)
+        if result["meaningful"]:
+            return index, preprocessed_comment, result
+    return None
 
-def fetch_top_posts(subreddit_name, limit=100, min_comment_length=10, progress_callback=None):
+def select_record(post, valid_comments, min_words=3, min_compound_score=0.1, metrics=None, score_cache=None,
+                  near_duplicates=None):
+    """
+    Scores a post's ranked comments until one is meaningful and returns its
+    record, or None if none is.
+    """
+    # The ranking is lazy; tee keeps only the comments looked at to map the index back
+    candidates, ranked = tee(timed_iter(metrics, "rank_comments", valid_comments))
+    selection = select_comment(
+        (comment.body for comment in ranked),
+        min_words=min_words,
+        min_compound_score=min_compound_score,
+        metrics=metrics,
+        score_cache=score_cache,
+        near_duplicates=near_duplicates
+    )
+    if not selection:
+        return None
+    index, preprocessed_comment, result = selection
+    return build_record(post, next(islice(candidates, index, None)), preprocessed_comment, result)
+
+def select_comment_incremental(post, valid_comments, post_state, state, min_words=3, min_compound_score=0.1,
+                               metrics=None):
+    """
+    Incremental version of select_comment for a post seen in earlier runs.
+    
+    If the ranked comments (ids, scores, edit timestamps) and thresholds are
+    unchanged, the previous record is reused with the post's current score.
+    Otherwise the post is re-ranked, but only new or edited comments are
+    cleaned, preprocessed and scored again.
+    
+    Returns:
+        dict: The output record, or None if no comment is meaningful
+    """
+    # Scores are part of the signature, so hashing in tree order catches re-rankings too
+    signature = comments_signature(valid_comments.unordered(), min_words, min_compound_score)
+    if post_state.get("signature") == signature and "record" in post_state:
+        state.reused_posts += 1
+        record = post_state["record"]
+        if record:
+            record = dict(record, title=post.title, post_upvotes=post.score)
+            post_state["record"] = record
+        return record
+    
+    state.reranked_posts += 1
+    scored = post_state.get("comments", {})
+    current = {}
+    record = None
+    for comment in timed_iter(metrics, "rank_comments", valid_comments):
+        edited = comment.edited or False
+        entry = scored.get(comment.id)
+        if entry is None or entry["edited"] != edited:
+            with timed(metrics, "clean_text"):
+                cleaned = clean_text(comment.body)
+            with timed(metrics, "preprocess_text"):
+                preprocessed_comment = preprocess_text(cleaned)
+            entry = {"edited": edited, "text": preprocessed_comment, "scores": None}
+            state.rescored_comments += 1
+        else:
+            state.reused_comments += 1
+        # Too short comments are not scored; one kept from a run with a larger
+        # min_words is scored once it is long enough
+        if entry["scores"] is None and has_enough_words(entry["text"], min_words):
+            with timed(metrics, "vader_score"):
+                entry["scores"] = get_analyzer().polarity_scores(entry["text"])
+        current[comment.id] = entry
+        
+        scores = entry["scores"]
+        if scores and is_meaningful(entry["text"], min_words, min_compound_score, scores=scores):
+            sentiment, compound = analyze_sentiment_vader(entry["text"], scores=scores)
+            record = build_record(post, comment, entry["text"], {"sentiment": sentiment, "compound": compound})
+            break
+    
+    # Only the comments scored in this run are kept, so the state stays small
+    post_state["comments"] = current
+    post_state["signature"] = signature
+    post_state["record"] = record
+    return record
+
+def select_comment_batches(tasks, min_words=3, min_compound_score=0.1, return_scored=False):
+    """
+    Process pool worker: runs the CPU stages over a chunk of candidate
+    comments from several posts at once.
+    
+    Args:
+        tasks (list): (key, bodies) pairs, one per post
+        return_scored (bool): Also return every body's preprocessed text and
+            scores, e.g. to fill a ScoreCache
+    
+    Returns:
+        tuple: (selections, metrics snapshot, scored). selections lists (key,
+        selection) pairs, where selection is what select_comment would
+        return for the bodies; the snapshot holds the chunk's stage timings,
+        to merge into the run's RunMetrics. scored lists (preprocessed text,
+        scores) for every body of every task, in order, or is None without
+        return_scored.
+    """
+    metrics = RunMetrics()
+    all_bodies = [body for _, bodies in tasks for body in bodies]
+    with metrics.time("clean_text", len(all_bodies)):
+        cleaned = clean_batch(all_bodies)
+    with metrics.time("preprocess_text", len(all_bodies)):
+        preprocessed = [preprocess_text(text) for text in cleaned]
+    with metrics.time("vader_score", len(all_bodies)):
+        results = score_comments(preprocessed, min_words=min_words, min_compound_score=min_compound_score)
+    
+    selections = []
+    offset = 0
+    for key, bodies in tasks:
+        selection = None
+        for index in range(len(bodies)):
+            if results[offset + index]["meaningful"]:
+                selection = (index, preprocessed[offset + index], results[offset + index])
+                break
+        selections.append((key, selection))
+        offset += len(bodies)
+    scored = list(zip(preprocessed, results)) if return_scored else None
+    return selections, metrics.snapshot(), scored
+
+def has_candidates(post, valid_comments, error):
+    """
+    Reports posts that cannot be analyzed. Returns True when the post has
+    valid comments to look at.
+    """
+    if error:
+        print(f"Error processing post {post.title}: {str(error)}")
+        return False
+    if post.stickied:
+        print(f"Skipping stickied post: {post.title}")
+        return False
+    if not valid_comments:
+        print(f"No valid comments found for post: {post.title}")
+        return False
+    return True
+
+def print_summary(processed_posts, skipped_posts, cache=None, state=None, metrics=None, journal=None,
+                  score_cache=None, near_duplicates=None):
+    """
+    Prints the end-of-run processing summary, and records the post counts
+    and the end of the run in the RunMetrics if given.
+    """
+    if metrics is not None:
+        metrics.count("posts_processed", processed_posts)
+        metrics.count("posts_skipped", skipped_posts)
+        metrics.finish()
+    print(f"\nProcessing Summary:")
+    print(f"Successfully processed: {processed_posts} posts")
+    print(f"Skipped posts: {skipped_posts}")
+    if cache:
+        print_cache_stats(cache)
+    if state is not None:
+        summary = state.summary()
+        print(f"Incremental: {summary['reused_posts']} posts reused, {summary['reranked_posts']} re-ranked, "
+              f"{summary['rescored_comments']} comments scored, {summary['reused_comments']} reused")
+    if journal is not None and journal.replayed:
+        print(f"Resumed: {journal.replayed} posts replayed from {journal.path}")
+    if score_cache is not None:
+        print(score_cache.format_stats())
+    if near_duplicates is not None:
+        print(near_duplicates.format_stats())
+
+def fetch_top_posts(subreddit_name, limit=100, min_comment_length=10, progress_callback=None,
+                    min_words=3, min_compound_score=0.1, workers=1, chunk_size=64,
+                    fetch_concurrency=1, cache=None, state=None, metrics=None, journal=None, score_cache=None,
+                    near_duplicates=None):
     """
     Enhanced post fetching with better error handling and logging.
+    Returns the list of records produced by iter_top_posts, which documents
+    the options.
+    """
+    return list(iter_top_posts(
+        subreddit_name, limit=limit, min_comment_length=min_comment_length,
+        progress_callback=progress_callback, min_words=min_words,
+        min_compound_score=min_compound_score, workers=workers, chunk_size=chunk_size,
+        fetch_concurrency=fetch_concurrency, cache=cache, state=state, metrics=metrics, journal=journal,
+        score_cache=score_cache, near_duplicates=near_duplicates
+    ))
+
+def iter_top_posts(subreddit_name, limit=100, min_comment_length=10, progress_callback=None,
+                   min_words=3, min_compound_score=0.1, workers=1, chunk_size=64,
+                   fetch_concurrency=1, cache=None, state=None, metrics=None, journal=None, score_cache=None,
+                   near_duplicates=None):
     """
+    Yields one result record per analyzed post, in listing order, as soon as
+    it has been scored. Nothing is accumulated, so memory stays flat however
+    large the limit is.
+    
+    Each candidate comment is scored by VADER once; the meaningfulness check
+    (min_words, min_compound_score) and the classification share that result.
+    
+    With workers > 1 (or 0 for one per CPU core), cleaning, preprocessing and
+    scoring run on a process pool in chunks of about chunk_size comments while
+    the main thread keeps fetching.
+    
+    With fetch_concurrency > 1, that many comment trees are fetched at once
+    through the shared connection pool and rate limiter.
+    
+    With a PostCache, listings and comment trees already fetched within the
+    cache's TTL are read from it instead of Reddit.
+    
+    With a RefreshState, only new or edited comments are scored and posts
+    whose ranked comments did not change reuse their previous record. This
+    mode always scores in-process, since little is left to score. Its point
+    is to see what changed since the last run, so the PostCache is not read,
+    only refreshed with what is fetched.
+    
+    With a RunMetrics, every stage (fetch_listing, fetch_comments,
+    rank_comments, clean_text, preprocess_text, vader_score and, with a
+    process pool, pool_wait) is timed and the post counts are recorded. In
+    pool mode the CPU stages are timed per chunk of comments.
+    
+    With a RunJournal, every settled post is journaled before its record is
+    yielded, and posts already in a resumed journal are replayed from it
+    without being fetched or scored. The journal is marked finished once the
+    whole listing has been processed.
+    
+    With a ScoreCache, comment bodies already scored under the same settings
+    (in this run or, if the cache is persisted, an earlier one) reuse their
+    preprocessed text and scores, and the hit rate is part of the summary.
+    Incremental runs keep their own per-comment state and do not use it.
+    
+    With a NearDuplicateIndex, comments close to one already scored in the
+    run (lightly edited repeats, quoted replies) reuse its scores, and the
+    cluster sizes are part of the summary. The index lives on the main
+    thread, so this mode scores in-process; incremental runs do not use it.
+    
+    Raises:
+        ValueError: If the journal was written by a run with other settings
+    """
+    if journal is not None:
+        journal.begin({
+            "subreddit": subreddit_name.lower(),
+            "limit": limit,
+            "min_comment_length": min_comment_length,
+            "min_words": min_words,
+            "min_compound_score": min_compound_score,
+        })
+    
+    if workers != 1 and state is None and near_duplicates is None:
+        yield from _iter_top_posts_parallel(
+            subreddit_name, limit, min_comment_length, progress_callback,
+            min_words, min_compound_score, workers or os.cpu_count(), chunk_size,
+            fetch_concurrency, cache, metrics, journal, score_cache
+        )
+        return
+    
+    refresh = state is not None
+    if state is not None:
+        # Incremental runs keep their own per-comment state
+        score_cache = near_duplicates = None
+        state.start_run()
+    
     try:
-        subreddit = reddit.subreddit(subreddit_name)
-        top_posts = subreddit.top(limit=limit)
+        top_posts = get_top_posts(subreddit_name, limit, cache, refresh=refresh)
         
-        data = []
         processed_posts = 0
         skipped_posts = 0
         
-        for post in top_posts:
-            try:
-                if post.stickied:
-                    print(f"Skipping stickied post: {post.title}")
-                    skipped_posts += 1
-                    continue
-                
-                # Replace comments.list() with comments.replace_more(limit=0) for better performance
-                post.comments.replace_more(limit=0)
-                comments = post.comments.list()
-                
-                valid_comments = [
-                    comment for comment in comments 
-                    if isinstance(comment, praw.models.Comment) 
-                    and comment.author 
-                    and comment.author.name.lower() not in ['automoderator']
-                    and len(comment.body) >= min_comment_length
-                ]
-                
-                if not valid_comments:
-                    print(f"No valid comments found for post: {post.title}")
+        for post, valid_comments, error in iter_post_comments(top_posts, min_comment_length,
+                                                              fetch_concurrency, cache, metrics,
+                                                              skip=journal if journal is not None else (),
+                                                              refresh=refresh):
+            if journal is not None and post.id in journal:
+                record, skipped = journal.replay(post.id)
+                if skipped:
                     skipped_posts += 1
                     continue
-                
-                # Sort valid comments by score in descending order
-                valid_comments = sorted(valid_comments, key=lambda c: c.score, reverse=True)
-                
-                # Analyze the highest upvoted valid comment that makes sense
-                for comment in valid_comments:
-                    cleaned_comment = clean_text(comment.body)
-                    preprocessed_comment = preprocess_text(cleaned_comment)
-                    if preprocessed_comment and is_meaningful(preprocessed_comment):
-                        sentiment, compound = analyze_sentiment_vader(preprocessed_comment)
-                        data.append({
-                            "title": post.title,
-                            "url": f"https://www.reddit.com{post.permalink}",
-                            "post_upvotes": post.score,
-                            "comment_text": preprocessed_comment,
-                            "comment_upvotes": comment.score,
-                            "sentiment": sentiment,
-                            "compound": compound
-                        })
-                        break  # Move to the next post after finding a valid comment
-                
                 processed_posts += 1
                 if progress_callback:
                     progress_callback(processed_posts)
+                if record:
+                    yield record
+                continue
+            
+            if not has_candidates(post, valid_comments, error):
+                skipped_posts += 1
+                if journal is not None and error is None:
+                    journal.record(post.id, None, skipped=True)
+                continue
+            
+            try:
+                # Analyze the highest upvoted valid comment that makes sense
+                record = None
+                if state is not None:
+                    record = select_comment_incremental(
+                        post, valid_comments, state.post_state(subreddit_name, post.id), state,
+                        min_words=min_words,
+                        min_compound_score=min_compound_score,
+                        metrics=metrics
+                    )
+                else:
+                    record = select_record(post, valid_comments, min_words, min_compound_score, metrics,
+                                           score_cache, near_duplicates)
                 
             except Exception as e:
                 print(f"Error processing post {post.title}: {str(e)}")
                 skipped_posts += 1
                 continue
+            
+            if journal is not None:
+                journal.record(post.id, record)
+            processed_posts += 1
+            if progress_callback:
+                progress_callback(processed_posts)
+            if record:
+                yield record
+        
+        print_summary(processed_posts, skipped_posts, cache, state, metrics, journal, score_cache, near_duplicates)
+        if journal is not None:
+            journal.finish()
+        
+    except Exception as e:
+        print(f"Error accessing subreddit {subreddit_name}: {str(e)}")
+
+# Number of candidate comments per post sent to the pool in each round. Most
+# posts are settled by their first few comments, so sending the whole sorted
+# list up front would mostly be wasted work.
+CANDIDATE_WINDOW = 8
+
+def _iter_top_posts_parallel(subreddit_name, limit, min_comment_length, progress_callback,
+                             min_words, min_compound_score, workers, chunk_size,
+                             fetch_concurrency, cache, metrics, journal=None, score_cache=None):
+    """
+    Process pool variant of iter_top_posts. The main thread fetches posts and
+    comment trees and feeds chunks of candidate comments to the pool. Records
+    are yielded in listing order as soon as every earlier post is settled.
+    
+    With a ScoreCache, the main thread settles a post's leading candidates
+    from the cache and only sends the rest of its window, from the first
+    body not in the cache, to the pool; what the pool scores is cached.
+    """
+    try:
+        top_posts = get_top_posts(subreddit_name, limit, cache)
         
-        print(f"\nProcessing Summary:")
-        print(f"Successfully processed: {processed_posts} posts")
-        print(f"Skipped posts: {skipped_posts}")
+        # post index -> [post, iterator over its ranked comments, comments in the
+        # current window, index of the first one sent to the pool]
+        posts = {}
+        # post index -> record, or None for posts without one
+        finished = {}
+        next_index = 0
+        processed_posts = 0
+        skipped_posts = 0
+        config = score_config(min_words, min_compound_score, scorer="vader_batch")
+        
+        # Load the lexicon before the pool forks, so the workers inherit it
+        get_batch_scorer()
+        
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # future -> (post index, bodies) tasks in its chunk
+            pending = {}
+            queued = []
+            queued_comments = 0
+            
+            def submit():
+                nonlocal queued, queued_comments
+                if queued:
+                    future = pool.submit(
+                        select_comment_batches, queued,
+                        min_words=min_words, min_compound_score=min_compound_score,
+                        return_scored=score_cache is not None
+                    )
+                    pending[future] = queued
+                    queued = []
+                    queued_comments = 0
+            
+            def settle(post_index, selection):
+                nonlocal processed_posts
+                post, _, candidates, _ = posts.pop(post_index)
+                finished[post_index] = None
+                if selection:
+                    index, preprocessed_comment, result = selection
+                    finished[post_index] = build_record(post, candidates[index], preprocessed_comment, result)
+                if journal is not None:
+                    journal.record(post.id, finished[post_index])
+                processed_posts += 1
+                if progress_callback:
+                    progress_callback(processed_posts)
+            
+            def enqueue(post_index):
+                nonlocal queued_comments
+                while True:
+                    with timed(metrics, "rank_comments"):
+                        candidates = list(islice(posts[post_index][1], CANDIDATE_WINDOW))
+                    posts[post_index][2] = candidates
+                    bodies = [comment.body for comment in candidates]
+                    offset = 0
+                    if score_cache is not None:
+                        while offset < len(bodies):
+                            cached = score_cache.get(bodies[offset], config)
+                            if cached is None:
+                                break
+                            if cached[1]["meaningful"]:
+                                settle(post_index, (offset, *cached))
+                                return
+                            offset += 1
+                        if offset == len(bodies):
+                            # A short window means the ranking is exhausted
+                            if len(candidates) == CANDIDATE_WINDOW:
+                                continue
+                            settle(post_index, None)
+                            return
+                    posts[post_index][3] = offset
+                    queued.append((post_index, bodies[offset:]))
+                    queued_comments += len(bodies) - offset
+                    if queued_comments >= chunk_size:
+                        submit()
+                    return
+            
+            def collect(done):
+                nonlocal skipped_posts
+                for future in done:
+                    tasks = pending.pop(future)
+                    try:
+                        results, snapshot, scored = future.result()
+                    except Exception as e:
+                        for post_index, _ in tasks:
+                            print(f"Error processing post {posts.pop(post_index)[0].title}: {str(e)}")
+                            finished[post_index] = None
+                        skipped_posts += len(tasks)
+                        continue
+                    if metrics is not None:
+                        metrics.merge(snapshot)
+                    if scored is not None:
+                        bodies = (body for _, task_bodies in tasks for body in task_bodies)
+                        for body, (preprocessed_comment, result) in zip(bodies, scored):
+                            score_cache.put(body, config, preprocessed_comment, result)
+                    for post_index, selection in results:
+                        candidates, offset = posts[post_index][2:]
+                        # A short window means the ranking is exhausted
+                        if selection is None and len(candidates) == CANDIDATE_WINDOW:
+                            enqueue(post_index)
+                            continue
+                        if selection:
+                            index, preprocessed_comment, result = selection
+                            selection = (offset + index, preprocessed_comment, result)
+                        settle(post_index, selection)
+            
+            def ready():
+                nonlocal next_index
+                while next_index in finished:
+                    record = finished.pop(next_index)
+                    next_index += 1
+                    if record:
+                        yield record
+            
+            post_comments = iter_post_comments(top_posts, min_comment_length, fetch_concurrency, cache, metrics,
+                                               skip=journal if journal is not None else ())
+            for post_index, (post, valid_comments, error) in enumerate(post_comments):
+                if journal is not None and post.id in journal:
+                    finished[post_index], skipped = journal.replay(post.id)
+                    if skipped:
+                        skipped_posts += 1
+                    else:
+                        processed_posts += 1
+                        if progress_callback:
+                            progress_callback(processed_posts)
+                elif has_candidates(post, valid_comments, error):
+                    posts[post_index] = [post, iter(valid_comments), [], 0]
+                    enqueue(post_index)
+                else:
+                    skipped_posts += 1
+                    finished[post_index] = None
+                    if journal is not None and error is None:
+                        journal.record(post.id, None, skipped=True)
+                
+                # Handle whatever the pool has finished without blocking the fetch
+                collect([future for future in pending if future.done()])
+                yield from ready()
+            
+            submit()
+            while pending:
+                with timed(metrics, "pool_wait"):
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+                submit()
+                yield from ready()
         
-        return data
+        print_summary(processed_posts, skipped_posts, cache, metrics=metrics, journal=journal,
+                      score_cache=score_cache)
+        if journal is not None:
+            journal.finish()
         
     except Exception as e:
         print(f"Error accessing subreddit {subreddit_name}: {str(e)}")
-        return []
+
+def print_cache_notice(cache):
+    """
+    Prints that the run may reuse cached Reddit data, and how old it can be.
+    """
+    print(f"Reusing listings and comment trees cached in {cache.path} for up to {cache.ttl / 3600:g} hours")
+
+def print_cache_stats(cache):
+    """
+    Prints the cache's hit/miss counts and size.
+    """
+    stats = cache.stats()
+    print(f"Cache: listings {stats['listing_hits']} hits / {stats['listing_misses']} misses, "
+          f"comment trees {stats['comment_tree_hits']} hits / {stats['comment_tree_misses']} misses "
+          f"({stats['cached_comment_trees']} trees, {stats['cached_comments']} comments stored)")
 
 def calculate_metrics(data):
     """
-    Calculates various metrics for the sentiment analysis results.
+    Calculates various metrics for the sentiment analysis results in one
+    pass: vectorized over the columns of a ResultStore, or a single loop over
+    a list of records.
     Returns a dictionary containing different metrics.
     """
     if not data:
@@ -216,11 +1073,23 @@ def calculate_metrics(data):
         }
     
     total = len(data)
-    positive_count = sum(1 for entry in data if entry["sentiment"] == 1)
-    negative_count = sum(1 for entry in data if entry["sentiment"] == -1)
-    neutral_count = sum(1 for entry in data if entry["sentiment"] == 0)
-    
-    avg_compound = sum(abs(entry["compound"]) for entry in data) / total
+    if isinstance(data, ResultStore):
+        summary = data.summary("sentiment", "compound")
+        positive_count = summary["positive"]
+        negative_count = summary["negative"]
+        neutral_count = summary["neutral"]
+        avg_compound = summary["mean_abs_score"]
+    else:
+        counts = {1: 0, -1: 0, 0: 0}
+        abs_compound = 0.0
+        for entry in data:
+            if entry["sentiment"] in counts:
+                counts[entry["sentiment"]] += 1
+            abs_compound += abs(entry["compound"])
+        positive_count = counts[1]
+        negative_count = counts[-1]
+        neutral_count = counts[0]
+        avg_compound = abs_compound / total
     
     return {
         "total_posts": total,
@@ -235,25 +1104,52 @@ def save_to_csv(data, filename="sentiment_analysis_results_VADER.csv"):
     Saves the sentiment analysis results to a CSV file, sorted by post upvotes.
     
     Args:
-        data (list): List of dictionaries containing the analysis results
+        data (ResultStore or list): The analysis results
         filename (str): Name of the output CSV file
     """
     if not data:
         print("No data to save to CSV")
         return
         
-    # Sort by post_upvotes instead of comment_upvotes
-    data = sorted(data, key=lambda x: x['post_upvotes'], reverse=True)
-    
-    keys = data[0].keys()
-    with open(filename, 'w', newline='', encoding='utf-8') as output_file:
-        dict_writer = csv.DictWriter(output_file, fieldnames=keys)
-        dict_writer.writeheader()
-        dict_writer.writerows(data)
+    # Sort by post_upvotes instead of comment_upvotes, through an index
+    results = ResultStore.from_records(data)
+    results.to_csv(filename, order=results.argsort("post_upvotes", descending=True))
     
     print(f"Data saved to {filename}, sorted by post upvotes in descending order")
 
-def main():
+def merge_into_csv(data, filename="sentiment_analysis_results_VADER.csv"):
+    """
+    Merges new results into an existing results CSV: rows for the same post
+    (by url) are replaced, rows for posts this run no longer returned are
+    dropped, and the file is re-sorted by post upvotes, so it holds what a
+    full run would have written.
+    
+    Args:
+        data (ResultStore or list): The analysis results
+        filename (str): Name of the output CSV file
+    """
+    if not os.path.exists(filename) or not data:
+        save_to_csv(data, filename)
+        return
+    
+    with open(filename, newline='', encoding='utf-8') as input_file:
+        previous = {row["url"] for row in csv.DictReader(input_file)}
+    
+    results = ResultStore.from_records(data)
+    current = set(results.column_values("url"))
+    temp_filename = f"{filename}.tmp"
+    results.to_csv(temp_filename, order=results.argsort("post_upvotes", descending=True))
+    os.replace(temp_filename, filename)
+    
+    updated = len(current & previous)
+    print(f"Merged {len(results)} results into {filename} ({updated} updated, {len(current) - updated} new, "
+          f"{len(previous - current)} dropped)")
+
+def main(resume=False):
+    """
+    Runs the analysis; with resume, an interrupted run is continued from its
+    journal instead of starting over.
+    """
     # Configuration
     config = {
         'subreddit_name': "controlproblem",
@@ -263,16 +1159,86 @@ def main():
         'min_compound_score': 0.1,
         'remove_stopwords': True,
         'remove_numbers': True,
-        'remove_emojis': True
+        'remove_emojis': True,
+        'workers': 1,  # 0 uses one process per CPU core
+        'chunk_size': 64,
+        'fetch_concurrency': 1,
+        'cache_path': None,  # e.g. "reddit_cache.sqlite3" to reuse listings and comment trees; None fetches live data
+        'cache_ttl': 24 * 3600,  # Seconds cached listings and comment trees are reused for
+        'incremental': False,  # Only rescore changed comments and merge into output_path, which must be a CSV
+        'state_path': "refresh_state.json",
+        'score_cache_path': "score_cache.json",  # Scores of comment bodies seen before; None keeps them in memory
+        'score_cache_size': 100_000,  # Most comment bodies kept in the score cache
+        'near_duplicate_threshold': None,  # e.g. 0.8 to score one comment per cluster of near-duplicates
+        'journal_path': "vader_run_journal.jsonl",  # Settled posts, for --resume; removed once a run completes
+        'output_path': "sentiment_analysis_results_VADER.csv",  # .csv, .jsonl or .parquet (a directory)
+        'flush_every': 100,  # Records buffered before they are appended to the output
+        'flush_interval': 5.0,  # Seconds between flushes when records arrive slowly
+        'sort_output': True,  # Sort the finished output by post upvotes, on disk
+        'report_path': None,  # Write the per-stage timing report as JSON here
+        'profiler': None,  # "cprofile" or "pyinstrument" to profile the run
+        'profile_output': None  # Profile file; the profile summary is printed without one
     }
     
     print(f"Starting analysis of r/{config['subreddit_name']}...")
     
-    posts_data = fetch_top_posts(
-        config['subreddit_name'], 
-        limit=config['post_limit'],
-        min_comment_length=config['min_comment_length']
-    )
+    cache = None
+    if config['cache_path']:
+        cache = PostCache(config['cache_path'], ttl=config['cache_ttl'])
+        print_cache_notice(cache)
+    if config['incremental'] and not config['output_path'].endswith(".csv"):
+        raise ValueError("Incremental runs merge into a CSV file; set output_path to a .csv file")
+    state = RefreshState(config['state_path']) if config['incremental'] else None
+    run_metrics = RunMetrics()
+    journal = RunJournal(config['journal_path'], resume=resume)
+    score_cache = ScoreCache(config['score_cache_size'], config['score_cache_path'])
+    near_duplicates = None
+    if config['near_duplicate_threshold'] is not None:
+        near_duplicates = NearDuplicateIndex(config['near_duplicate_threshold'])
+    if journal:
+        print(f"Resuming from {config['journal_path']}: {len(journal)} posts already settled")
+    
+    # Normal runs append records to the output as they are produced, so a crash
+    # keeps what was flushed, and only hold the two columns the summary needs.
+    # Incremental runs merge into the existing CSV at the end and keep them all.
+    posts_data = ResultStore()
+    writer = None
+    if state is None:
+        writer = open_writer(config['output_path'], flush_every=config['flush_every'],
+                             flush_interval=config['flush_interval'])
+    try:
+        with profiled(config['profiler'], config['profile_output']):
+            for record in iter_top_posts(
+                config['subreddit_name'], 
+                limit=config['post_limit'],
+                min_comment_length=config['min_comment_length'],
+                min_words=config['min_words'],
+                min_compound_score=config['min_compound_score'],
+                workers=config['workers'],
+                chunk_size=config['chunk_size'],
+                fetch_concurrency=config['fetch_concurrency'],
+                cache=cache,
+                state=state,
+                metrics=run_metrics,
+                journal=journal,
+                score_cache=score_cache,
+                near_duplicates=near_duplicates
+            ):
+                if writer is None:
+                    posts_data.append(record)
+                else:
+                    writer.write(record)
+                    posts_data.append({"sentiment": record["sentiment"], "compound": record["compound"]})
+    finally:
+        if writer is not None:
+            writer.close()
+        score_cache.save()
+    
+    report = run_metrics.report()
+    print(f"\nRun Report:")
+    print(format_report(report))
+    if config['report_path']:
+        save_report(report, config['report_path'])
     
     metrics = calculate_metrics(posts_data)
     print(f"\nResults:")
@@ -283,7 +1249,22 @@ def main():
     print(f"  Neutral: {metrics['neutral_ratio']:.1f}%")
     print(f"Average Compound Score: {metrics['avg_compound']:.3f}")
     
-    save_to_csv(posts_data)
+    if state is not None:
+        state.save()
+        merge_into_csv(posts_data, config['output_path'])
+    elif not writer.records_written:
+        print("No data to save")
+    elif config['sort_output']:
+        sort_file(config['output_path'], "post_upvotes", descending=True)
+        print(f"Data saved to {config['output_path']}, sorted by post upvotes in descending order")
+    else:
+        print(f"Data saved to {config['output_path']}")
+    
+    # Kept if the run was cut short, so that it can be resumed
+    journal.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Analyze the sentiment of a subreddit's top posts with VADER")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run from its journal, skipping the posts it settled")
+    main(resume=parser.parse_args().resume)
\ No newline at end of file